@@ -0,0 +1,84 @@
+"""
+Settings for running the test suite:
+
+    python manage.py test --settings=ecommerce.test_settings
+
+Self-contained, so the tests don't depend on a local settings module.
+Both databases are SQLite: `replica` is a second, independent database
+so the primary/replica routing tests see two real nodes.
+"""
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SECRET_KEY = "test-only-not-secret"
+DEBUG = False
+ALLOWED_HOSTS = ["testserver", "localhost"]
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "xypher_lux",
+]
+
+MIDDLEWARE = [
+    "xypher_lux.middleware.QueryBudgetMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+]
+
+ROOT_URLCONF = "ecommerce.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_primary.sqlite3",
+        # the concurrency tests race threads on the primary: a file (not
+        # the in-memory default) lets them wait on each other's locks, and
+        # SQLite has no row locks, so transactions take the write lock
+        # up front the way select_for_update serializes them elsewhere
+        "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+        "TEST": {"NAME": str(Path(tempfile.gettempdir()) / "xypher_lux_test.sqlite3")},
+    },
+    "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "test_replica.sqlite3"},
+}
+# routing is switched on by the tests that exercise it
+DATABASE_ROUTERS = []
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+DEFAULT_FROM_EMAIL = "noreply@example.com"
+
+USE_TZ = True
+TIME_ZONE = "UTC"
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+STATIC_URL = "/static/"
+MEDIA_URL = "/media/"
+MEDIA_ROOT = tempfile.mkdtemp(prefix="xypher_lux_test_media_")
+PRODUCT_IMAGE_DERIVATIVES_ON_SAVE = False
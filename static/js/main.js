@@ -105,8 +105,9 @@ bind('accountBtn', () => {
 // ============================================================
 
 function getCSRFToken() {
-    const el = document.querySelector('[name="csrfmiddlewaretoken"]');
-    return el ? el.value : '';
+    const el = document.querySelector('[name="csrfmiddlewaretoken"]')
+            || document.querySelector('meta[name="csrf-token"]');
+    return el ? (el.value || el.content) : '';
 }
 
 function showAlert(id, message, type = 'error') {
@@ -534,7 +535,7 @@ if (updateCartForm) {
     });
 }
 
-// Expose cart functions globally so inline onclick attributes work
+// Expose cart functions globally for the data-action dispatcher below
 window.showCartView         = showCartView;
 window.showEmptyCartView    = showEmptyCartView;
 window.showUpdateCartItemView = showUpdateCartItemView;
@@ -547,6 +548,15 @@ window.closeCartModal       = closeCartModal;
 window.incrementUpdateQuantity = incrementUpdateQuantity;
 window.decrementUpdateQuantity = decrementUpdateQuantity;
 
+// Buttons name their handler in data-action="fnName" rather than an inline
+// onclick, so the markup carries no script and main.js stays cacheable
+document.addEventListener('click', e => {
+    const el = e.target.closest('[data-action]');
+    if (!el) return;
+    const handler = window[el.dataset.action];
+    if (typeof handler === 'function') handler();
+});
+
 // ============================================================
 // INIT — auto-dismiss Django message toasts
 // ============================================================
@@ -573,11 +583,49 @@ function sortProducts(value) {
     cards.forEach(card => grid.appendChild(card));
 }
 
+// ============================================================
+// INFINITE SCROLL — keyset-paginated catalog grids
+// ============================================================
+let loadingNextPage = false;
+
+async function loadNextPage() {
+    const loadMore = document.getElementById('loadMore');
+    const grid     = document.getElementById('productsGrid');
+    if (!loadMore || !grid || loadingNextPage) return;
+
+    loadingNextPage = true;
+    try {
+        const res  = await fetch(loadMore.dataset.nextUrl, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        });
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.message);
+
+        grid.insertAdjacentHTML('beforeend', data.html);
+        if (data.has_next) {
+            loadMore.dataset.nextUrl = data.next_url;
+        } else {
+            loadMore.remove();
+        }
+    } catch (err) {
+        console.error('Could not load more products', err);
+    } finally {
+        loadingNextPage = false;
+    }
+}
+
+const loadMoreSentinel = document.getElementById('loadMore');
+if (loadMoreSentinel && 'IntersectionObserver' in window) {
+    new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+    }, { rootMargin: '400px' }).observe(loadMoreSentinel);
+}
+
 function addToCart(productId) {
-    fetch("{% url 'xypher_lux:add_to_cart' %}", {
+    fetch(document.body.dataset.addToCartUrl, {
         method: 'POST',
         headers: {
-            'X-CSRFToken': '{{ csrf_token }}',
+            'X-CSRFToken': getCSRFToken(),
             'Content-Type': 'application/x-www-form-urlencoded',
         },
         body: `product_id=${productId}&quantity=1`
@@ -711,11 +759,12 @@ document.querySelectorAll('.nav-link[data-target]').forEach(btn => {
   });
 
   // ── Delete account ──────────────────────────────────────────────
-  document.getElementById('deleteAccountBtn').addEventListener('click', async () => {
+  const deleteAccountBtn = document.getElementById('deleteAccountBtn');
+  deleteAccountBtn.addEventListener('click', async () => {
     if (!confirm('Are you sure you want to permanently delete your account? This cannot be undone.')) return;
 
     try {
-      const res    = await fetch("{% url 'xypher_lux:delete_account' %}", {
+      const res    = await fetch(deleteAccountBtn.dataset.url, {
         method: 'POST',
         headers: {
           'X-CSRFToken': getCSRFToken(),
@@ -730,6 +779,32 @@ document.querySelectorAll('.nav-link[data-target]').forEach(btn => {
     }
   });
 
+  // ── Mark inbox read ─────────────────────────────────────────────
+  const markReadBtn = document.getElementById('markReadBtn');
+  if (markReadBtn) {
+    markReadBtn.addEventListener('click', async () => {
+      markReadBtn.disabled = true;
+      try {
+        const res = await fetch(markReadBtn.dataset.url, {
+          method: 'POST',
+          headers: {
+            'X-CSRFToken': getCSRFToken(),
+            'X-Requested-With': 'XMLHttpRequest',
+          },
+        });
+        if (res.ok) {
+          document.querySelectorAll('.inbox-item.unread').forEach(item => item.classList.remove('unread'));
+          document.querySelectorAll('.nav-link[data-target="inbox"] .nav-badge').forEach(badge => badge.remove());
+          markReadBtn.remove();
+          return;
+        }
+      } catch (err) {
+        console.error('Mark read error:', err);
+      }
+      markReadBtn.disabled = false;
+    });
+  }
+
   // ── Deep-link to a tab via URL hash e.g. /profile/#manage ──────
   const hash = window.location.hash.replace('#', '');
   if (hash) {
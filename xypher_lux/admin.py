@@ -1,21 +1,51 @@
 from django.contrib import admin
-from .models import Category, Product, Order, OrderItem, Cart, CartItem
+from django.utils import timezone
+from .models import (
+    Category, Product, ProductVariant, Order, OrderItem, Cart, CartItem, OutgoingEmail, StockReservation,
+    DailyProductSales, DailyCategorySales,
+)
+from .cart_summary import with_cart_totals
+from .order_status import transition_orders
+from .pagination import EstimatedCountPaginator
+from .sales_rollups import sales_report
 
 # Register your models here.
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ["name","parent", "slug"]
+    list_display = ["name","parent", "slug", "product_count", "subtree_product_count"]
     list_filter = ["parent"]
     search_fields = ["name"]
     prepopulated_fields = {"slug": ("name",)}
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('parent')
+
+class ProductVariantInline(admin.TabularInline):
+    model = ProductVariant
+    extra = 0
+    fields = ['size', 'color', 'stock']
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display        = ['name', 'category', 'price', 'stock', 'is_featured', 'is_active', 'created_at']
     list_filter         = ['category', 'is_active', 'created_at']
     search_fields       = ['name', 'description']
-    list_editable       = ['price', 'stock','is_featured', 'is_active']
+    # stock is the total of the variants for products sold in them, so it
+    # is edited per variant (see get_readonly_fields)
+    list_editable       = ['price', 'is_featured', 'is_active']
     readonly_fields     = ['created_at', 'updated_at']
+    inlines             = [ProductVariantInline]
+    paginator           = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('category')
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None and obj.variants.exists():
+            return [*self.readonly_fields, 'stock']
+        return self.readonly_fields
 
     def get_prepopulated_fields(self, request, obj=None):
         if obj:
@@ -52,6 +82,8 @@ class CartAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at', 'updated_at', 'subtotal', 'shipping_cost',  'total', 'total_items']
     inlines = [CartItemInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Cart Information', {
@@ -65,6 +97,10 @@ class CartAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # totals are annotated in SQL so list rows don't query their items
+        return with_cart_totals(super().get_queryset(request).select_related('user'))
+
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
@@ -72,6 +108,24 @@ class CartItemAdmin(admin.ModelAdmin):
     list_filter = ['added_at']
     search_fields = ['product__name', 'cart__user__username']
     readonly_fields = ['total_price', 'added_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # the cart's label needs its user; total_price needs the product's price
+        return super().get_queryset(request).select_related('cart__user', 'product')
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'variant', 'quantity', 'holder', 'expires_at']
+    list_filter = ['expires_at']
+    search_fields = ['product__name', 'holder']
+    raw_id_fields = ['product', 'variant']
+    readonly_fields = ['created_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product', 'variant__product')
 
 
 class OrderItemInline(admin.TabularInline):
@@ -88,6 +142,8 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ['order_number', 'user__username', 'user__email']
     readonly_fields = ['order_number', 'created_at', 'updated_at']
     inlines = [OrderItemInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Order Information', {
@@ -107,21 +163,88 @@ class OrderAdmin(admin.ModelAdmin):
     actions = ['mark_as_processing', 'mark_as_shipped', 'mark_as_delivered']
     
     def mark_as_processing(self, request, queryset):
-        queryset.update(status='processing')
+        self._transition(request, queryset, 'processing')
     mark_as_processing.short_description = "Mark selected orders as Processing"
     
     def mark_as_shipped(self, request, queryset):
-        queryset.update(status='shipped')
+        self._transition(request, queryset, 'shipped')
     mark_as_shipped.short_description = "Mark selected orders as Shipped"
     
     def mark_as_delivered(self, request, queryset):
-        queryset.update(status='delivered')
+        self._transition(request, queryset, 'delivered')
     mark_as_delivered.short_description = "Mark selected orders as Delivered"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
+    def _transition(self, request, queryset, status):
+        changed = transition_orders(queryset, status)
+        self.message_user(request, f"{changed} order(s) marked as {status}; customers notified.")
+
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'product_name', 'quantity', 'price', 'total_price']
     list_filter = ['order__created_at']
     search_fields = ['product_name', 'order__order_number']
-    readonly_fields = ['total_price']
\ No newline at end of file
+    readonly_fields = ['total_price']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('order')
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['to', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['retry_now']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def retry_now(self, request, queryset):
+        queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+    retry_now.short_description = "Retry selected emails now"
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Read-only rollup rows; update_sales_rollups is their only writer"""
+    date_hierarchy = 'date'
+    list_filter = ['date']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(RollupAdmin):
+    list_display = ['date', 'product', 'category', 'orders', 'units', 'revenue']
+    raw_id_fields = ['product', 'category']
+    change_list_template = 'admin/xypher_lux/sales_report.html'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product', 'category')
+
+    def changelist_view(self, request, extra_context=None):
+        # the report above the rows: aggregates over the rollups, never Order
+        extra_context = {**(extra_context or {}), 'report': sales_report()}
+        return super().changelist_view(request, extra_context)
+
+
+@admin.register(DailyCategorySales)
+class DailyCategorySalesAdmin(RollupAdmin):
+    list_display = ['date', 'category', 'orders', 'units', 'revenue']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('category')
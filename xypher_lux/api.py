@@ -0,0 +1,170 @@
+# xypher_lux/api.py
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .category_tree import category_tree
+from .db_router import replica_reads
+from .middleware import query_budget
+from .models import Product
+from .pagination import InvalidCursor, KeysetPaginator
+
+API_MAX_AGE = getattr(settings, 'CATALOG_API_MAX_AGE', 60)  # seconds
+API_PAGE_SIZE = getattr(settings, 'CATALOG_API_PAGE_SIZE', 50)
+
+# public product fields and how each is read from a Product
+PRODUCT_FIELDS = {
+    'id': lambda p: p.id,
+    'name': lambda p: p.name,
+    'slug': lambda p: p.slug,
+    'url': lambda p: p.get_absolute_url(),
+    'category': lambda p: p.category.slug,
+    'price': lambda p: str(p.price),
+    'stock': lambda p: p.stock,
+    'in_stock': lambda p: p.is_in_stock,
+    'is_featured': lambda p: p.is_featured,
+    'image': lambda p: p.image.url if p.image else None,
+    'description': lambda p: p.description,
+    'sizes': lambda p: p.sizes,
+    'colors': lambda p: p.colors,
+    'updated_at': lambda p: p.updated_at.isoformat(),
+}
+DEFAULT_LIST_FIELDS = ('id', 'name', 'slug', 'url', 'category', 'price', 'in_stock', 'image')
+
+
+class InvalidFields(Exception):
+    pass
+
+
+def _requested_fields(request, default=tuple(PRODUCT_FIELDS)):
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    fields = tuple(f.strip() for f in raw.split(',') if f.strip())
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise InvalidFields(unknown)
+    return fields
+
+
+def _serialize(product, fields):
+    return {name: PRODUCT_FIELDS[name](product) for name in fields}
+
+
+def _bad_fields(unknown):
+    return JsonResponse({
+        'message': f"Unknown fields: {', '.join(unknown)}",
+        'allowed_fields': list(PRODUCT_FIELDS),
+    }, status=400)
+
+
+def _etag(*parts):
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _listed_products(request):
+    products = Product.objects.filter(is_active=True)
+    if request.GET.get('category'):
+        products = products.filter(category__slug=request.GET['category'])
+    return products
+
+
+def product_list_etag(request):
+    # read from the listed rows themselves, so every process and server
+    # agrees on it; the count catches deletions, which move no updated_at
+    state = _listed_products(request).aggregate(
+        updated_at=Max('updated_at'), category_updated_at=Max('category__updated_at'), count=Count('id'),
+    )
+    return _etag(request.path, *state.values(), request.GET.urlencode())
+
+
+def product_etag(request, id):
+    # a category rename changes the product's payload but not its updated_at
+    row = Product.objects.filter(id=id, is_active=True).values_list('updated_at', 'category__updated_at').first()
+    if row is None:
+        return None
+    return _etag(id, *(value.isoformat() for value in row), request.GET.get('fields', ''))
+
+
+@query_budget(3)
+@replica_reads
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=product_list_etag)
+def product_list_api(request):
+    try:
+        fields = _requested_fields(request, DEFAULT_LIST_FIELDS)
+    except InvalidFields as e:
+        return _bad_fields(e.args[0])
+
+    products = _listed_products(request).select_related('category').with_variants()
+
+    paginator = KeysetPaginator(products, ('id',), per_page=API_PAGE_SIZE)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'message': 'Invalid page cursor.'}, status=400)
+
+    next_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_url = f"{reverse('xypher_lux:api_product_list')}?{params.urlencode()}"
+
+    return JsonResponse({
+        'results': [_serialize(p, fields) for p in page],
+        'next': next_url,
+    })
+
+
+@query_budget(3)
+@replica_reads
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=product_etag)
+def product_detail_api(request, id):
+    try:
+        fields = _requested_fields(request)
+    except InvalidFields as e:
+        return _bad_fields(e.args[0])
+
+    product = Product.objects.select_related('category').with_variants().filter(id=id, is_active=True).first()
+    if product is None:
+        raise Http404('Product not found')
+    return JsonResponse(_serialize(product, fields))
+
+
+def _serialize_node(node):
+    return {
+        'id': node.id,
+        'name': node.name,
+        'slug': node.slug,
+        'url': node.url,
+        'product_count': node.product_count,
+        'subtree_product_count': node.subtree_product_count,
+        'children': [_serialize_node(child) for child in node.children],
+    }
+
+
+def _tree_payload():
+    return {'results': [_serialize_node(node) for node in category_tree()]}
+
+
+def category_tree_etag(request):
+    # hashed from the (cached) tree itself, so it's the same on every process
+    return _etag(request.path, json.dumps(_tree_payload(), sort_keys=True))
+
+
+@query_budget(1)
+@replica_reads
+@require_GET
+@cache_control(public=True, max_age=API_MAX_AGE)
+@condition(etag_func=category_tree_etag)
+def category_tree_api(request):
+    return JsonResponse(_tree_payload())
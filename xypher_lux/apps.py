@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class XypherLuxConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "xypher_lux"
+
+    def ready(self):
+        from . import signals  # noqa: F401
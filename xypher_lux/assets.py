@@ -0,0 +1,159 @@
+# xypher_lux/assets.py
+import gzip
+import re
+from dataclasses import dataclass, asdict
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # .br copies are skipped without it
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+# text assets worth precompressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = tuple(getattr(
+    settings, 'STATIC_COMPRESS_EXTENSIONS', ('.css', '.js', '.svg', '.json', '.txt', '.map', '.xml')
+))
+# third-party trees that ship their own .min files are copied untouched
+MINIFY_EXCLUDE = tuple(getattr(settings, 'STATIC_MINIFY_EXCLUDE', ('admin/',)))
+# files below this many bytes are served as they are
+COMPRESS_MIN_SIZE = getattr(settings, 'STATIC_COMPRESS_MIN_SIZE', 256)
+
+_CSS_COMMENT = re.compile(r'/\*(?!!).*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(source):
+    """Strip comments and whitespace; uses rcssmin when it is installed."""
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    css = _CSS_COMMENT.sub('', source)
+    css = _CSS_SPACE.sub(' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    return css.replace(';}', '}').strip() + '\n'
+
+
+def minify_js(source):
+    """Drop comments, indentation and blank lines; uses rjsmin when installed.
+
+    The built-in fallback only removes comments that open a line and keeps
+    every line break, so strings, regexes and automatic semicolon insertion
+    are left alone.
+    """
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+    lines = []
+    in_comment = False
+    for line in source.splitlines():
+        line = line.strip()
+        if in_comment:
+            end = line.find('*/')
+            if end == -1:
+                continue
+            line = line[end + 2:].strip()
+            in_comment = False
+        if line.startswith('/*') and not line.startswith('/*!'):
+            end = line.find('*/', 2)
+            if end == -1:
+                in_comment = True
+                continue
+            line = line[end + 2:].strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+@dataclass
+class AssetStats:
+    """Bytes of one static file at each build step (0 = not produced)"""
+    name: str
+    hashed_name: str = ''
+    original: int = 0
+    minified: int = 0
+    gzip: int = 0
+    brotli: int = 0
+
+    def as_json(self):
+        return asdict(self)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Manifest storage that minifies CSS/JS before hashing and writes
+    .gz (and, with brotli installed, .br) copies of each hashed text asset.
+
+    Use it as the staticfiles backend and run `manage.py build_assets`:
+
+        STORAGES = {..., 'staticfiles': {'BACKEND': 'xypher_lux.assets.CompressedManifestStorage'}}
+
+    Hashed names change whenever content does, so StaticAssetMiddleware
+    serves them with far-future immutable cache headers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.asset_stats = {}
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        self.asset_stats = {}
+        for name, (storage, path) in paths.items():
+            stats = self.asset_stats[name] = AssetStats(name)
+            with storage.open(path) as original:
+                content = original.read()
+            stats.original = stats.minified = len(content)
+            minify = MINIFIERS.get(_extension(name))
+            if minify is None or '.min.' in name or name.startswith(MINIFY_EXCLUDE):
+                continue
+            minified = minify(content.decode('utf-8')).encode('utf-8')
+            if len(minified) < len(content):
+                # collectstatic copied the source here already; hash the minified copy instead
+                self.delete(name)
+                self._save(name, ContentFile(minified))
+                stats.minified = len(minified)
+
+        yield from super().post_process({name: (self, name) for name in paths}, dry_run, **options)
+
+        for name, stats in self.asset_stats.items():
+            stats.hashed_name = self.hashed_files.get(self.hash_key(self.clean_name(name)), '')
+            if stats.hashed_name and stats.hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self._write_compressed(stats)
+
+    def _write_compressed(self, stats):
+        with self.open(stats.hashed_name) as f:
+            content = f.read()
+        if len(content) < COMPRESS_MIN_SIZE:
+            return
+        variants = [('gzip', '.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('brotli', '.br', brotli.compress(content, quality=11)))
+        for field, suffix, compressed in variants:
+            # not worth a second round trip to the disk if it barely shrinks
+            if len(compressed) < len(content) * 0.95:
+                name = stats.hashed_name + suffix
+                if self.exists(name):
+                    self.delete(name)
+                self._save(name, ContentFile(compressed))
+                setattr(stats, field, len(compressed))
+
+
+def _extension(name):
+    return name[name.rfind('.'):].lower() if '.' in name else ''
@@ -0,0 +1,237 @@
+# xypher_lux/benchmark.py
+import asyncio
+import math
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from asgiref.sync import ThreadSensitiveContext
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from .middleware import collect_metrics
+from .models import Product, ProductVariant
+
+HANDLERS = ('wsgi', 'asgi')
+
+SEARCH_TERMS = ['shirt', 'linen', 'black', 'jacket', 'slim dress', 'wool coat', 'navy', 'vint']
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+@dataclass
+class ScenarioResult:
+    """Latencies (ms) and query counts of every request one scenario made"""
+    name: str
+    latencies: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+
+    def as_json(self):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'throughput_rps': round(len(latencies) / self.wall_seconds, 1) if self.wall_seconds else None,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies), 2) if latencies else None,
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1] if latencies else None,
+            },
+            'queries_per_request': {
+                'mean': round(statistics.fmean(self.queries), 2) if self.queries else None,
+                'max': max(self.queries, default=None),
+            },
+        }
+
+
+class Fixtures:
+    """Ids sampled once up front so scenarios don't query the database for them"""
+
+    def __init__(self, rng, sample_size=1000):
+        self.rng = rng
+        self.products = self.sample(
+            Product.objects.filter(is_active=True), ('id', 'slug'), sample_size,
+        )
+        self.variants = self.sample(
+            ProductVariant.objects.filter(product__is_active=True, stock__gt=100),
+            ('product_id', 'size', 'color'), sample_size,
+        )
+        if not self.products or not self.variants:
+            raise ValueError("No stocked products to benchmark; run seed_catalog first")
+
+    def sample(self, queryset, fields, k):
+        """`fields` of up to k rows picked by the seeded rng, so --seed repeats a run."""
+        ids = list(queryset.order_by('id').values_list('id', flat=True))
+        picked = self.rng.sample(ids, min(k, len(ids)))
+        return list(queryset.filter(id__in=picked).order_by('id').values_list(*fields))
+
+    def product(self):
+        return self.rng.choice(self.products)
+
+    def variant(self):
+        return self.rng.choice(self.variants)
+
+
+# Each scenario takes fixtures and returns (method, url, data), or a list
+# of them where all but the last are untimed setup requests.
+
+def product_list(fixtures):
+    return 'get', reverse('xypher_lux:product_list'), None
+
+
+def search(fixtures):
+    return 'get', reverse('xypher_lux:search'), {'q': fixtures.rng.choice(SEARCH_TERMS)}
+
+
+def product_detail(fixtures):
+    pk, slug = fixtures.product()
+    return 'get', reverse('xypher_lux:product_detail', args=[pk, slug]), None
+
+
+def add_to_cart(fixtures):
+    product_id, size, color = fixtures.variant()
+    return 'post', reverse('xypher_lux:add_to_cart'), {
+        'product_id': product_id, 'size': size, 'color': color, 'quantity': 1,
+    }
+
+
+def checkout(fixtures):
+    # untimed setup: put one line in the cart so there is something to buy
+    return [add_to_cart(fixtures), ('post', reverse('xypher_lux:checkout'), {
+        'shipping_address': '1 Benchmark Street',
+        'shipping_city': 'Testville',
+        'shipping_country': 'Nowhere',
+    })]
+
+
+SCENARIOS = {
+    'product_list': product_list,
+    'search': search,
+    'product_detail': product_detail,
+    'add_to_cart': add_to_cart,
+    'checkout': checkout,
+}
+
+
+def _steps(scenario, fixtures):
+    steps = scenario(fixtures)
+    return steps if isinstance(steps, list) else [steps]
+
+
+class LoadHarness:
+    """Drive storefront views concurrently through Django's test clients.
+
+    'wsgi' runs one thread per worker, each with its own Client; 'asgi'
+    runs every worker as a task on one event loop with an AsyncClient, each
+    request in its own thread-sensitive context as the ASGI handler does.
+    Every worker is logged in as its own user so carts don't contend.
+    """
+
+    def __init__(self, users, concurrency=8, seed=42, handler='wsgi'):
+        if len(users) < concurrency:
+            raise ValueError(f"Need {concurrency} users for {concurrency} workers, found {len(users)}")
+        if handler not in HANDLERS:
+            raise ValueError(f"Unknown handler {handler!r}")
+        self.users = users[:concurrency]
+        self.concurrency = concurrency
+        self.handler = handler
+        self.rng = random.Random(seed)
+        self.fixtures = Fixtures(self.rng)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_seeded_users(cls, prefix, **kwargs):
+        return cls(list(User.objects.filter(username__startswith=prefix).order_by('id')), **kwargs)
+
+    def _next_steps(self, scenario, remaining):
+        with self._lock:
+            if next(remaining, None) is None:
+                return None
+            return _steps(scenario, self.fixtures)
+
+    def _record(self, result, elapsed, metrics, response):
+        with self._lock:
+            result.latencies.append(round(elapsed, 2))
+            result.queries.append(metrics.query_count)
+            if response.status_code >= 400:
+                result.errors += 1
+
+    def _worker(self, user, scenario, result, remaining):
+        # server errors (e.g. lock timeouts under write load) count as errors
+        # instead of stopping the worker
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        try:
+            while (steps := self._next_steps(scenario, remaining)) is not None:
+                *setup, (method, url, data) = steps
+                for setup_method, setup_url, setup_data in setup:
+                    getattr(client, setup_method)(setup_url, setup_data or {})
+                with collect_metrics() as metrics:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(url, data or {})
+                    elapsed = (time.perf_counter() - started) * 1000
+                self._record(result, elapsed, metrics, response)
+        finally:
+            connections.close_all()
+
+    async def _async_request(self, client, method, url, data):
+        async with ThreadSensitiveContext():
+            return await getattr(client, method)(url, data or {})
+
+    async def _async_worker(self, user, scenario, result, remaining):
+        client = AsyncClient(raise_request_exception=False)
+        await client.aforce_login(user)
+        while (steps := self._next_steps(scenario, remaining)) is not None:
+            *setup, (method, url, data) = steps
+            for setup_method, setup_url, setup_data in setup:
+                await self._async_request(client, setup_method, setup_url, setup_data)
+            with collect_metrics() as metrics:
+                started = time.perf_counter()
+                response = await self._async_request(client, method, url, data)
+                elapsed = (time.perf_counter() - started) * 1000
+            self._record(result, elapsed, metrics, response)
+
+    async def _async_drive(self, scenario, result, requests):
+        remaining = iter(range(requests))
+        await asyncio.gather(*(
+            self._async_worker(user, scenario, result, remaining) for user in self.users
+        ))
+
+    def _drive(self, scenario, result, requests):
+        if self.handler == 'asgi':
+            asyncio.run(self._async_drive(scenario, result, requests))
+            return
+        remaining = iter(range(requests))
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            futures = [
+                pool.submit(self._worker, user, scenario, result, remaining)
+                for user in self.users
+            ]
+            for future in futures:
+                future.result()
+
+    def run(self, name, requests, warmup=0):
+        """Make `requests` requests of scenario `name` and return the timings."""
+        scenario = SCENARIOS[name]
+        if warmup:
+            self._drive(scenario, ScenarioResult(name), warmup)
+        result = ScenarioResult(name)
+        started = time.perf_counter()
+        self._drive(scenario, result, requests)
+        result.wall_seconds = time.perf_counter() - started
+        return result
@@ -0,0 +1,295 @@
+# xypher_lux/cart_store.py
+import secrets
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import reservations
+from .cart_summary import CartSummary
+from .models import Cart, CartItem, Product, ProductVariant
+from .reservations import StockUnavailable, cart_holder, guest_holder
+
+GUEST_CART_COOKIE = getattr(settings, 'GUEST_CART_COOKIE', 'guest_cart')
+GUEST_CART_TTL = getattr(settings, 'GUEST_CART_TTL', 60 * 60 * 24 * 14)  # seconds
+GUEST_CART_CACHE_ALIAS = getattr(settings, 'GUEST_CART_CACHE_ALIAS', 'default')
+_COOKIE_SALT = 'xypher_lux.guest_cart'
+
+
+class CartError(Exception):
+    """A cart change that can't be made (unknown line, not enough stock)"""
+
+
+def get_or_create_cart(user):
+    """Return the user's active cart, reopening it after a checkout"""
+    cart, created = Cart.objects.get_or_create(user=user)
+    if not created and not cart.is_active:
+        cart.is_active = True
+        cart.save(update_fields=['is_active', 'updated_at'])
+    return cart
+
+
+def _hold(holder, product, variant, quantity, size='', color='', adding=False):
+    """Reserve stock for a cart line's new quantity, as a CartError if short"""
+    try:
+        reservations.hold(holder, product, variant, quantity, size=size, color=color or '')
+    except StockUnavailable as e:
+        if adding:
+            raise CartError(f'Cannot add more. Only {e.available} items available')
+        raise CartError(str(e))
+
+
+class DatabaseCartStore:
+    """A signed-in user's Cart and CartItem rows"""
+
+    def __init__(self, user):
+        self.user = user
+        self._cart = None
+
+    @property
+    def cart(self):
+        if self._cart is None:
+            self._cart = get_or_create_cart(self.user)
+        return self._cart
+
+    @property
+    def holder(self):
+        return cart_holder(self.cart)
+
+    @property
+    def summary(self):
+        return self.cart.summary
+
+    def items(self):
+        return list(self.cart.items.select_related('product', 'variant'))
+
+    def _item(self, item_id):
+        item = self.cart.items.select_related('product', 'variant').filter(id=item_id).first()
+        if item is None:
+            raise CartError('Cart item not found')
+        return item
+
+    def add(self, product, variant, quantity, size='', color=''):
+        item = self.cart.items.filter(product=product, size=size, color=color).first()
+        if item is None:
+            _hold(self.holder, product, variant, quantity, size, color)
+            return CartItem.objects.create(
+                cart=self.cart, product=product, variant=variant,
+                size=size, color=color, quantity=quantity,
+            )
+        _hold(self.holder, product, variant, item.quantity + quantity, size, color, adding=True)
+        item.quantity += quantity
+        item.save()
+        return item
+
+    def update(self, item_id, quantity):
+        item = self._item(item_id)
+        _hold(self.holder, item.product, item.variant, quantity, item.size, item.color)
+        item.quantity = quantity
+        item.save()
+        return item
+
+    def remove(self, item_id):
+        item = self._item(item_id)
+        item.delete()
+        reservations.release(self.holder, item.product, item.size, item.color)
+        return item
+
+    def clear(self):
+        self.cart.items.all().delete()
+        reservations.release(self.holder)
+
+    def persist(self, response):
+        pass
+
+
+@dataclass
+class GuestCartItem:
+    """One hydrated line of a guest cart, shaped like a CartItem"""
+    id: int
+    product: object
+    variant: object
+    quantity: int
+    size: str = ''
+    color: str = ''
+
+    @property
+    def total_price(self):
+        return self.product.price * self.quantity
+
+    @property
+    def available_stock(self):
+        return self.variant.stock if self.variant else self.product.stock
+
+
+class GuestCartStore:
+    """An anonymous visitor's cart, kept in the cache and never in the database.
+
+    The visitor holds only a signed random token (cookie); the lines
+    ({line id: product/variant ids, size, color, quantity}) live in the
+    GUEST_CART_CACHE_ALIAS cache for GUEST_CART_TTL seconds.
+    """
+
+    def __init__(self, request):
+        self.token = request.get_signed_cookie(GUEST_CART_COOKIE, default=None, salt=_COOKIE_SALT)
+        self.is_new = self.token is None
+        data = None if self.is_new else self._cache().get(self._key())
+        self.data = data or {'next_id': 1, 'lines': {}}
+        self._items = None
+
+    @staticmethod
+    def _cache():
+        return caches[GUEST_CART_CACHE_ALIAS]
+
+    def _key(self):
+        return f'guest_cart:{self.token}'
+
+    @property
+    def holder(self):
+        # a guest's first hold comes before the first save
+        if self.token is None:
+            self.token = secrets.token_urlsafe(24)
+        return guest_holder(self.token)
+
+    def __bool__(self):
+        return bool(self.data['lines'])
+
+    def items(self):
+        if self._items is None:
+            lines = self.data['lines']
+            products = Product.objects.filter(
+                id__in={line['product_id'] for line in lines.values()}, is_active=True
+            ).in_bulk()
+            variants = ProductVariant.objects.in_bulk(
+                {line['variant_id'] for line in lines.values() if line['variant_id']}
+            )
+            # lines whose product was withdrawn since are silently dropped
+            self._items = [
+                GuestCartItem(
+                    id=int(line_id),
+                    product=products[line['product_id']],
+                    variant=variants.get(line['variant_id']),
+                    quantity=line['quantity'],
+                    size=line['size'],
+                    color=line['color'],
+                )
+                for line_id, line in lines.items()
+                if line['product_id'] in products
+            ]
+        return self._items
+
+    @property
+    def summary(self):
+        items = self.items()
+        return CartSummary(
+            subtotal=sum((item.total_price for item in items), CartSummary().subtotal),
+            total_items=sum(item.quantity for item in items),
+        )
+
+    def _line(self, item_id):
+        line = self.data['lines'].get(str(item_id))
+        if line is None:
+            raise CartError('Cart item not found')
+        return line
+
+    def _save(self):
+        if self.token is None:
+            self.token = secrets.token_urlsafe(24)
+        self._items = None
+        self._cache().set(self._key(), self.data, GUEST_CART_TTL)
+
+    def add(self, product, variant, quantity, size='', color=''):
+        for line in self.data['lines'].values():
+            if (line['product_id'], line['size'], line['color']) == (product.id, size, color):
+                _hold(self.holder, product, variant, line['quantity'] + quantity, size, color, adding=True)
+                line['quantity'] += quantity
+                break
+        else:
+            _hold(self.holder, product, variant, quantity, size, color)
+            self.data['lines'][str(self.data['next_id'])] = {
+                'product_id': product.id,
+                'variant_id': variant.id if variant else None,
+                'size': size,
+                'color': color,
+                'quantity': quantity,
+            }
+            self.data['next_id'] += 1
+        self._save()
+
+    def update(self, item_id, quantity):
+        line = self._line(item_id)
+        item = next((i for i in self.items() if i.id == int(item_id)), None)
+        if item is None:
+            raise CartError('This product is no longer available')
+        _hold(self.holder, item.product, item.variant, quantity, item.size, item.color)
+        line['quantity'] = item.quantity = quantity
+        self._save()
+        return item
+
+    def remove(self, item_id):
+        line = self._line(item_id)
+        item = next((i for i in self.items() if i.id == int(item_id)), None)
+        del self.data['lines'][str(item_id)]
+        self._save()
+        reservations.release(self.holder, line['product_id'], line['size'], line['color'])
+        return item
+
+    def clear(self):
+        self.data['lines'] = {}
+        if not self.is_new:
+            self._cache().delete(self._key())
+            reservations.release(self.holder)
+        self._items = None
+
+    def persist(self, response):
+        """Hand a newly created guest cart's token to the browser."""
+        if self.is_new and self.data['lines']:
+            response.set_signed_cookie(
+                GUEST_CART_COOKIE, self.token, salt=_COOKIE_SALT,
+                max_age=GUEST_CART_TTL, httponly=True, samesite='Lax',
+            )
+
+
+def get_cart_store(request):
+    """The cart of whoever is making the request, signed in or not."""
+    if request.user.is_authenticated:
+        return DatabaseCartStore(request.user)
+    return GuestCartStore(request)
+
+
+def merge_guest_cart(request, user):
+    """Fold the request's guest cart into `user`'s Cart with one bulk upsert.
+
+    Quantities of lines already in the user's cart are added together and
+    capped at the stock others don't hold; the guest's stock holds move
+    over to the cart. Returns the number of lines merged.
+    """
+    guest = GuestCartStore(request)
+    if not guest:
+        return 0
+    cart = get_or_create_cart(user)
+    existing = {
+        (item.product_id, item.size, item.color): item.quantity
+        for item in cart.items.only('product_id', 'size', 'color', 'quantity')
+    }
+
+    items = guest.items()
+    unreserved = reservations.unreserved_stock(items, cart_holder(cart), guest.holder)
+    merged = []
+    for item, available in zip(items, unreserved):
+        key = (item.product.id, item.size, item.color)
+        quantity = min(existing.get(key, 0) + item.quantity, available)
+        if quantity > 0:
+            merged.append(CartItem(
+                cart=cart, product=item.product, variant=item.variant,
+                size=item.size, color=item.color, quantity=quantity,
+            ))
+    CartItem.objects.bulk_create(
+        merged,
+        update_conflicts=True,
+        unique_fields=['cart', 'product', 'size', 'color'],
+        update_fields=['quantity', 'variant'],
+    )
+    reservations.hold_lines(cart_holder(cart), merged)
+    guest.clear()
+    return len(merged)
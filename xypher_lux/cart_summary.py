@@ -0,0 +1,81 @@
+# xypher_lux/cart_summary.py
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+
+SHIPPING_FLAT_RATE = Decimal('5.00')
+TAX_RATE = Decimal('0.08')  # 8% tax
+ZERO = Decimal('0.00')
+
+
+@dataclass(frozen=True)
+class CartSummary:
+    """Totals of a cart, computed from one aggregate query"""
+    subtotal: Decimal = ZERO
+    total_items: int = 0
+
+    def __post_init__(self):
+        # some backends drop the scale of aggregated decimals
+        object.__setattr__(self, 'subtotal', Decimal(self.subtotal).quantize(ZERO))
+
+    @property
+    def shipping_cost(self):
+        return SHIPPING_FLAT_RATE if self.subtotal > 0 else ZERO
+
+    @property
+    def tax(self):
+        return self.subtotal * TAX_RATE
+
+    @property
+    def total(self):
+        return self.subtotal + self.shipping_cost + self.tax
+
+    def as_json(self):
+        """Values returned to the AJAX cart endpoints"""
+        return {
+            'cart_subtotal': str(self.subtotal),
+            'cart_total': str(self.total),
+            'cart_total_items': self.total_items,
+        }
+
+
+def _subtotal_expression(prefix=''):
+    return Coalesce(
+        Sum(F(f'{prefix}product__price') * F(f'{prefix}quantity')),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def _total_items_expression(prefix=''):
+    return Coalesce(
+        Sum(f'{prefix}quantity'),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def summarize_cart(cart):
+    """Return a CartSummary for `cart` using a single query on its items."""
+    from .models import CartItem
+
+    totals = CartItem.objects.filter(cart_id=cart.pk).aggregate(
+        subtotal=_subtotal_expression(),
+        total_items=_total_items_expression(),
+    )
+    return CartSummary(subtotal=totals['subtotal'], total_items=totals['total_items'])
+
+
+def with_cart_totals(queryset):
+    """Annotate a Cart queryset so each row carries its own summary.
+
+    Carts loaded through this queryset answer `cart.summary` (and the
+    subtotal/total properties) without any further queries, which keeps
+    changelists and order pipelines free of per-row lookups.
+    """
+    return queryset.annotate(
+        _summary_subtotal=_subtotal_expression('items__'),
+        _summary_total_items=_total_items_expression('items__'),
+    )
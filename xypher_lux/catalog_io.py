@@ -0,0 +1,212 @@
+# xypher_lux/catalog_io.py
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Category, Product, ProductVariant
+from .search import get_backend
+
+# file columns in export order; `category` holds the category slug
+COLUMNS = [
+    'slug', 'name', 'category', 'description', 'price', 'stock',
+    'is_active', 'is_featured', 'available_sizes', 'available_colors',
+]
+# a row for a slug that isn't in the catalog yet must have these
+REQUIRED_FOR_CREATE = {'name', 'category', 'price'}
+FORMATS = ('csv', 'jsonl')
+
+
+class RowError(ValueError):
+    def __init__(self, line, message):
+        self.line = line
+        super().__init__(f'line {line}: {message}')
+
+
+def guess_format(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(f, fmt):
+    """Yield (line number, {column: raw value}) from an open file, one row at a time."""
+    if fmt == 'csv':
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            yield line, row
+        return
+    for line, text in enumerate(f, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            raise RowError(line, f'invalid JSON ({e})')
+        if not isinstance(row, dict):
+            raise RowError(line, 'expected a JSON object')
+        yield line, row
+
+
+def _clean(column, value):
+    """Convert one raw value with the model field's own parsing and validators."""
+    model_field = Product._meta.get_field(column)
+    if value is None or value == '':
+        if not model_field.has_default() and not model_field.blank:
+            raise ValidationError('is required')
+        return model_field.get_default()
+    if isinstance(value, str):
+        value = value.strip()
+    return model_field.clean(value, None)
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)  # RowError, in file order
+    error_count: int = 0
+
+
+class CatalogImporter:
+    """Upsert products by slug from a stream of rows, one chunk at a time.
+
+    Each chunk costs a lookup of its slugs and, inside one transaction,
+    either a single bulk upsert on slug (files with every column needed to
+    create a product) or a bulk_update of just the file's columns. Categories are resolved through a slug -> id
+    map loaded once. Rows that don't validate are skipped and reported;
+    strict=True raises the first one instead. So are `stock` values for
+    products sold in variants, whose stock is their variants' total.
+    """
+
+    def __init__(self, batch_size=2000, strict=False, reindex=True, max_errors=50):
+        self.batch_size = batch_size
+        self.strict = strict
+        self.reindex = reindex
+        self.max_errors = max_errors
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.category_ids = set()
+        self.stats = ImportStats()
+
+    def _error(self, error):
+        if self.strict:
+            raise error
+        self.stats.error_count += 1
+        if len(self.stats.errors) < self.max_errors:
+            self.stats.errors.append(error)
+
+    def _parse(self, line, row, columns):
+        values = {}
+        for column in columns:
+            raw = row.get(column)
+            if column == 'category':
+                category_id = self.categories.get((raw or '').strip())
+                if category_id is None:
+                    raise RowError(line, f'unknown category {raw!r}')
+                values['category_id'] = category_id
+                continue
+            try:
+                values[column] = _clean(column, raw)
+            except ValidationError as e:
+                raise RowError(line, f"{column}: {' '.join(e.messages)}")
+        return values
+
+    def run(self, rows, progress=None):
+        """Import (line, row) pairs; `progress(stats)` is called after every chunk."""
+        chunk = {}
+        columns = None
+        for line, row in rows:
+            if columns is None:
+                # the first row fixes which columns this file updates
+                columns = [c for c in COLUMNS if c in row]
+                if 'slug' not in columns:
+                    raise RowError(line, "the file has no 'slug' column")
+            self.stats.rows += 1
+            try:
+                values = self._parse(line, row, columns)
+            except RowError as e:
+                self._error(e)
+                continue
+            # a slug repeated within a chunk: the later row wins
+            chunk[values['slug']] = (line, values)
+            if len(chunk) >= self.batch_size:
+                self._write(chunk, columns)
+                chunk = {}
+                if progress:
+                    progress(self.stats)
+        if chunk:
+            self._write(chunk, columns)
+            if progress:
+                progress(self.stats)
+        return self.stats
+
+    def _write(self, chunk, columns):
+        fields = ['category_id' if c == 'category' else c for c in columns if c != 'slug']
+        can_create = not REQUIRED_FOR_CREATE - set(columns)
+        now = timezone.now()
+        with transaction.atomic():
+            existing = dict(Product.objects.filter(slug__in=list(chunk)).values_list('slug', 'id'))
+            with_variants = set()
+            if 'stock' in columns and existing:
+                # their stock is the sum of their variants' (see sync_product_stock)
+                with_variants = set(
+                    ProductVariant.objects.filter(product_id__in=existing.values())
+                    .values_list('product_id', flat=True).distinct()
+                )
+            new, known = [], []
+            for slug, (line, values) in chunk.items():
+                if existing.get(slug) in with_variants:
+                    self._error(RowError(line, "stock: the product has variants, set their stock instead"))
+                elif slug in existing:
+                    known.append(Product(id=existing[slug], updated_at=now, **values))
+                elif can_create:
+                    new.append(Product(**values))
+                else:
+                    self._error(RowError(line, f"new product needs {', '.join(sorted(REQUIRED_FOR_CREATE))}"))
+
+            if can_create:
+                # full rows: one INSERT ... ON CONFLICT (slug) DO UPDATE for the chunk
+                for product in known:
+                    product.id = None
+                Product.objects.bulk_create(
+                    new + known,
+                    update_conflicts=True,
+                    unique_fields=['slug'],
+                    update_fields=fields + ['updated_at'],
+                )
+            elif known and fields:
+                # some columns only: update just those on rows that exist
+                Product.objects.bulk_update(known, fields + ['updated_at'], batch_size=500)
+
+        self.stats.created += len(new)
+        self.stats.updated += len(known)
+        self.category_ids.update(p.category_id for p in new + known if p.category_id)
+        if self.reindex:
+            get_backend().index_products(
+                Product.objects.filter(slug__in=[p.slug for p in new + known]).select_related('category')
+            )
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Yield one {column: value} dict per product, streaming with iterator()."""
+    fields = ['category__slug' if c == 'category' else c for c in COLUMNS]
+    for values in queryset.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size):
+        yield dict(zip(COLUMNS, values))
+
+
+def write_rows(f, rows, fmt):
+    """Write rows as CSV (with a header) or JSON lines; returns the row count."""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+    for row in rows:
+        f.write(json.dumps(row, default=str))
+        f.write('\n')
+        count += 1
+    return count
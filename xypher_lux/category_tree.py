@@ -0,0 +1,125 @@
+# xypher_lux/category_tree.py
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Category, Product
+
+TREE_CACHE_KEY = 'categories:tree'
+TREE_CACHE_TTL = getattr(settings, 'CATEGORY_TREE_CACHE_TTL', 60 * 60)  # seconds
+
+
+@dataclass
+class CategoryNode:
+    """Cached, picklable snapshot of one category in the navigation tree"""
+    id: int
+    name: str
+    slug: str
+    url: str
+    parent_id: int
+    product_count: int
+    subtree_product_count: int
+    children: list = field(default_factory=list)
+
+    def get_absolute_url(self):
+        return self.url
+
+
+def build_tree():
+    """Load every category in one query and link them into root nodes."""
+    nodes = {
+        category.id: CategoryNode(
+            id=category.id,
+            name=category.name,
+            slug=category.slug,
+            url=category.get_absolute_url(),
+            parent_id=category.parent_id,
+            product_count=category.product_count,
+            subtree_product_count=category.subtree_product_count,
+        )
+        for category in Category.objects.all()
+    }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.parent_id)
+        (parent.children if parent else roots).append(node)
+    return roots
+
+
+def category_tree():
+    """The whole navigation tree with counts, from the cache when possible."""
+    tree = cache.get(TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_tree()
+        cache.set(TREE_CACHE_KEY, tree, TREE_CACHE_TTL)
+    return tree
+
+
+def iter_nodes(nodes=None):
+    for node in category_tree() if nodes is None else nodes:
+        yield node
+        yield from iter_nodes(node.children)
+
+
+def categories_named(name):
+    """Tree nodes whose name matches `name` case-insensitively."""
+    name = name.lower()
+    return [node for node in iter_nodes() if node.name.lower() == name]
+
+
+def invalidate_tree():
+    cache.delete(TREE_CACHE_KEY)
+
+
+def adjust_product_count(category_id, delta):
+    """Add `delta` active products to a category and all of its ancestors.
+
+    Counts are floored at 0: bulk paths that skip the signals can leave
+    them low, and a delete must not fail on the unsigned columns because
+    of it (recount_categories puts them right).
+    """
+    path = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+    if path is None:
+        return
+    Category.objects.filter(pk=category_id).update(product_count=Greatest(F('product_count') + delta, 0))
+    ancestor_ids = [int(pk) for pk in path.split('/') if pk]
+    Category.objects.filter(pk__in=ancestor_ids).update(
+        subtree_product_count=Greatest(F('subtree_product_count') + delta, 0)
+    )
+    invalidate_tree()
+
+
+def rebuild_paths():
+    """Recompute every materialized path from the parent links."""
+    categories = {c.id: c for c in Category.objects.only('id', 'parent_id', 'path')}
+
+    def path_of(category):
+        parent = categories.get(category.parent_id)
+        return f'{path_of(parent) if parent else ""}{category.id}/'
+
+    for category in categories.values():
+        category.path = path_of(category)
+    Category.objects.bulk_update(categories.values(), ['path'], batch_size=500)
+    invalidate_tree()
+
+
+def recount_categories():
+    """Recompute direct and subtree product counts from scratch."""
+    direct = dict(
+        Product.objects.filter(is_active=True).order_by()
+        .values_list('category_id').annotate(n=Count('id'))
+    )
+    categories = list(Category.objects.only('id', 'path'))
+    subtree = Counter()
+    for category in categories:
+        for ancestor_id in category.ancestor_ids:
+            subtree[ancestor_id] += direct.get(category.id, 0)
+    for category in categories:
+        category.product_count = direct.get(category.id, 0)
+        category.subtree_product_count = subtree[category.id]
+    Category.objects.bulk_update(categories, ['product_count', 'subtree_product_count'], batch_size=500)
+    invalidate_tree()
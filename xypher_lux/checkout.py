@@ -0,0 +1,147 @@
+# xypher_lux/checkout.py
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+
+from .fragment_cache import bump_catalog
+from .models import CartItem, OrderItem, Product, ProductVariant
+from .reservations import cart_holder, release, unreserved_stock
+
+
+class EmptyCart(Exception):
+    pass
+
+
+class InsufficientStock(Exception):
+    """Raised when any line of an order can't be covered by current stock"""
+
+    def __init__(self, shortages):
+        # shortages: {product name: units still available}
+        self.shortages = shortages
+        details = ', '.join(f'{name} (only {stock} left)' for name, stock in shortages.items())
+        super().__init__(f'Not enough stock for {details}')
+
+
+@dataclass
+class CheckoutResult:
+    order: object
+    timings: dict = field(default_factory=dict)  # phase -> milliseconds
+
+
+@contextmanager
+def _phase(timings, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def _decrement_stock(model, quantities, **extra):
+    """Take `quantities` ({pk: units}) off `model.stock` in one conditional UPDATE.
+
+    Only rows that still have enough stock match the WHERE clause, so a
+    short row count means at least one product would have oversold.
+    """
+    enough = Q()
+    for pk, quantity in quantities.items():
+        enough |= Q(id=pk, stock__gte=quantity)
+    updated = model.objects.filter(enough).update(
+        stock=F('stock') - Case(*[When(id=pk, then=qty) for pk, qty in quantities.items()]),
+        **extra
+    )
+    if updated != len(quantities):
+        rows = model.objects.filter(id__in=quantities)
+        if model is ProductVariant:
+            rows = rows.select_related('product')
+        raise InsufficientStock({
+            str(row): row.stock for row in rows if row.stock < quantities[row.id]
+        })
+
+
+def place_order(cart, order):
+    """Turn `cart` into `order` (an unsaved Order with shipping details set).
+
+    Everything runs in one transaction: the order row, one bulk insert of
+    its items, a read of the units other carts hold, guarded stock
+    UPDATEs (one for variants, one for products), one DELETE of the cart
+    lines and one of their stock holds, which the sale has now used up.
+    A line needing more than the stock left over by other carts' live
+    holds, or more than the stock itself, raises InsufficientStock and
+    rolls the whole order back.
+
+    Product.stock stays the sold-down counter: the guarded UPDATE is one
+    short statement per order and the only thing that stops an oversell
+    between holds that lapsed; cart traffic (adds, updates) only touches
+    the reservation ledger.
+    """
+    timings = {}
+    with _phase(timings, 'total'), transaction.atomic():
+        with _phase(timings, 'load_cart'):
+            items = list(cart.items.select_related('product', 'variant'))
+            if not items:
+                raise EmptyCart()
+            summary = cart.summary
+
+        with _phase(timings, 'create_order'):
+            order.user = cart.user
+            order.order_number = f'ORD-{uuid.uuid4().hex[:8].upper()}'
+            order.subtotal = summary.subtotal
+            order.shipping_cost = summary.shipping_cost
+            order.total = summary.total
+            order.save()
+
+        with _phase(timings, 'create_items'):
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=item.product,
+                    variant=item.variant,
+                    product_name=item.product.name,
+                    quantity=item.quantity,
+                    price=item.product.price,
+                    size=item.size,
+                    color=item.color,
+                )
+                for item in items
+            ])
+
+        with _phase(timings, 'reserve_stock'):
+            # units held by other carts aren't for sale, whether or not
+            # this cart's own hold has lapsed
+            short = {
+                str(item.variant or item.product): available
+                for item, available in zip(items, unreserved_stock(items, cart_holder(cart)))
+                if item.quantity > available
+            }
+            if short:
+                raise InsufficientStock(short)
+            # Product.stock is the total across variants, so both are taken
+            quantities = Counter()
+            variant_quantities = Counter()
+            for item in items:
+                quantities[item.product_id] += item.quantity
+                if item.variant_id:
+                    variant_quantities[item.variant_id] += item.quantity
+            if variant_quantities:
+                _decrement_stock(ProductVariant, variant_quantities)
+            # update() skips auto_now, and API ETags are derived from updated_at
+            _decrement_stock(Product, quantities, updated_at=timezone.now())
+
+        with _phase(timings, 'clear_cart'):
+            CartItem.objects.filter(cart=cart).delete()
+            release(cart_holder(cart))
+            cart.is_active = False
+            cart.save(update_fields=['is_active', 'updated_at'])
+
+        # stock badges in cached fragments changed; flush them once committed
+        category_ids = {item.product.category_id for item in items}
+        transaction.on_commit(lambda: bump_catalog(*category_ids))
+
+    return CheckoutResult(order=order, timings=timings)
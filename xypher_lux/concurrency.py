@@ -0,0 +1,8 @@
+# xypher_lux/concurrency.py
+from asgiref.sync import sync_to_async
+
+from .middleware import timed_render
+
+# templates may still touch request.user, the session or lazy relations,
+# so rendering goes back to the request's sync thread
+arender = sync_to_async(timed_render)
@@ -0,0 +1,155 @@
+# xypher_lux/db_router.py
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# read-only copies of the default database, by DATABASES alias:
+#   DATABASE_ROUTERS = ['xypher_lux.db_router.PrimaryReplicaRouter']
+#   DATABASE_REPLICAS = ['replica1', 'replica2']
+REPLICAS = list(getattr(settings, 'DATABASE_REPLICAS', ()))
+# after a write, that client's reads stay on the primary this long, so
+# replication lag never hides their own change from them
+STICKY_SECONDS = getattr(settings, 'DATABASE_STICKY_SECONDS', 10)
+STICKY_COOKIE = getattr(settings, 'DATABASE_STICKY_COOKIE', 'primary_until')
+
+
+@dataclass
+class RoutingState:
+    """Where the current request's reads may go"""
+    replica: str = None  # chosen by replica_reads(); None reads the primary
+    pinned: bool = False  # the client wrote recently
+    wrote: bool = False  # something was written during this request
+
+
+# one shared object per request: sync_to_async threads copy the
+# context, so a write there still pins the request
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+def current_state():
+    return _state.get()
+
+
+@contextmanager
+def read_from_replica():
+    """Send reads inside the block to a replica, unless the client is pinned."""
+    state = _state.get()
+    token = None
+    if state is None:
+        # outside DatabaseRoutingMiddleware (tests, commands): a state for this block only
+        state = RoutingState()
+        token = _state.set(state)
+    previous = state.replica
+    if REPLICAS and not state.pinned and previous is None:
+        # one replica per request, so its reads see one consistent snapshot
+        state.replica = random.choice(REPLICAS)
+    try:
+        yield state
+    finally:
+        state.replica = previous
+        if token is not None:
+            _state.reset(token)
+
+
+def replica_reads(view_func):
+    """Let a read-only view's queries go to a replica (sync or async views)."""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            with read_from_replica():
+                return await view_func(request, *args, **kwargs)
+    else:
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            with read_from_replica():
+                return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """Writes go to the primary; reads go to a replica only inside replica_reads.
+
+    Reads stay on the primary when the client wrote recently, once the
+    request itself has written, and inside a transaction on the primary
+    (ATOMIC_REQUESTS, atomic blocks), whose uncommitted rows a replica
+    can't see.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class DatabaseRoutingMiddleware:
+    """Track each request's writes and pin the client to the primary after one.
+
+    The pin is a cookie holding its expiry time, so checking it needs no
+    session or database lookup. Put it before SessionMiddleware so
+    session saves count as writes too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        return RoutingState(pinned=pinned_until > time.time())
+
+    def finish(self, state, response):
+        if state.wrote and STICKY_SECONDS:
+            response.set_cookie(
+                STICKY_COOKIE, f'{time.time() + STICKY_SECONDS:.0f}',
+                max_age=STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
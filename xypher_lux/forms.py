@@ -97,14 +97,14 @@ class AddToCartForm(forms.Form):
         super().__init__(*args, **kwargs)
 
         if product:
-            # Dynamically set size choices based on product sizes
-            if product.available_sizes:
-                sizes = [(s.strip(), s.strip()) for s in product.available_sizes.split(',')]
-                self.fields['size'].choices = [('','Select Size')] + sizes
+            # Dynamically set size/color choices from the product's variants
+            sizes = product.sizes
+            if sizes:
+                self.fields['size'].choices = [('','Select Size')] + [(s, s) for s in sizes]
 
-            if product.available_colors:
-                colors = [(c.strip(), c.strip()) for c in product.available_colors.split(',')]
-                self.fields['color'].choices = [('', 'Select Color')] + colors
+            colors = product.colors
+            if colors:
+                self.fields['color'].choices = [('', 'Select Color')] + [(c, c) for c in colors]
 
     def clean_quantity(self):
         quantity = self.cleaned_data.get('quantity')
@@ -130,10 +130,10 @@ class UpdateCartItemForm(forms.ModelForm):
             raise forms.ValidationError("Quantity must be at least 1.")
 
         # check the stock availabilty 
-        if hasattr(self.instance, "product"):
-            if quantity > self.instance.product.stock:
+        if self.instance.product_id:
+            if quantity > self.instance.available_stock:
                 raise forms.ValidationError(
-                    f"only {self.instance.product.stock} items available"
+                    f"only {self.instance.available_stock} items available"
                 )
         return quantity
     
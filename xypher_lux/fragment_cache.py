@@ -0,0 +1,101 @@
+# xypher_lux/fragment_cache.py
+import hashlib
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')
+FRAGMENT_TIMEOUT = getattr(settings, 'CATALOG_FRAGMENT_TIMEOUT', 60 * 15)  # seconds
+
+# anything that depends on more than one category
+CATALOG_SCOPE = 'catalog'
+
+# hit/miss counters of this worker process, keyed by fragment name
+hits = Counter()
+misses = Counter()
+
+_MISSING = object()
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(scope):
+    return f'catalog:version:{scope}'
+
+
+def _fresh_version():
+    # never reuse a number after the version key was evicted, or old
+    # fragments keyed with it would come back to life
+    return time.time_ns()
+
+
+def get_versions(scopes):
+    cache = _cache()
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            version = _fresh_version()
+            cache.add(key, version, None)
+            found[key] = cache.get(key, version)
+    return [found[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Invalidate every fragment cached under any of `scopes`."""
+    cache = _cache()
+    for scope in set(scopes):
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), None)
+
+
+def bump_catalog(*category_ids):
+    """Invalidate catalog-wide fragments and those of the given categories."""
+    bump_versions(CATALOG_SCOPE, *(category_scope(pk) for pk in category_ids if pk))
+
+
+def fragment_key(name, scopes, vary_on=()):
+    versions = ':'.join(str(v) for v in get_versions(scopes))
+    digest = hashlib.md5(':'.join(str(v) for v in vary_on).encode()).hexdigest()
+    return f'fragment:{name}:{versions}:{digest}'
+
+
+def get_or_render(name, scopes, render, vary_on=(), timeout=FRAGMENT_TIMEOUT):
+    """Return the cached value of a fragment, calling `render()` on a miss."""
+    cache = _cache()
+    key = fragment_key(name, scopes, vary_on)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        misses[name] += 1
+        value = render()
+        cache.set(key, value, timeout)
+    else:
+        hits[name] += 1
+    return value
+
+
+def stats():
+    """Hit/miss counters per fragment for this worker process."""
+    return {
+        'pid': os.getpid(),
+        'fragments': {
+            name: {
+                'hits': hits[name],
+                'misses': misses[name],
+                'hit_ratio': round(hits[name] / (hits[name] + misses[name]), 3),
+            }
+            for name in sorted(set(hits) | set(misses))
+        },
+    }
@@ -0,0 +1,119 @@
+# xypher_lux/images.py
+import hashlib
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageOps
+
+from .fragment_cache import bump_catalog
+
+logger = logging.getLogger(__name__)
+
+# widths (px) generated for every product image; none wider than the original
+DERIVATIVE_WIDTHS = tuple(getattr(settings, 'PRODUCT_IMAGE_WIDTHS', (320, 640, 960, 1280)))
+# format -> (file extension, Pillow save options)
+DERIVATIVE_FORMATS = {
+    'webp': ('webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+# build derivatives right after an upload is saved (in a background thread);
+# switch off to leave it all to the build_image_derivatives command
+BUILD_ON_SAVE = getattr(settings, 'PRODUCT_IMAGE_DERIVATIVES_ON_SAVE', True)
+
+_executor = None
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def derivative_name(name, digest, width, extension):
+    """products/2024/05/01/shirt.jpg -> products/2024/05/01/shirt.<hash>.640w.webp"""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, f'{stem}.{digest}.{width}w.{extension}')
+
+
+def build_derivatives(name, storage=None):
+    """Write resized WebP and JPEG copies of the stored image `name`.
+
+    Returns the manifest kept in Product.image_derivatives:
+    {'hash', 'width', 'height', 'webp': {width: name}, 'jpeg': {width: name}}.
+    Names carry a hash of the source bytes, so a replaced image gets new
+    URLs (safe to cache forever) and reruns skip files that already exist.
+    Only touches storage, never the database, so it can run in a worker process.
+    """
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as f:
+        data = f.read()
+    digest = content_hash(data)
+
+    with Image.open(io.BytesIO(data)) as source:
+        source = ImageOps.exif_transpose(source)
+        width, height = source.size
+        widths = [w for w in DERIVATIVE_WIDTHS if w <= width]
+        if width < DERIVATIVE_WIDTHS[-1] and width not in widths:
+            # small originals still get one full-size copy in each format
+            widths.append(width)
+
+        manifest = {'hash': digest, 'width': width, 'height': height}
+        for fmt, (extension, options) in DERIVATIVE_FORMATS.items():
+            manifest[fmt] = {}
+            for target in widths:
+                target_name = derivative_name(name, digest, target, extension)
+                if not storage.exists(target_name):
+                    resized = source.copy()
+                    resized.thumbnail((target, round(height * target / width)), Image.LANCZOS)
+                    if fmt == 'jpeg' and resized.mode not in ('RGB', 'L'):
+                        resized = resized.convert('RGB')
+                    buffer = io.BytesIO()
+                    resized.save(buffer, fmt.upper(), **options)
+                    target_name = storage.save(target_name, ContentFile(buffer.getvalue()))
+                # JSON object keys are strings; keep them that way from the start
+                manifest[fmt][str(target)] = target_name
+    return manifest
+
+
+def update_product_derivatives(product_id, name):
+    """Build derivatives for one product and store the manifest on it."""
+    from .models import Product
+
+    try:
+        manifest = build_derivatives(name) if name else {}
+    except Exception:
+        logger.exception("Could not build image derivatives for product %s (%s)", product_id, name)
+        return
+    # update() so this doesn't re-run the save signals; skip if the image
+    # was replaced again in the meantime
+    if Product.objects.filter(pk=product_id, image=name).update(image_derivatives=manifest):
+        # cached grids and rails still hold the original's <img> markup
+        category_id = Product.objects.filter(pk=product_id).values_list('category_id', flat=True).first()
+        bump_catalog(category_id)
+
+
+def _run_in_background(product_id, name):
+    try:
+        update_product_derivatives(product_id, name)
+    finally:
+        connection.close()
+
+
+def schedule_derivatives(product_id, name):
+    """Build a freshly uploaded image's derivatives off the request thread."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+    _executor.submit(_run_in_background, product_id, name)
+
+
+def srcset(manifest, fmt):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w'
+        for width, name in sorted(manifest.get(fmt, {}).items(), key=lambda item: int(item[0]))
+    )
@@ -0,0 +1,79 @@
+from itertools import product as combinations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from xypher_lux.models import CartItem, Product, ProductVariant
+
+
+def _split(csv):
+    # "M, L, M" lists M once, or its share of the stock would be lost
+    return list(dict.fromkeys(value.strip() for value in csv.split(',') if value.strip())) or ['']
+
+
+class Command(BaseCommand):
+    help = (
+        "Create ProductVariant rows from the legacy comma-separated "
+        "available_sizes/available_colors fields"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        products = (
+            Product.objects.filter(variants__isnull=True)
+            .exclude(available_sizes='', available_colors='')
+            .order_by('id')
+            .only('id', 'stock', 'available_sizes', 'available_colors')
+        )
+
+        created = 0
+        batch = []
+        for product in products.iterator(chunk_size=chunk_size):
+            choices = list(combinations(_split(product.available_sizes), _split(product.available_colors)))
+            # per-variant stock is unknown, so the product's stock is spread
+            # evenly; the total (and so Product.stock) is unchanged
+            share, remainder = divmod(product.stock, len(choices))
+            for i, (size, color) in enumerate(choices):
+                batch.append(ProductVariant(
+                    product_id=product.id, size=size, color=color,
+                    stock=share + (1 if i < remainder else 0),
+                ))
+            if len(batch) >= chunk_size:
+                created += self._flush(batch)
+                batch = []
+        if batch:
+            created += self._flush(batch)
+
+        linked = self._link_cart_items()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} variants; linked {linked} cart items"
+        ))
+
+    def _flush(self, batch):
+        """Insert a batch of variants; returns how many rows were actually added."""
+        # bulk_create skips save(), so Product.stock isn't re-summed per row;
+        # ignore_conflicts skips variants another run created meanwhile, and
+        # doesn't report them, so the rows are counted instead
+        variants = ProductVariant.objects.filter(product_id__in={v.product_id for v in batch})
+        with transaction.atomic():
+            before = variants.count()
+            ProductVariant.objects.bulk_create(batch, ignore_conflicts=True)
+            return variants.count() - before
+
+    def _link_cart_items(self):
+        """Point existing cart lines at the variant matching their size/color."""
+        items = list(
+            CartItem.objects.filter(variant__isnull=True, product__variants__isnull=False)
+            .distinct().only('id', 'product_id', 'size', 'color')
+        )
+        variants = {
+            (v.product_id, v.size, v.color): v.id
+            for v in ProductVariant.objects.filter(product_id__in={i.product_id for i in items})
+        }
+        for item in items:
+            item.variant_id = variants.get((item.product_id, item.size, item.color or ''))
+        CartItem.objects.bulk_update([i for i in items if i.variant_id], ['variant'], batch_size=500)
+        return sum(1 for i in items if i.variant_id)
@@ -0,0 +1,128 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from xypher_lux.benchmark import HANDLERS, SCENARIOS, LoadHarness
+from xypher_lux.management.commands.seed_catalog import USERNAME_PREFIX
+from xypher_lux.models import Order, Product, ProductVariant
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=getattr(settings, 'BASE_DIR', None), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the storefront hot paths in-process and write p50/p95/p99 "
+        "latency, throughput and queries per request as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+        parser.add_argument('--requests', type=int, default=200, help="timed requests per scenario")
+        parser.add_argument('--warmup', type=int, default=20, help="untimed requests per scenario")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--handler', choices=[*HANDLERS, 'both'], default='wsgi',
+            help="request path to drive; 'both' runs every scenario under WSGI and ASGI and compares them",
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--baseline', help="earlier results file to compare against")
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING("DEBUG is on; latencies won't reflect production settings"))
+        # adds 'testserver' to ALLOWED_HOSTS and keeps checkout emails in memory
+        setup_test_environment()
+        handlers = HANDLERS if options['handler'] == 'both' else (options['handler'],)
+        try:
+            harnesses = {
+                handler: LoadHarness.for_seeded_users(
+                    USERNAME_PREFIX, concurrency=options['concurrency'], seed=options['seed'], handler=handler,
+                )
+                for handler in handlers
+            }
+        except ValueError as e:
+            teardown_test_environment()
+            raise CommandError(f"{e} (seed data with the seed_catalog command)")
+
+        report = {
+            'revision': _git_revision(),
+            'started_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+            },
+            'options': {k: options[k] for k in ('requests', 'warmup', 'concurrency', 'seed', 'handler')},
+            'dataset': {
+                'products': Product.objects.count(),
+                'variants': ProductVariant.objects.count(),
+                'orders': Order.objects.count(),
+            },
+            'scenarios': {},
+        }
+        try:
+            for name in options['scenarios']:
+                for handler, harness in harnesses.items():
+                    # single-handler runs keep plain names, comparable with older results
+                    key = f'{name}@{handler}' if len(harnesses) > 1 else name
+                    self.stdout.write(f"Running {key}...")
+                    result = harness.run(name, options['requests'], warmup=options['warmup'])
+                    report['scenarios'][key] = result.as_json()
+        finally:
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)['scenarios']
+        self.print_table(report['scenarios'], baseline)
+        if len(handlers) > 1:
+            self.print_handler_comparison(report['scenarios'], options['scenarios'])
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def print_table(self, scenarios, baseline=None):
+        self.stdout.write(
+            f"{'scenario':<22}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'errors':>8}"
+        )
+        for name, row in scenarios.items():
+            latency = row['latency_ms']
+            self.stdout.write(
+                f"{name:<22}{row['throughput_rps']:>8}{latency['p50']:>9}{latency['p95']:>9}"
+                f"{latency['p99']:>9}{row['queries_per_request']['mean']:>9}{row['errors']:>8}"
+            )
+            before = (baseline or {}).get(name)
+            if before:
+                change = (latency['p95'] - before['latency_ms']['p95']) / before['latency_ms']['p95'] * 100
+                self.stdout.write(
+                    f"{'  vs baseline':<22}p95 {change:+.1f}%, queries "
+                    f"{before['queries_per_request']['mean']} -> {row['queries_per_request']['mean']}"
+                )
+
+    def print_handler_comparison(self, scenarios, names):
+        for name in names:
+            wsgi, asgi = scenarios[f'{name}@wsgi'], scenarios[f'{name}@asgi']
+            if wsgi['throughput_rps'] and asgi['throughput_rps']:
+                change = (asgi['throughput_rps'] - wsgi['throughput_rps']) / wsgi['throughput_rps'] * 100
+                self.stdout.write(
+                    f"{name}: ASGI {asgi['throughput_rps']} req/s vs WSGI {wsgi['throughput_rps']} req/s ({change:+.1f}%)"
+                )
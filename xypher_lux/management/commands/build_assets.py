@@ -0,0 +1,56 @@
+import json
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from xypher_lux.assets import CompressedManifestStorage, brotli
+
+
+class Command(BaseCommand):
+    help = (
+        "Collect static files minified, content-hashed and precompressed "
+        "(.gz, plus .br with brotli installed) and report the bytes saved"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="empty STATIC_ROOT first")
+        parser.add_argument('--json', dest='json_path', help="also write the per-file sizes here (for CI)")
+        parser.add_argument('--max-bytes', type=int, help="fail if the compressed CSS+JS total exceeds this")
+
+    def handle(self, *args, **options):
+        if not isinstance(staticfiles_storage, CompressedManifestStorage):
+            raise CommandError(
+                "Set STORAGES['staticfiles']['BACKEND'] to 'xypher_lux.assets.CompressedManifestStorage'"
+            )
+        call_command('collectstatic', interactive=False, clear=options['clear'], verbosity=0)
+
+        stats = sorted(
+            (s for s in staticfiles_storage.asset_stats.values() if s.gzip or s.minified < s.original),
+            key=lambda s: s.name,
+        )
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli not installed: .br files skipped"))
+        self.stdout.write(f"{'file':<40} {'raw':>9} {'min':>9} {'gzip':>9} {'br':>9}")
+        for s in stats:
+            self.stdout.write(f"{s.name:<40} {s.original:>9} {s.minified:>9} {s.gzip or '-':>9} {s.brotli or '-':>9}")
+
+        # what a browser actually downloads: the smallest variant of each file
+        raw = sum(s.original for s in stats)
+        shipped = sum(min(filter(None, (s.minified, s.gzip, s.brotli))) for s in stats)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(stats)} assets: {raw} bytes raw -> {shipped} bytes over the wire"
+            + (f" ({100 - shipped * 100 // raw}% smaller)" if raw else "")
+        ))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({
+                    'raw_bytes': raw,
+                    'shipped_bytes': shipped,
+                    'files': [s.as_json() for s in stats],
+                }, f, indent=2)
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+        if options['max_bytes'] is not None and shipped > options['max_bytes']:
+            raise CommandError(f"Static assets are {shipped} bytes, over the {options['max_bytes']} byte budget")
@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from xypher_lux.fragment_cache import bump_catalog
+from xypher_lux.images import build_derivatives
+from xypher_lux.models import Product
+
+
+def _init_worker():
+    # needed where workers are spawned rather than forked (macOS, Windows)
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Build resized WebP/JPEG derivatives of product images, in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+        parser.add_argument('--force', action='store_true', help="rebuild images that already have derivatives")
+        parser.add_argument('--batch-size', type=int, default=200, help="manifests saved per UPDATE")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').only('id', 'image', 'image_derivatives').order_by('id')
+        if not options['force']:
+            products = products.filter(image_derivatives={})
+        jobs = {product.id: product.image.name for product in products.iterator()}
+        if not jobs:
+            self.stdout.write("Nothing to do")
+            return
+
+        # forked workers must not share the parent's database connection
+        connections.close_all()
+        done, failed, batch = 0, 0, []
+        with ProcessPoolExecutor(options['workers'], initializer=_init_worker) as pool:
+            futures = {pool.submit(build_derivatives, name): pk for pk, name in jobs.items()}
+            for future in as_completed(futures):
+                pk = futures[future]
+                try:
+                    manifest = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Product {pk} ({jobs[pk]}): {e}")
+                    continue
+                batch.append(Product(pk=pk, image_derivatives=manifest))
+                if len(batch) >= options['batch_size']:
+                    done += self._save(batch)
+                    batch = []
+        done += self._save(batch)
+        # cached grids still hold the old <img> markup
+        bump_catalog()
+
+        self.stdout.write(self.style.SUCCESS(f"Built derivatives for {done} images ({failed} failed)"))
+
+    def _save(self, batch):
+        # bulk_update skips save(), so the catalog signals don't fire per row
+        Product.objects.bulk_update(batch, ['image_derivatives'])
+        return len(batch)
@@ -0,0 +1,42 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from xypher_lux.catalog_io import FORMATS, export_rows, guess_format, write_rows
+from xypher_lux.models import Product
+
+
+class Command(BaseCommand):
+    help = "Stream the catalog to CSV or JSON lines in the format import_catalog reads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="file to write, or - for stdout")
+        parser.add_argument('--format', choices=FORMATS, help="default: from the file extension, else csv")
+        parser.add_argument('--category', action='append', help="only products in this category slug (repeatable)")
+        parser.add_argument('--active-only', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        products = Product.objects.all()
+        if options['category']:
+            products = products.filter(category__slug__in=options['category'])
+        if options['active_only']:
+            products = products.filter(is_active=True)
+
+        started = time.perf_counter()
+        f = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        try:
+            count = write_rows(f, export_rows(products, options['chunk_size']), fmt)
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        elapsed = time.perf_counter() - started
+
+        if path != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {count} products to {path} in {elapsed:.1f}s "
+                f"({count / elapsed if elapsed else 0:.0f} rows/s)"
+            ))
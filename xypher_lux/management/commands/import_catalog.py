@@ -0,0 +1,68 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from xypher_lux.catalog_io import FORMATS, CatalogImporter, RowError, guess_format, read_rows
+from xypher_lux.category_tree import recount_categories
+from xypher_lux.fragment_cache import bump_catalog
+from xypher_lux.rails import bump_rails
+from xypher_lux.recommendations import invalidate_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update products by slug from a CSV or JSON-lines file, "
+        "streaming it in chunks (columns: slug, name, category (slug), description, "
+        "price, stock, is_active, is_featured, available_sizes, available_colors)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="file to read, or - for stdin")
+        parser.add_argument('--format', choices=FORMATS, help="default: from the file extension, else csv")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--strict', action='store_true', help="stop at the first invalid row")
+        parser.add_argument('--no-reindex', action='store_true', help="leave the search index for rebuild_search_index")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        importer = CatalogImporter(
+            batch_size=options['batch_size'], strict=options['strict'], reindex=not options['no_reindex'],
+        )
+        started = time.perf_counter()
+
+        def progress(stats):
+            rate = stats.rows / (time.perf_counter() - started)
+            self.stdout.write(f"  {stats.rows} rows ({rate:.0f} rows/s)")
+
+        f = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        try:
+            stats = importer.run(read_rows(f, fmt), progress=progress)
+        except RowError as e:
+            raise CommandError(f"{e} (rows before it in earlier chunks were imported)")
+        finally:
+            if f is not sys.stdin:
+                f.close()
+            # chunks already committed when a row or the run fails need this too
+            if importer.stats.created or importer.stats.updated:
+                self.sync_catalog(importer)
+        elapsed = time.perf_counter() - started
+
+        for error in stats.errors:
+            self.stderr.write(str(error))
+        if stats.error_count > len(stats.errors):
+            self.stderr.write(f"... and {stats.error_count - len(stats.errors)} more invalid rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats.rows} rows in {elapsed:.1f}s ({stats.rows / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{stats.created} created, {stats.updated} updated, {stats.error_count} skipped"
+        ))
+
+    def sync_catalog(self, importer):
+        # bulk writes skip the signals that keep these in sync
+        recount_categories()
+        invalidate_pool()
+        for category_id in importer.category_ids:
+            invalidate_pool(category_id)
+        bump_catalog(*importer.categories.values())
+        bump_rails(*importer.categories.values())
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from xypher_lux.models import CartItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Turn legacy NULL CartItem sizes/colors into '' so guest cart merges "
+        "match them, folding each line into its '' twin if the cart has one; "
+        "run before migrating CartItem.size/color to NOT NULL"
+    )
+
+    def handle(self, *args, **options):
+        folded = normalized = 0
+        with transaction.atomic():
+            items = list(
+                CartItem.objects.filter(Q(size__isnull=True) | Q(color__isnull=True))
+                .order_by('id').only('id', 'cart_id', 'product_id', 'size', 'color', 'quantity')
+            )
+            for item in items:
+                # NULLs never conflict, so a cart can hold several such lines
+                # and an '' one; each is merged into the first to become ''
+                twin = CartItem.objects.filter(
+                    cart_id=item.cart_id, product_id=item.product_id, size=item.size or '', color=item.color or '',
+                )
+                if twin.update(quantity=F('quantity') + item.quantity):
+                    CartItem.objects.filter(pk=item.pk).delete()
+                    folded += 1
+                else:
+                    CartItem.objects.filter(pk=item.pk).update(size=item.size or '', color=item.color or '')
+                    normalized += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Normalized {normalized} cart items; folded {folded} into their twins"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from xypher_lux.category_tree import rebuild_paths, recount_categories
+
+
+class Command(BaseCommand):
+    help = "Recompute category paths and cached product counts"
+
+    def handle(self, *args, **options):
+        rebuild_paths()
+        recount_categories()
+        self.stdout.write(self.style.SUCCESS("Category tree rebuilt"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from xypher_lux.models import Product
+from xypher_lux.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from the catalog"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        chunk_size = options['chunk_size']
+        backend.create_index()
+        # rows of products deleted or deactivated without the signals
+        # (bulk updates, raw SQL) would otherwise outlive the rebuild
+        pruned = backend.prune()
+        products = Product.objects.filter(is_active=True).select_related('category').order_by('id')
+
+        indexed = 0
+        chunk = []
+        for product in products.iterator(chunk_size=chunk_size):
+            chunk.append(product)
+            if len(chunk) == chunk_size:
+                backend.index_products(chunk)
+                indexed += len(chunk)
+                chunk = []
+        if chunk:
+            backend.index_products(chunk)
+            indexed += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} products and pruned {pruned} with {type(backend).__name__}"
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from xypher_lux.notifications import recount_unread
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's cached unread notification count"
+
+    def handle(self, *args, **options):
+        updated = recount_unread()
+        self.stdout.write(self.style.SUCCESS(f"Recounted unread notifications for {updated} profiles"))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from xypher_lux.reservations import SWEEP_BATCH_SIZE, sweep_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired stock holds in batches (run from cron, or with --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="keep sweeping")
+        parser.add_argument('--interval', type=float, default=60.0, help="seconds between sweeps (with --loop)")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = sweep_expired(options['batch_size'])
+            self.stdout.write(f"Released {deleted} expired reservation(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,238 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from xypher_lux.category_tree import invalidate_tree, rebuild_paths, recount_categories
+from xypher_lux.fragment_cache import bump_catalog
+from xypher_lux.models import (
+    Cart, CartItem, Category, Order, OrderItem, Product, ProductVariant, UserProfile,
+)
+from xypher_lux.rails import bump_rails
+from xypher_lux.recommendations import invalidate_pool
+
+# every seeded row is recognisable by one of these, so --flush only
+# ever removes synthetic data
+SLUG_PREFIX = 'bench-'
+USERNAME_PREFIX = 'bench_user_'
+PASSWORD = 'bench-password'
+
+ROOTS = [(slug, label) for slug, label in Product.CATEGORY_CHOICES]
+ADJECTIVES = ['Classic', 'Slim', 'Relaxed', 'Vintage', 'Linen', 'Cotton', 'Wool', 'Oversized', 'Cropped', 'Tailored']
+NOUNS = ['Shirt', 'Jacket', 'Dress', 'Trousers', 'Sweater', 'Skirt', 'Coat', 'Hoodie', 'Blazer', 'Scarf']
+SIZES = [size for size, _ in Product.SIZE_CHOICES]
+COLORS = ['Black', 'White', 'Navy', 'Red', 'Olive', 'Beige', 'Grey']
+STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a reproducible synthetic catalog (categories, products with "
+        "variants, users, carts and orders) for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=40, help="subcategories, spread over the root categories")
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--variants', type=int, default=3, help="variants per product")
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--carts', type=int, default=250)
+        parser.add_argument('--orders', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2_000)
+        parser.add_argument('--flush', action='store_true', help="remove previously seeded data first")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if options['flush']:
+            self.flush()
+        elif Product.objects.filter(slug__startswith=SLUG_PREFIX).exists():
+            raise CommandError("Seeded data already exists; rerun with --flush to replace it")
+
+        categories = self.seed_categories(options['categories'])
+        products = self.seed_products(categories, options['products'], options['variants'])
+        users = self.seed_users(options['users'])
+        carts = self.seed_carts(users[:options['carts']])
+        orders = self.seed_orders(users, options['orders'])
+
+        # bulk_create skips the signals that keep these in sync
+        self.stdout.write("Rebuilding derived data...")
+        rebuild_paths()
+        recount_categories()
+        invalidate_tree()
+        invalidate_pool()
+        for category in categories:
+            invalidate_pool(category.id)
+        bump_catalog(*(c.id for c in categories))
+        bump_rails(*(c.id for c in categories))
+        call_command('rebuild_search_index', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(categories)} categories, {products} products, {len(users)} users, "
+            f"{carts} carts and {orders} orders (seed={options['seed']}, password={PASSWORD!r})"
+        ))
+
+    def flush(self):
+        with transaction.atomic():
+            Order.objects.filter(user__username__startswith=USERNAME_PREFIX).delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            Product.objects.filter(slug__startswith=SLUG_PREFIX).delete()
+            Category.objects.filter(slug__startswith=SLUG_PREFIX).delete()
+        self.stdout.write("Removed previously seeded data")
+
+    def seed_categories(self, count):
+        roots = []
+        for slug, label in ROOTS:
+            root, _ = Category.objects.get_or_create(slug=slug, defaults={'name': label})
+            roots.append(root)
+        children = []
+        for i in range(count):
+            parent = roots[i % len(roots)]
+            children.append(Category.objects.create(
+                name=f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)}s {i}',
+                slug=f'{SLUG_PREFIX}{parent.slug}-{i}',
+                parent=parent,
+            ))
+        return roots + children
+
+    def seed_products(self, categories, count, variants_per_product):
+        rng = self.rng
+        created = 0
+        for batch in _batches(range(count), self.batch_size):
+            products = []
+            for i in batch:
+                sizes = sorted(rng.sample(SIZES, rng.randint(1, len(SIZES))), key=SIZES.index)
+                colors = rng.sample(COLORS, rng.randint(1, 3))
+                name = f'{rng.choice(ADJECTIVES)} {rng.choice(COLORS)} {rng.choice(NOUNS)} {i}'
+                products.append(Product(
+                    category=rng.choice(categories),
+                    name=name,
+                    slug=f'{SLUG_PREFIX}{i}',
+                    description=f'{name} in {", ".join(colors).lower()}. Sizes {", ".join(sizes)}.',
+                    price=Decimal(rng.randint(500, 25_000)) / 100,
+                    is_active=rng.random() > 0.03,
+                    is_featured=rng.random() < 0.02,
+                    available_sizes=','.join(sizes),
+                    available_colors=','.join(colors),
+                ))
+
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+                variants = []
+                for product in products:
+                    choices = [
+                        (size, color)
+                        for size in product.available_sizes.split(',')
+                        for color in product.available_colors.split(',')
+                    ]
+                    picked = rng.sample(choices, min(variants_per_product, len(choices)))
+                    stock = [rng.randint(0, 200) for _ in picked]
+                    product.stock = sum(stock)
+                    variants.extend(
+                        ProductVariant(product=product, size=size, color=color, stock=units)
+                        for (size, color), units in zip(picked, stock)
+                    )
+                ProductVariant.objects.bulk_create(variants)
+                Product.objects.bulk_update(products, ['stock'])
+
+            created += len(products)
+            self.stdout.write(f"  {created}/{count} products")
+        return created
+
+    def seed_users(self, count):
+        # hashing is deliberately slow, so every seeded user shares one hash
+        password = make_password(PASSWORD)
+        users = [
+            User(username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.com', password=password)
+            for i in range(count)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, first_name='Bench', last_name=str(i), email=user.email)
+                for i, user in enumerate(users)
+            ], batch_size=self.batch_size)
+        return users
+
+    def _random_variants(self, count):
+        # drawn with self.rng rather than order_by('?') so --seed repeats the carts and orders
+        ids = list(
+            ProductVariant.objects.filter(product__slug__startswith=SLUG_PREFIX, product__is_active=True, stock__gt=0)
+            .order_by('id').values_list('id', flat=True)
+        )
+        ids = self.rng.sample(ids, min(count, len(ids)))
+        return ProductVariant.objects.select_related('product').order_by('id').in_bulk(ids).values()
+
+    def seed_carts(self, users):
+        variants = list(self._random_variants(max(len(users) * 3, 1)))
+        if not variants:
+            return 0
+        with transaction.atomic():
+            carts = Cart.objects.bulk_create([Cart(user=user) for user in users], batch_size=self.batch_size)
+            items = []
+            for cart in carts:
+                for variant in self.rng.sample(variants, min(self.rng.randint(1, 3), len(variants))):
+                    items.append(CartItem(
+                        cart=cart, product=variant.product, variant=variant,
+                        size=variant.size, color=variant.color, quantity=1,
+                    ))
+            CartItem.objects.bulk_create(items, batch_size=self.batch_size)
+        return len(carts)
+
+    def seed_orders(self, users, count):
+        rng = self.rng
+        variants = list(self._random_variants(500))
+        if not users or not variants:
+            return 0
+        now = timezone.now()
+        created = 0
+        for batch in _batches(range(count), self.batch_size):
+            orders, lines = [], []
+            for i in batch:
+                order = Order(
+                    user=rng.choice(users),
+                    order_number=f'BENCH-{i:08d}',
+                    status=rng.choice(STATUSES),
+                    shipping_address=f'{i} Benchmark Street',
+                    shipping_city='Testville',
+                    shipping_country='Nowhere',
+                )
+                picked = rng.sample(variants, min(rng.randint(1, 4), len(variants)))
+                quantities = [rng.randint(1, 3) for _ in picked]
+                order.subtotal = sum(v.product.price * q for v, q in zip(picked, quantities))
+                order.total = order.subtotal
+                orders.append(order)
+                lines.append(list(zip(picked, quantities)))
+
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                # auto_now_add stamps "now" on insert; spread orders over the past year
+                for order in orders:
+                    order.created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                Order.objects.bulk_update(orders, ['created_at'])
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order, product=variant.product, variant=variant,
+                        product_name=variant.product.name, quantity=quantity,
+                        price=variant.product.price, size=variant.size, color=variant.color,
+                    )
+                    for order, order_lines in zip(orders, lines)
+                    for variant, quantity in order_lines
+                ])
+            created += len(orders)
+        return created
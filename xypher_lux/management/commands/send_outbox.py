@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from xypher_lux.outbox import BATCH_SIZE, MAX_ATTEMPTS, OutboxSender
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued emails in batches over one reused connection. "
+        "For local testing, run aiosmtpd's debugging SMTP server "
+        "(pip install aiosmtpd; python -m aiosmtpd -n -l localhost:1025; "
+        "the stdlib smtpd module is gone since Python 3.12) "
+        "and point EMAIL_HOST/EMAIL_PORT at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true', help="keep polling for new emails")
+        parser.add_argument('--interval', type=float, default=5.0, help="seconds to sleep when idle (with --loop)")
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        with OutboxSender(max_attempts=options['max_attempts']) as sender:
+            while True:
+                result = sender.send_batch(options['batch_size'])
+                for key in totals:
+                    totals[key] += getattr(result, key)
+                if result.total:
+                    self.stdout.write(f"sent {result.sent}, retrying {result.retried}, failed {result.failed}")
+                    continue
+                if not options['loop']:
+                    break
+                # idle: drop the connection rather than let the server time it out
+                sender.close()
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {totals['sent']} sent, {totals['retried']} to retry, {totals['failed']} failed"
+        ))
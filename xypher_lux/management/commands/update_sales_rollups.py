@@ -0,0 +1,43 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from xypher_lux.sales_rollups import DAYS_PER_BATCH, update_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the daily product/category sales rollups for days whose orders "
+        "changed since the last run (run from cron, or with --loop)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="recount every day that has orders")
+        parser.add_argument('--since', help="also recount every day from this date (YYYY-MM-DD) on")
+        parser.add_argument('--days-per-batch', type=int, default=DAYS_PER_BATCH)
+        parser.add_argument('--loop', action='store_true', help="keep updating")
+        parser.add_argument('--interval', type=float, default=300.0, help="seconds between runs (with --loop)")
+
+    def handle(self, *args, **options):
+        since_date = None
+        if options['since']:
+            try:
+                since_date = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f"--since must be a YYYY-MM-DD date, not {options['since']!r}")
+
+        full = options['full']
+        while True:
+            started = time.monotonic()
+            stats = update_rollups(full=full, since_date=since_date, days_per_batch=options['days_per_batch'])
+            self.stdout.write(
+                f"Recounted {stats.days} day(s) ({stats.changed_orders} changed order(s)): "
+                f"{stats.product_rows} product row(s), {stats.category_rows} category row(s) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+            if not options['loop']:
+                break
+            # later rounds only pick up what changed
+            full, since_date = False, None
+            time.sleep(options['interval'])
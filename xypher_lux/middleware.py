@@ -0,0 +1,269 @@
+# xypher_lux/middleware.py
+import contextvars
+import json
+import logging
+import mimetypes
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import FileResponse
+from django.shortcuts import render
+from django.utils._os import safe_join
+
+logger = logging.getLogger('xypher_lux.perf')
+
+SLOWEST_STATEMENTS = getattr(settings, 'QUERY_METRICS_SLOWEST', 3)
+# Cache-Control for hashed (content-addressed) static files and for the rest
+STATIC_IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_CACHE_CONTROL = getattr(settings, 'STATIC_CACHE_CONTROL', 'public, max-age=60')
+
+_current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+def query_budget(max_queries):
+    """Declare how many SQL queries a view may run per request.
+
+        @query_budget(6)
+        def product_list(request): ...
+
+    Enforced by QueryBudgetMiddleware (logged) and by
+    xypher_lux.testing.assert_query_budget (test failure).
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+@dataclass
+class RequestMetrics:
+    """SQL and template timings collected while serving one request"""
+    queries: list = field(default_factory=list)  # (milliseconds, sql)
+    template_ms: float = 0.0
+    parent: 'RequestMetrics' = None  # enclosing collect_metrics() block, if any
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def sql_ms(self):
+        return sum(ms for ms, _ in self.queries)
+
+    def slowest(self, n=SLOWEST_STATEMENTS):
+        return sorted(self.queries, key=lambda q: q[0], reverse=True)[:n]
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            query = (round((time.perf_counter() - started) * 1000, 3), sql)
+            metrics = self
+            while metrics is not None:
+                metrics.queries.append(query)
+                metrics = metrics.parent
+
+
+@contextmanager
+def collect_metrics():
+    """Record the queries and template time of everything run in this block.
+
+    The metrics travel in a context variable, which asgiref copies into the
+    threads behind sync_to_async, so queries an async view hands to worker
+    threads are counted too. Blocks nest; outer ones see inner queries.
+    """
+    metrics = RequestMetrics(parent=_current_metrics.get())
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def _install_query_recorder(connection, **kwargs):
+    # every connection of every thread carries the (otherwise idle) recorder
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_recorder)
+for _connection in connections.all():
+    _install_query_recorder(_connection)
+
+
+@contextmanager
+def timing_templates():
+    """Count the time spent in this block as the current request's template time.
+
+    Wrap the top-level render of a response only (timed_render does), so
+    nested {% include %}s aren't counted twice. Does nothing outside
+    collect_metrics().
+    """
+    metrics = _current_metrics.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+
+
+def timed_render(request, template_name, context=None, *args, **kwargs):
+    """django.shortcuts.render, recording its time as template time"""
+    with timing_templates():
+        return render(request, template_name, context, *args, **kwargs)
+
+
+class QueryBudgetMiddleware:
+    """Record query count, SQL time, template time and the slowest statements.
+
+    Template time covers the renders views make through timed_render()
+    (or inside timing_templates()).
+
+    In DEBUG the numbers go to response headers (including Server-Timing);
+    otherwise one JSON log line per request is written to 'xypher_lux.perf'.
+    Views that exceed their @query_budget are logged as warnings either way.
+    Works in both WSGI and ASGI stacks without forcing async views to sync.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with collect_metrics() as metrics:
+            response = self.get_response(request)
+        return self.report(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with collect_metrics() as metrics:
+            response = await self.get_response(request)
+        return self.report(request, response, metrics, started)
+
+    def report(self, request, response, metrics, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        budget = getattr(request, '_query_budget', None)
+        over_budget = budget is not None and metrics.query_count > budget
+        if settings.DEBUG:
+            response['X-SQL-Queries'] = str(metrics.query_count)
+            response['X-SQL-Time-ms'] = f'{metrics.sql_ms:.1f}'
+            response['X-Template-Time-ms'] = f'{metrics.template_ms:.1f}'
+            response['Server-Timing'] = (
+                f'sql;dur={metrics.sql_ms:.1f};desc="{metrics.query_count} queries", '
+                f'tpl;dur={metrics.template_ms:.1f}, total;dur={total_ms:.1f}'
+            )
+            if budget is not None:
+                response['X-SQL-Budget'] = str(budget)
+
+        if over_budget or not settings.DEBUG:
+            self.log(request, response, metrics, budget, total_ms, over_budget)
+        return response
+
+    def log(self, request, response, metrics, budget, total_ms, over_budget):
+        log = logger.warning if over_budget else logger.info
+        log(json.dumps({
+            'view': getattr(request, '_view_name', None),
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.query_count,
+            'query_budget': budget,
+            'sql_ms': round(metrics.sql_ms, 1),
+            'template_ms': round(metrics.template_ms, 1),
+            'total_ms': round(total_ms, 1),
+            'slowest': [{'ms': ms, 'sql': sql[:300]} for ms, sql in metrics.slowest()],
+        }))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, 'query_budget', None)
+        request._view_name = request.resolver_match.view_name if request.resolver_match else None
+
+
+class StaticAssetMiddleware:
+    """Serve collected static files from STATIC_ROOT with long-lived caching.
+
+    Hashed names written by build_assets get a one-year immutable
+    Cache-Control; the .br/.gz copy is sent when the client accepts it.
+    Put it first in MIDDLEWARE so asset requests skip sessions and auth.
+    Does nothing until STATIC_ROOT is set (a CDN or web server in front
+    can take over the same files and headers).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.root = getattr(settings, 'STATIC_ROOT', None)
+        self.prefix = settings.STATIC_URL or ''
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        # names from the manifest; the storage reads it once at startup too
+        self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve_static(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.serve_static(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def serve_static(self, request):
+        if self.root and request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            return self.serve(request, request.path[len(self.prefix):])
+        return None
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except ValueError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(name)
+        accepted = request.headers.get('Accept-Encoding', '')
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if candidate in accepted and os.path.isfile(path + suffix):
+                path, encoding = path + suffix, candidate
+                break
+
+        response = FileResponse(open(path, 'rb'), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if encoding or os.path.isfile(path + '.gz'):
+            response['Vary'] = 'Accept-Encoding'
+        immutable = name in self.hashed_names
+        response['Cache-Control'] = STATIC_IMMUTABLE_CACHE_CONTROL if immutable else STATIC_CACHE_CONTROL
+        return response
@@ -1,10 +1,16 @@
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Concat, Substr
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 import uuid
 
+from .cart_summary import CartSummary, summarize_cart
+
 
 class Category(models.Model):
     name = models.CharField(max_length=200, db_index=True)
@@ -16,6 +22,13 @@ class Category(models.Model):
         blank=True,
         related_name='subcategories'
     )
+    # materialized path of ancestor ids ending with this one, e.g. "1/5/12/"
+    path = models.CharField(max_length=255, db_index=True, blank=True, editable=False)
+    # active products filed directly under this category / anywhere in its subtree
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    subtree_product_count = models.PositiveIntegerField(default=0, editable=False)
+    # renames and moves; the counters above are kept with update() and skip it
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('name',)
@@ -28,6 +41,50 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse("xypher_lux:product_list_by_category", args=[self.slug])
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        parent_path = self.parent.path if self.parent_id else ''
+        path = f'{parent_path}{self.pk}/'
+        if path != self.path:
+            old_path, self.path = self.path, path
+            Category.objects.filter(pk=self.pk).update(path=path)
+            if old_path:
+                # moved under a new parent: re-root the whole subtree
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(path), Substr('path', len(old_path) + 1))
+                )
+                from .category_tree import recount_categories
+                recount_categories()
+
+    @property
+    def ancestor_ids(self):
+        """Ids from the root down to (and including) this category."""
+        return [int(pk) for pk in self.path.split('/') if pk]
+
+    def subtree_products(self):
+        """All products filed under this category or any of its descendants."""
+        return Product.objects.filter(category__path__startswith=self.path)
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_variants(self):
+        """Load every listed product's variants in one extra query."""
+        return self.prefetch_related(
+            models.Prefetch('variants', queryset=ProductVariant.objects.order_by('id'))
+        )
+
+    def with_variant_flag(self):
+        """Mark whether each product has variants without loading them."""
+        return self.annotate(
+            _has_variants=Exists(ProductVariant.objects.filter(product=OuterRef('pk')))
+        )
+
+    def in_size(self, size):
+        return self.filter(variants__size=size).distinct()
+
+    def in_color(self, color):
+        return self.filter(variants__color=color).distinct()
+
 
 class Product(models.Model):
     """Product model for storing product information"""
@@ -51,6 +108,8 @@ class Product(models.Model):
     name = models.CharField(max_length=200, db_index=True)
     slug = models.SlugField(max_length=200, db_index=True, unique=True)
     image = models.ImageField(upload_to="products/%Y/%m/%d", blank=True)
+    # resized WebP/JPEG copies of `image`, see images.build_derivatives
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
     stock = models.PositiveIntegerField(default=0)
@@ -62,10 +121,17 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ('name',)
         indexes = [
             models.Index(fields=['id', 'slug']),
+            # keyset pagination of the catalog grids
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            # similar-product rails: nearest prices within a category
+            models.Index(fields=['category', 'price']),
         ]
 
     def __str__(self):
@@ -78,6 +144,62 @@ class Product(models.Model):
     def is_in_stock(self):
         return self.stock > 0
 
+    def _variant_list(self):
+        # uses the with_variants() prefetch when present, else one query
+        return list(self.variants.all())
+
+    @property
+    def has_variants(self):
+        """Whether buying it takes a size/color choice (see add_to_cart_view)."""
+        if hasattr(self, '_has_variants'):
+            # annotated by ProductQuerySet.with_variant_flag()
+            return self._has_variants
+        return bool(self._variant_list())
+
+    @property
+    def sizes(self):
+        """Sizes on offer; falls back to the legacy CSV field."""
+        variants = self._variant_list()
+        if variants:
+            return list(dict.fromkeys(v.size for v in variants if v.size))
+        return [s.strip() for s in self.available_sizes.split(',') if s.strip()]
+
+    @property
+    def colors(self):
+        """Colors on offer; falls back to the legacy CSV field."""
+        variants = self._variant_list()
+        if variants:
+            return list(dict.fromkeys(v.color for v in variants if v.color))
+        return [c.strip() for c in self.available_colors.split(',') if c.strip()]
+
+    def get_variant(self, size='', color=''):
+        """The variant for size/color, or None if there is no such variant."""
+        return self.variants.filter(size=size or '', color=color or '').first()
+
+
+class ProductVariant(models.Model):
+    """A purchasable size/color combination of a product with its own stock"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="variants")
+    size = models.CharField(max_length=10, blank=True, db_index=True)
+    color = models.CharField(max_length=50, blank=True, db_index=True)
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "size", "color"],
+                name="unique_product_variant"
+            )
+        ]
+
+    def __str__(self):
+        options = " / ".join(o for o in (self.size, self.color) if o)
+        return f"{self.product.name} ({options})" if options else self.product.name
+
+    @property
+    def is_in_stock(self):
+        return self.stock > 0
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -85,6 +207,8 @@ class UserProfile(models.Model):
     last_name = models.CharField(max_length=50)
     email = models.EmailField()
     phone_number = models.CharField(max_length=20, blank=True)
+    # denormalized count of the user's unread Notifications (see notifications.py)
+    unread_notifications = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f'{self.user.username} Profile'
@@ -112,34 +236,51 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart {self.id} - {self.user.username}"
 
+    @property
+    def summary(self):
+        """Cart totals, loaded once per instance with a single aggregate query."""
+        if getattr(self, '_summary', None) is None:
+            if hasattr(self, '_summary_subtotal'):
+                # annotated by cart_summary.with_cart_totals()
+                self._summary = CartSummary(
+                    subtotal=self._summary_subtotal,
+                    total_items=self._summary_total_items,
+                )
+            else:
+                self._summary = summarize_cart(self)
+        return self._summary
+
     @property
     def subtotal(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.summary.subtotal
     
     @property
     def shipping_cost(self):
-        return Decimal('5.00') if self.subtotal > 0 else Decimal('0.00')
+        return self.summary.shipping_cost
     
     @property
     def tax(self):
-        return self.subtotal * Decimal('0.08')  # 8% tax
+        return self.summary.tax
     
     @property
     def total(self):
-        return self.subtotal + self.shipping_cost + self.tax
+        return self.summary.total
 
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.summary.total_items
 
 
 class CartItem(models.Model):
     """Individual items inside a cart"""
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, null=True, blank=True)
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
-    size = models.CharField(max_length=10, blank=True)
-    color = models.CharField(max_length=50, blank=True, null=True)
+    # never NULL, or the unique constraint (and merge_guest_cart's upsert on
+    # it) couldn't match lines without a size/color; see normalize_cart_items
+    size = models.CharField(max_length=10, blank=True, default='')
+    color = models.CharField(max_length=50, blank=True, default='')
     added_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -159,13 +300,60 @@ class CartItem(models.Model):
         """Calculate price of this cart item (unit price * quantity)."""
         return self.product.price * self.quantity
 
+    @property
+    def available_stock(self):
+        """Stock of the chosen variant, or of the product if it has none."""
+        return self.variant.stock if self.variant_id else self.product.stock
+
     def save(self, *args, **kwargs):
         """Validate stock before saving."""
-        if self.quantity > self.product.stock:
-            raise ValueError(f"Only {self.product.stock} items available in stock")
+        if self.quantity > self.available_stock:
+            raise ValueError(f"Only {self.available_stock} items available in stock")
         super().save(*args, **kwargs)
 
 
+class StockReservation(models.Model):
+    """A time-limited hold on stock for one cart line (see reservations.py)"""
+    holder = models.CharField(max_length=64, help_text="'cart:<id>' or 'guest:<token>'")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reservations")
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, null=True, blank=True)
+    size = models.CharField(max_length=10, blank=True)
+    color = models.CharField(max_length=50, blank=True)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["holder", "product", "size", "color"],
+                name="unique_stock_reservation"
+            )
+        ]
+        indexes = [
+            # "units held by live reservations" of one product or variant
+            models.Index(fields=['product', 'variant', 'expires_at']),
+            # the expiry sweep
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product_id} held by {self.holder} until {self.expires_at:%H:%M}"
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_summary(self):
+        """Annotate item_count, total_quantity and the first item's name and
+        image, so order lists need no query per order."""
+        first_item = OrderItem.objects.filter(order=OuterRef('pk')).order_by('id')
+        return self.annotate(
+            item_count=Count('items'),
+            total_quantity=Coalesce(Sum('items__quantity'), 0),
+            first_item_name=Subquery(first_item.values('product_name')[:1]),
+            first_item_image=Subquery(first_item.values('product__image')[:1]),
+        )
+
+
 class Order(models.Model):
     """Order model for completed purchases"""
     STATUS_CHOICES = [
@@ -194,8 +382,16 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # sales rollups: changed orders since the high-water mark, and
+            # the orders of one day
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number}"
@@ -208,6 +404,7 @@ class OrderItem(models.Model):
     """Items in a completed order"""
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+    variant = models.ForeignKey(ProductVariant, on_delete=models.SET_NULL, null=True, blank=True)
     product_name = models.CharField(max_length=200)  # Store name in case product is deleted
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)  # Store price at time of purchase
@@ -237,10 +434,14 @@ class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
+    order = models.ForeignKey('Order', on_delete=models.CASCADE, null=True, blank=True, related_name="notifications")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=['user', 'is_read']),
+        ]
 
     def __str__(self):
         username = self.user.username if self.user else "Unknown user"
@@ -288,4 +489,88 @@ class ShippingAddress(models.Model):
             ShippingAddress.objects.filter(
                 user=self.user, is_default=True
             ).exclude(pk=self.pk).update(is_default=False)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class OutgoingEmail(models.Model):
+    """Transactional email queued for the send_outbox worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.TextField(help_text="Comma-separated recipients")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            # the worker's "what is due" scan
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+    @property
+    def recipients(self):
+        return [address.strip() for address in self.to.split(',') if address.strip()]
+
+
+class DailyProductSales(models.Model):
+    """One product's non-cancelled sales on one day (see sales_rollups.py)"""
+    date = models.DateField()
+    # null once the product is deleted; its sales stay in the totals
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["-date", "-revenue"]
+        verbose_name_plural = "daily product sales"
+        indexes = [
+            models.Index(fields=['date', 'product']),
+            models.Index(fields=['product', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} product {self.product_id}: {self.units} units"
+
+
+class DailyCategorySales(models.Model):
+    """One category's non-cancelled sales on one day (see sales_rollups.py)"""
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["-date", "-revenue"]
+        verbose_name_plural = "daily category sales"
+        indexes = [
+            models.Index(fields=['date', 'category']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} category {self.category_id}: {self.units} units"
+
+
+class RollupState(models.Model):
+    """High-water mark of an incremental job: rows changed up to here are counted"""
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.high_water_mark}"
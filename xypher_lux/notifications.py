@@ -0,0 +1,50 @@
+# xypher_lux/notifications.py
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Notification, UserProfile
+
+
+def add_unread(counts):
+    """Raise users' unread counters in one UPDATE; `counts` is {user_id: n}."""
+    counts = {user_id: n for user_id, n in counts.items() if n}
+    if not counts:
+        return
+    UserProfile.objects.filter(user_id__in=counts).update(
+        unread_notifications=F('unread_notifications') + Case(
+            *[When(user_id=user_id, then=Value(n)) for user_id, n in counts.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def refresh_unread(user_id):
+    """Recount one user's unread notifications (after an edit or delete)."""
+    unread = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    UserProfile.objects.filter(user_id=user_id).update(unread_notifications=unread)
+
+
+def recount_unread():
+    """Recompute every user's unread counter in a single statement."""
+    unread = (
+        Notification.objects.filter(user_id=OuterRef('user_id'), is_read=False)
+        .order_by().values('user_id').annotate(n=Count('id')).values('n')
+    )
+    return UserProfile.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+def mark_read(user, ids=None):
+    """Mark the user's notifications (all, or just `ids`) read."""
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(id__in=ids)
+    updated = notifications.update(is_read=True)
+    if updated:
+        UserProfile.objects.filter(user=user).update(
+            unread_notifications=Case(
+                When(unread_notifications__gt=updated, then=F('unread_notifications') - updated),
+                default=Value(0),
+            )
+        )
+    return updated
@@ -0,0 +1,62 @@
+# xypher_lux/order_status.py
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, Order
+from .notifications import add_unread
+
+CHUNK_SIZE = getattr(settings, 'ORDER_STATUS_CHUNK_SIZE', 1000)
+
+# status -> (notification type, title, message); statuses missing here
+# (e.g. back to pending) change silently
+STATUS_NOTIFICATIONS = {
+    'processing': ('confirmed', 'Order confirmed', 'Your order {number} is confirmed and being prepared.'),
+    'shipped': ('shipped', 'Order shipped', 'Your order {number} is on its way.'),
+    'delivered': ('delivered', 'Order delivered', 'Your order {number} has been delivered.'),
+    'cancelled': ('cancelled', 'Order cancelled', 'Your order {number} has been cancelled.'),
+}
+
+
+def transition_orders(orders, status, chunk_size=CHUNK_SIZE):
+    """Move every order in `orders` to `status` and notify the owners.
+
+    Works in chunks of `chunk_size` orders, each in its own transaction
+    and a fixed number of statements: lock the rows, one UPDATE, one
+    bulk INSERT of notifications, one UPDATE of the unread counters.
+    Orders already in `status` are skipped. Returns how many changed.
+    """
+    if status not in dict(Order.STATUS_CHOICES):
+        raise ValueError(f"Unknown order status {status!r}")
+    notification = STATUS_NOTIFICATIONS.get(status)
+
+    ids = list(orders.exclude(status=status).order_by('id').values_list('id', flat=True))
+    changed = 0
+    for start in range(0, len(ids), chunk_size):
+        with transaction.atomic():
+            rows = list(
+                Order.objects.select_for_update()
+                .filter(id__in=ids[start:start + chunk_size])
+                .exclude(status=status)
+                .values_list('id', 'user_id', 'order_number')
+            )
+            if not rows:
+                continue
+            Order.objects.filter(id__in=[pk for pk, _, _ in rows]).update(
+                status=status, updated_at=timezone.now()
+            )
+            changed += len(rows)
+
+            if notification:
+                kind, title, message = notification
+                Notification.objects.bulk_create([
+                    Notification(
+                        user_id=user_id, order_id=pk, type=kind, title=title,
+                        message=message.format(number=number or pk),
+                    )
+                    for pk, user_id, number in rows
+                ])
+                add_unread(Counter(user_id for _, user_id, _ in rows))
+    return changed
@@ -0,0 +1,133 @@
+# xypher_lux/outbox.py
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 30)  # seconds, doubled per attempt
+MAX_RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 60 * 60)
+# how long a claimed batch stays invisible to other workers
+CLAIM_TIMEOUT = getattr(settings, 'EMAIL_OUTBOX_CLAIM_TIMEOUT', 5 * 60)
+
+
+def queue_email(subject, body, recipient_list, from_email=None):
+    """Queue an email for the worker instead of sending it in the request.
+
+    The row is written in the caller's transaction, so a rolled back
+    request never sends anything.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=', '.join(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: RETRY_DELAY, 2x, 4x, ... capped at MAX_RETRY_DELAY."""
+    return timedelta(seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+@dataclass
+class BatchResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def total(self):
+        return self.sent + self.retried + self.failed
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Lock up to `batch_size` due emails for this worker.
+
+    Claimed rows get their next attempt pushed past CLAIM_TIMEOUT, so
+    concurrent workers skip them, and a worker that dies mid-batch only
+    delays them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(id__in=[email.id for email in batch]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_TIMEOUT)
+        )
+    return batch
+
+
+class OutboxSender:
+    """Sends claimed emails over one reused backend (SMTP) connection"""
+
+    def __init__(self, connection=None, max_attempts=MAX_ATTEMPTS):
+        self.connection = connection or get_connection()
+        self.max_attempts = max_attempts
+        self._open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._open:
+            try:
+                self.connection.close()
+            except Exception:
+                logger.exception("Error closing the email connection")
+            self._open = False
+
+    def _send(self, email):
+        if not self._open:
+            self.connection.open()
+            self._open = True
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, email.recipients, connection=self.connection,
+        )
+        self.connection.send_messages([message])
+
+    def send_batch(self, batch_size=BATCH_SIZE):
+        batch = claim_batch(batch_size)
+        result = BatchResult()
+        sent, retry = [], []
+        for email in batch:
+            try:
+                self._send(email)
+            except Exception as e:
+                # the connection may be unusable now; reconnect for the next one
+                self.close()
+                email.attempts += 1
+                email.last_error = f'{type(e).__name__}: {e}'[:1000]
+                if email.attempts >= self.max_attempts:
+                    email.status = 'failed'
+                    result.failed += 1
+                    logger.error("Giving up on email %s after %s attempts: %s", email.id, email.attempts, e)
+                else:
+                    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                    result.retried += 1
+                retry.append(email)
+            else:
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.attempts += 1
+                sent.append(email)
+                result.sent += 1
+
+        OutgoingEmail.objects.bulk_update(sent, ['status', 'sent_at', 'attempts'])
+        OutgoingEmail.objects.bulk_update(retry, ['status', 'attempts', 'last_error', 'next_attempt_at'])
+        return result
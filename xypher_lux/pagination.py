@@ -0,0 +1,237 @@
+# xypher_lux/pagination.py
+import hashlib
+import json
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+PAGE_SIZE = getattr(settings, 'CATALOG_PAGE_SIZE', 24)
+COUNT_CACHE_TTL = getattr(settings, 'CATALOG_COUNT_CACHE_TTL', 60)  # seconds
+CURSOR_SALT = 'xypher_lux.pagination.cursor'
+# changelists whose planner estimate is above this show the estimate
+ESTIMATED_COUNT_THRESHOLD = getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10_000)
+# pages after this one are fetched by keyset when the previous page was just seen
+KEYSET_AFTER_PAGE = getattr(settings, 'ADMIN_KEYSET_AFTER_PAGE', 5)
+BOUNDARY_TTL = 60 * 30  # seconds
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    """One page of a keyset-paginated listing"""
+    object_list: list
+    next_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _cursor_value(value):
+    # datetimes/decimals go through their string form; lookups parse them back
+    if isinstance(value, (int, str)) or value is None:
+        return value
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class KeysetPaginator:
+    """Paginate a queryset by the values of its last row instead of OFFSET.
+
+    `ordering` must end with a unique column (normally the primary key),
+    e.g. ('-created_at', '-id') or ('name', 'id'). Every page is a single
+    index range scan, so page 500 costs the same as page 1.
+    """
+
+    def __init__(self, queryset, ordering, per_page=PAGE_SIZE):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = ordering
+        self.per_page = per_page
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    def encode_cursor(self, obj):
+        return signing.dumps([_cursor_value(getattr(obj, name)) for name, _ in self.fields], salt=CURSOR_SALT)
+
+    def decode_cursor(self, cursor):
+        try:
+            values = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        return values
+
+    def _after(self, values):
+        """Rows strictly after `values` in the listing order."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+        rows = list(queryset[:self.per_page + 1])
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            return KeysetPage(rows, self.encode_cursor(rows[-1]))
+        return KeysetPage(rows)
+
+
+def _count_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return f"listing:count:{hashlib.md5(f'{sql}|{params}'.encode()).hexdigest()}"
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TTL):
+    """Count a listing at most once per `timeout` seconds.
+
+    The key is derived from the compiled SQL, so different filters get
+    their own entry while repeated page views share one COUNT(*).
+    """
+    return cache.get_or_set(_count_key(queryset), queryset.count, timeout)
+
+
+async def acached_count(queryset, timeout=COUNT_CACHE_TTL):
+    """cached_count() for async views, counting with the async ORM."""
+    key = _count_key(queryset)
+    count = await cache.aget(key)
+    if count is None:
+        count = await queryset.acount()
+        await cache.aset(key, count, timeout)
+    return count
+
+
+def estimated_count(queryset):
+    """The query planner's row estimate for `queryset`, or None.
+
+    Only PostgreSQL exposes one cheaply (EXPLAIN); elsewhere callers fall
+    back to an exact COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _keyset_ordering(queryset):
+    """The queryset's ordering if keyset pagination can follow it, else None.
+
+    Every field must be a non-null, non-relation column of the model's own
+    table ending with the primary key: NULLs can't be compared with
+    lt/gt, and a foreign key sorts by the related model's Meta.ordering
+    rather than by the id a boundary would hold. Anything else pages
+    with OFFSET.
+    """
+    ordering = queryset.query.order_by
+    names = [o for o in ordering if isinstance(o, str)]
+    if not names or len(names) != len(ordering) or '?' in names:
+        return None
+    opts = queryset.model._meta
+    local_columns = set(opts.local_concrete_fields)
+    for name in names:
+        name = name.lstrip('-')
+        try:
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+        except FieldDoesNotExist:  # annotations, lookups across relations
+            return None
+        if field not in local_columns or field.is_relation or field.null:
+            return None
+    last = names[-1].lstrip('-')
+    if last not in ('pk', opts.pk.name):
+        return None
+    return tuple(names)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator for tables too large to COUNT(*) or OFFSET through.
+
+    - count: the planner's estimate once that passes
+      ESTIMATED_COUNT_THRESHOLD rows (PostgreSQL), else the exact count;
+      `estimated` says which it was.
+    - pages past KEYSET_AFTER_PAGE: when the page before was served
+      recently, its last row (kept in the cache) is the lower bound, so
+      "next" is an index range scan instead of a deep OFFSET. Jumping
+      straight to a far page still uses OFFSET.
+
+    Use with show_full_result_count = False, or the changelist still
+    counts the whole table once per request.
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+            self.estimated = True
+            return estimate
+        return super().count
+
+    @cached_property
+    def _keyset(self):
+        ordering = _keyset_ordering(self.object_list)
+        return KeysetPaginator(self.object_list, ordering, self.per_page) if ordering else None
+
+    def _boundary_key(self, number):
+        sql, params = self.object_list.query.sql_with_params()
+        digest = hashlib.md5(f'{sql}|{params}|{self.per_page}'.encode()).hexdigest()
+        return f'admin:page-boundary:{digest}:{number}'
+
+    def validate_number(self, number):
+        self.count  # decides self.estimated
+        if not self.estimated:
+            return super().validate_number(number)
+        # the estimate may fall short of the real count, so pages past it
+        # are served (possibly empty) rather than refused
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        keyset = self._keyset
+        if keyset is None or number < KEYSET_AFTER_PAGE:
+            return super().page(number)
+
+        boundary = cache.get(self._boundary_key(number - 1)) if number > KEYSET_AFTER_PAGE else None
+        if boundary is not None:
+            rows = list(keyset.queryset.filter(keyset._after(boundary))[:self.per_page])
+        else:
+            bottom = (number - 1) * self.per_page
+            rows = list(self.object_list[bottom:bottom + self.per_page])
+        if rows:
+            cache.set(
+                self._boundary_key(number),
+                [_cursor_value(getattr(rows[-1], name)) for name, _ in keyset.fields],
+                BOUNDARY_TTL,
+            )
+        return self._get_page(rows, number, self)
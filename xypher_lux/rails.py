@@ -0,0 +1,111 @@
+# xypher_lux/rails.py
+from django.conf import settings
+from django.core.cache import caches
+
+from .fragment_cache import CACHE_ALIAS, bump_versions, get_versions
+from .models import Product
+
+# ids kept per rail; views show fewer, so excluding the current product
+# or a deactivated one still leaves enough
+FEATURED_RAIL_SIZE = getattr(settings, 'FEATURED_RAIL_SIZE', 8)
+SIMILAR_RAIL_SIZE = getattr(settings, 'SIMILAR_RAIL_SIZE', 6)
+RAIL_TIMEOUT = getattr(settings, 'RAIL_TIMEOUT', 60 * 60)  # seconds
+
+# the Product fields that decide which ids a rail holds and in what order;
+# saves that change none of them (stock, checkouts, descriptions) keep the rails
+RAIL_FIELDS = ('is_active', 'is_featured', 'category_id', 'price', 'name')
+
+# version scopes of their own, apart from the fragment cache's
+RAILS_SCOPE = 'rails'
+
+
+def rails_scope(category_id):
+    return f'rails:category:{category_id}'
+
+
+def bump_rails(*category_ids):
+    """Rebuild the catalog-wide rails and those of the given categories."""
+    bump_versions(RAILS_SCOPE, *(rails_scope(pk) for pk in category_ids if pk))
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _featured(category_id):
+    products = Product.objects.filter(is_active=True, is_featured=True)
+    if category_id:
+        products = products.filter(category_id=category_id)
+    return products.order_by('name', 'id').values_list('id', flat=True)[:FEATURED_RAIL_SIZE]
+
+
+def _similar(product):
+    """The active products of the same category closest in price."""
+    products = Product.objects.filter(category_id=product.category_id, is_active=True).exclude(id=product.id)
+    n = SIMILAR_RAIL_SIZE
+    # nearest prices on each side, then the closest n of both
+    above = products.filter(price__gte=product.price).order_by('price', 'id').values_list('id', 'price')[:n]
+    below = products.filter(price__lt=product.price).order_by('-price', '-id').values_list('id', 'price')[:n]
+    closest = sorted([*above, *below], key=lambda row: (abs(row[1] - product.price), row[0]))
+    return [pk for pk, _ in closest[:n]]
+
+
+def featured_rail(category_id=None):
+    return (f'featured:{category_id or "all"}', rails_scope(category_id) if category_id else RAILS_SCOPE,
+            lambda: _featured(category_id))
+
+
+def similar_rail(product):
+    return f'similar:{product.id}', rails_scope(product.category_id), lambda: _similar(product)
+
+
+def rail_ids(*rails):
+    """Id tuples of the given rails, building the ones not cached yet.
+
+    Each rail is keyed with the version of its scope (all rails for the
+    global featured one, a category's otherwise). bump_rails() moves them
+    only when a product's RAIL_FIELDS change, so checkouts and stock edits
+    leave the rails cached. Two cache round trips for any number of rails
+    when they are warm.
+    """
+    cache = _cache()
+    versions = get_versions([scope for _, scope, _ in rails])
+    keys = [f'rails:{name}:{version}' for (name, _, _), version in zip(rails, versions)]
+    found = cache.get_many(keys)
+    missing = {}
+    for key, (_, _, build) in zip(keys, rails):
+        if key not in found:
+            found[key] = missing[key] = tuple(build())
+    if missing:
+        cache.set_many(missing, RAIL_TIMEOUT)
+    return [found[key] for key in keys]
+
+
+def hydrate(*id_lists, exclude=(), limit=None):
+    """Products for each id list in its order, all loaded with one in_bulk query.
+
+    Ids of products deactivated since a rail was built are dropped.
+    """
+    wanted = {pk for ids in id_lists for pk in ids} - set(exclude)
+    products = {}
+    if wanted:
+        products = Product.objects.filter(is_active=True).select_related('category').with_variant_flag().in_bulk(wanted)
+    return [
+        [products[pk] for pk in ids if pk in products and pk not in exclude][:limit]
+        for ids in id_lists
+    ]
+
+
+def featured_products(category_ids=None, k=4):
+    """Up to `k` featured products, catalog-wide or from the given categories."""
+    if category_ids is None:
+        return hydrate(*rail_ids(featured_rail()), limit=k)[0]
+    merged = hydrate([pk for ids in rail_ids(*map(featured_rail, category_ids)) for pk in ids])[0]
+    return sorted(merged, key=lambda p: (p.name, p.id))[:k]
+
+
+def detail_rails(product, similar=SIMILAR_RAIL_SIZE, featured=4):
+    """(similar products, featured products) for a product page, in one query."""
+    similar_ids, featured_ids = rail_ids(similar_rail(product), featured_rail())
+    similar_products, featured_products = hydrate(similar_ids, featured_ids, exclude=(product.id,))
+    return similar_products[:similar], featured_products[:featured]
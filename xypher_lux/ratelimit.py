@@ -0,0 +1,254 @@
+# xypher_lux/ratelimit.py
+import hashlib
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+CACHE_ALIAS = getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default')
+ENABLED = getattr(settings, 'RATELIMIT_ENABLED', True)
+# proxies in front of the app that append to X-Forwarded-For; 0 trusts
+# REMOTE_ADDR only, since the header is otherwise whatever the client sent
+PROXY_COUNT = getattr(settings, 'RATELIMIT_PROXY_COUNT', 0)
+# {view name: [(key, rate), ...]} applied by RateLimitMiddleware, e.g.
+# {'xypher_lux:signup_view': [('ip', '10/h')], 'xypher_lux:search': [('ip', '120/m', ['GET'])]}
+VIEW_LIMITS = getattr(settings, 'RATE_LIMITS', {})
+
+# allowed/blocked counters of this worker process, keyed by limit name
+allowed = Counter()
+blocked = Counter()
+
+_RATE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    count: int
+    period: int  # seconds
+
+    @classmethod
+    def parse(cls, rate):
+        """'5/m', '100/h', '10/30s' -> Rate"""
+        match = _RATE.match(rate.replace(' ', ''))
+        if not match:
+            raise ValueError(f'Invalid rate {rate!r}: expected e.g. "5/m" or "10/30s"')
+        count, multiple, unit = match.groups()
+        return cls(int(count), int(multiple or 1) * _UNITS[unit])
+
+
+def client_ip(request):
+    if PROXY_COUNT:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= PROXY_COUNT:
+            return forwarded[-PROXY_COUNT]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_key(request, key):
+    """The identity a request is counted under for `key`; None skips the limit.
+
+    'ip'           the client address
+    'session'      the session cookie (no session lookup), else the address
+    'user'         the signed-in user's id, else the address (loads the user)
+    'post:<field>' a submitted value such as the account being logged into
+    'endpoint'     one counter shared by every caller
+    callable       key(request) -> str or None
+    """
+    if callable(key):
+        return key(request)
+    if key == 'ip':
+        return client_ip(request)
+    if key == 'session':
+        session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        return f'session:{session}' if session else client_ip(request)
+    if key == 'user':
+        user = getattr(request, 'user', None)
+        return f'user:{user.pk}' if user is not None and user.is_authenticated else client_ip(request)
+    if key.startswith('post:'):
+        value = request.POST.get(key[5:], '').strip().lower()
+        return value or None
+    if key == 'endpoint':
+        return ''
+    raise ValueError(f'Unknown rate limit key {key!r}')
+
+
+@dataclass(frozen=True)
+class Limit:
+    """`rate` requests per period for each distinct `key` of a request"""
+    name: str
+    key: object
+    rate: Rate
+    methods: tuple = ('POST',)
+
+    def applies(self, request):
+        return not self.methods or request.method in self.methods
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def hit(name, identity, rate, now=None):
+    """Count one request; returns 0 when it is within `rate`, else seconds to wait.
+
+    A sliding-window counter: the current fixed window's count plus the
+    previous window's weighted by how much of it still overlaps the last
+    `period` seconds. State is two small integers per identity in the
+    cache, updated with atomic add/incr, so every worker shares it without
+    locks. Rejected requests count too, so a client has to actually back
+    off to get through again.
+    """
+    now = time.time() if now is None else now
+    window, into = divmod(now, rate.period)
+    digest = hashlib.md5(f'{name}:{identity}'.encode()).hexdigest()
+    current_key = f'ratelimit:{digest}:{int(window)}'
+    cache = _cache()
+    cache.add(current_key, 0, rate.period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:  # evicted between add and incr
+        cache.set(current_key, 1, rate.period * 2)
+        current = 1
+    previous = cache.get(f'ratelimit:{digest}:{int(window) - 1}', 0)
+    weight = 1 - into / rate.period
+    if previous * weight + current <= rate.count:
+        return 0
+    if current > rate.count:
+        # over on this window alone: only the next one helps
+        return int(rate.period - into) + 1
+    # wait until the previous window's share has decayed below the headroom
+    headroom = rate.count - current
+    return max(1, int(rate.period * (1 - headroom / previous) - into) + 1)
+
+
+def check(request, limits):
+    """Count the request against each limit; returns (Limit, retry after) of the first exceeded."""
+    if not ENABLED:
+        return None
+    for limit in limits:
+        if not limit.applies(request):
+            continue
+        identity = request_key(request, limit.key)
+        if identity is None:
+            continue
+        retry_after = hit(limit.name, identity, limit.rate)
+        if retry_after:
+            blocked[limit.name] += 1
+            return limit, retry_after
+        allowed[limit.name] += 1
+    return None
+
+
+def too_many_requests(retry_after):
+    response = JsonResponse({
+        'success': False,
+        'message': f'Too many attempts. Please try again in {retry_after} seconds.',
+    }, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(rate, key='ip', name=None, methods=('POST',)):
+    """Reject a view's requests over `rate` per `key` with a 429, before the view runs.
+
+        @rate_limit('5/m', key='post:username')
+        @rate_limit('20/m')
+        def login_view(request): ...
+
+    Stacked decorators share one wrapper that checks the limits outermost
+    first and stops at the first one exceeded. Unless a limit uses the
+    'user' key, the check only touches the cache: no session, user or
+    database work happens for a rejected request.
+    """
+    def decorator(view_func):
+        if getattr(view_func, '_rate_limit_wrapper', None) is view_func:
+            # directly stacked: one wrapper checking every limit
+            limits, view = list(view_func.rate_limits), view_func.__wrapped__
+        else:
+            limits, view = [], view_func
+        limits.insert(0, Limit(
+            name or f'{view.__module__}.{view.__name__}:{key if isinstance(key, str) else key.__name__}',
+            key, Rate.parse(rate), tuple(methods or ()),
+        ))
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                exceeded = await sync_to_async(check)(request, limits)
+                if exceeded:
+                    return too_many_requests(exceeded[1])
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                exceeded = check(request, limits)
+                if exceeded:
+                    return too_many_requests(exceeded[1])
+                return view(request, *args, **kwargs)
+        wrapper.rate_limits = limits
+        wrapper._rate_limit_wrapper = wrapper
+        return wrapper
+    return decorator
+
+
+def view_limits(view_name):
+    # entries are (key, rate) or (key, rate, methods); methods default to POST
+    return [
+        Limit(f'{view_name}:{key}', key, Rate.parse(rate), *(tuple(m) for m in methods))
+        for key, rate, *methods in VIEW_LIMITS.get(view_name, ())
+    ]
+
+
+class RateLimitMiddleware:
+    """Apply settings.RATE_LIMITS to views by URL name, without touching their code.
+
+    Runs in process_view, after URL resolution and before the view (and
+    any decorator on it). Put it after SessionMiddleware and
+    AuthenticationMiddleware only if a limit uses the 'user' key; the
+    others need neither.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.limits = {name: view_limits(name) for name in VIEW_LIMITS}
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        limits = self.limits.get(match.view_name) if match else None
+        if limits:
+            exceeded = check(request, limits)
+            if exceeded:
+                return too_many_requests(exceeded[1])
+        return None
+
+
+def stats():
+    """Allowed/blocked counters per limit for this worker process."""
+    return {
+        'pid': os.getpid(),
+        'enabled': ENABLED,
+        'limits': {
+            name: {'allowed': allowed[name], 'blocked': blocked[name]}
+            for name in sorted(set(allowed) | set(blocked))
+        },
+    }
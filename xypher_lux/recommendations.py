@@ -0,0 +1,76 @@
+# xypher_lux/recommendations.py
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+from .models import Product
+
+POOL_SIZE = getattr(settings, 'RECOMMENDATION_POOL_SIZE', 200)
+POOL_TTL = getattr(settings, 'RECOMMENDATION_POOL_TTL', 60 * 10)  # seconds
+POOL_WINDOWS = 4  # random pk windows scanned per refresh
+
+
+def _pool_key(category_id=None):
+    return f"recommendations:pool:{category_id or 'all'}"
+
+
+def _active_products(category_id=None):
+    products = Product.objects.filter(is_active=True)
+    if category_id:
+        products = products.filter(category_id=category_id)
+    return products
+
+
+def build_pool(category_id=None):
+    """Collect up to POOL_SIZE candidate ids without reading the whole catalog.
+
+    A few windows starting at random primary keys are read off the pk index
+    (wrapping around to the start of the table), so the cost depends on the
+    pool size rather than on the number of products.
+    """
+    products = _active_products(category_id)
+    bounds = products.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+
+    window = max(POOL_SIZE // POOL_WINDOWS, 1)
+    ids = set()
+    for _ in range(POOL_WINDOWS):
+        start = random.randint(bounds['low'], bounds['high'])
+        chunk = list(
+            products.filter(id__gte=start).order_by('id').values_list('id', flat=True)[:window]
+        )
+        if len(chunk) < window:
+            chunk += list(
+                products.filter(id__lt=start).order_by('id').values_list('id', flat=True)[:window - len(chunk)]
+            )
+        ids.update(chunk)
+    return list(ids)
+
+
+def get_pool(category_id=None):
+    """Return the cached candidate pool, rebuilding it once it has expired."""
+    key = _pool_key(category_id)
+    pool = cache.get(key)
+    if pool is None:
+        pool = build_pool(category_id)
+        cache.set(key, pool, POOL_TTL)
+    return pool
+
+
+def invalidate_pool(category_id=None):
+    """Forget the pool of a category and the catalog-wide pool."""
+    keys = [_pool_key()]
+    if category_id:
+        keys.append(_pool_key(category_id))
+    cache.delete_many(keys)
+
+
+def recommended_products(category=None, k=4):
+    """Return up to `k` random active products, sampled from the cached pool."""
+    pool = get_pool(category.id if category else None)
+    ids = random.sample(pool, min(k, len(pool)))
+    # the pool may be slightly stale, so inactive products are filtered again
+    return _active_products().filter(id__in=ids).select_related('category').with_variant_flag()
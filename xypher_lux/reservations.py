@@ -0,0 +1,149 @@
+# xypher_lux/reservations.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Product, ProductVariant, StockReservation
+
+# how long a cart line keeps its units after the last change to it
+RESERVATION_TTL = getattr(settings, 'STOCK_RESERVATION_TTL', 60 * 15)  # seconds
+SWEEP_BATCH_SIZE = getattr(settings, 'STOCK_RESERVATION_SWEEP_BATCH', 1000)
+
+
+class StockUnavailable(Exception):
+    """Not enough unreserved stock for a hold"""
+
+    def __init__(self, available):
+        self.available = available
+        super().__init__(f'Only {available} items available in stock')
+
+
+def cart_holder(cart):
+    return f'cart:{cart.pk}'
+
+
+def guest_holder(token):
+    return f'guest:{token}'
+
+
+def held_by_others(product, variant, *holders):
+    """Units of product/variant held by live reservations other than `holders`'."""
+    return StockReservation.objects.filter(
+        product=product, variant=variant, expires_at__gt=timezone.now(),
+    ).exclude(holder__in=holders).aggregate(total=Sum('quantity'))['total'] or 0
+
+
+def unreserved_stock(lines, *holders):
+    """Stock of each cart line's product/variant not held by others, in one query.
+
+    `lines` are CartItems or GuestCartItems; holds of `holders` (the
+    lines' own) don't count against them.
+    """
+    held = {
+        (row['product_id'], row['variant_id']): row['total']
+        for row in StockReservation.objects.filter(
+            product_id__in={line.product.id for line in lines}, expires_at__gt=timezone.now(),
+        ).exclude(holder__in=holders).order_by()
+        .values('product_id', 'variant_id').annotate(total=Sum('quantity'))
+    }
+    return [
+        max(line.available_stock - held.get((line.product.id, line.variant.id if line.variant else None), 0), 0)
+        for line in lines
+    ]
+
+
+def _lock_stock(product, variant):
+    """Lock the product/variant row and return its current stock."""
+    if variant:
+        return ProductVariant.objects.select_for_update().values_list('stock', flat=True).get(pk=variant.pk)
+    return Product.objects.select_for_update().values_list('stock', flat=True).get(pk=product.pk)
+
+
+def hold(holder, product, variant, quantity, size='', color=''):
+    """Hold `quantity` units for one cart line for RESERVATION_TTL seconds.
+
+    Replaces the line's previous hold. Under autocommit the hold is
+    written first and the live total checked afterwards, so of two buyers
+    racing for the last units at least one sees the other's hold and is
+    turned away; nothing locks or writes the product row. Inside a
+    transaction (ATOMIC_REQUESTS, atomic blocks) the hold stays invisible
+    to others until commit, so the product or variant row is locked
+    instead and racing holds take turns. Raises StockUnavailable (leaving
+    the previous hold in place) when others already hold too much.
+    """
+    if connection.in_atomic_block:
+        stock = _lock_stock(product, variant)
+    else:
+        stock = variant.stock if variant else product.stock
+    if quantity > stock:
+        raise StockUnavailable(stock)
+
+    line = StockReservation.objects.filter(holder=holder, product=product, size=size, color=color)
+    previous = line.values_list('quantity', 'expires_at').first()
+    expires_at = timezone.now() + timedelta(seconds=RESERVATION_TTL)
+    if previous:
+        line.update(variant=variant, quantity=quantity, expires_at=expires_at)
+    else:
+        StockReservation.objects.create(
+            holder=holder, product=product, variant=variant, size=size, color=color,
+            quantity=quantity, expires_at=expires_at,
+        )
+
+    others = held_by_others(product, variant, holder)
+    if quantity + others > stock:
+        if previous:
+            line.update(quantity=previous[0], expires_at=previous[1])
+        else:
+            line.delete()
+        raise StockUnavailable(max(stock - others, 0))
+
+
+def release(holder, product=None, size='', color=''):
+    """Drop one line's hold, or all of `holder`'s holds without a product."""
+    holds = StockReservation.objects.filter(holder=holder)
+    if product is not None:
+        holds = holds.filter(product=product, size=size, color=color)
+    holds.delete()
+
+
+def hold_lines(holder, lines):
+    """Hold stock for many cart lines at once (CartItems), skipping the checks.
+
+    Used when a guest cart is merged at login: the merge has already capped
+    quantities to the unreserved stock, and one upsert beats a round of
+    hold() per line.
+    """
+    expires_at = timezone.now() + timedelta(seconds=RESERVATION_TTL)
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(
+                holder=holder, product_id=line.product_id, variant_id=line.variant_id,
+                size=line.size, color=line.color, quantity=line.quantity, expires_at=expires_at,
+            )
+            for line in lines
+        ],
+        update_conflicts=True,
+        unique_fields=['holder', 'product', 'size', 'color'],
+        update_fields=['variant', 'quantity', 'expires_at'],
+    )
+
+
+def sweep_expired(batch_size=SWEEP_BATCH_SIZE):
+    """Delete expired holds in batches of `batch_size`; returns how many.
+
+    Expired holds already count for nothing; this only keeps the ledger
+    (and its index) small.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(expires_at__lte=now)
+            .order_by('expires_at').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += StockReservation.objects.filter(id__in=ids).delete()[0]
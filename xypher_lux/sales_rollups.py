@@ -0,0 +1,148 @@
+# xypher_lux/sales_rollups.py
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyCategorySales, DailyProductSales, Order, OrderItem, RollupState
+
+STATE_NAME = 'sales'
+# orders committed a little after a run started can carry an updated_at
+# just below its mark; re-reading this much before the mark catches them
+# (recounting a day is idempotent, so the overlap only costs time)
+SAFETY_LAG = getattr(settings, 'SALES_ROLLUP_SAFETY_LAG', 300)  # seconds
+# days recounted per transaction
+DAYS_PER_BATCH = getattr(settings, 'SALES_ROLLUP_DAYS_PER_BATCH', 7)
+
+_LINE_REVENUE = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+@dataclass
+class RollupStats:
+    changed_orders: int = 0
+    days: int = 0
+    product_rows: int = 0
+    category_rows: int = 0
+
+
+def _day_bounds(day):
+    """The [start, end) of a local calendar day, matching TruncDate."""
+    bounds = datetime.combine(day, time.min), datetime.combine(day + timedelta(days=1), time.min)
+    if settings.USE_TZ:
+        bounds = tuple(timezone.make_aware(b) for b in bounds)
+    return bounds
+
+
+def dirty_days(since):
+    """Local dates of orders created on them whose rows changed after `since`."""
+    orders = Order.objects.all() if since is None else Order.objects.filter(updated_at__gt=since)
+    return sorted(
+        orders.order_by().annotate(day=TruncDate('created_at'))
+        .values_list('day', flat=True).distinct()
+    )
+
+
+def recount_day(day):
+    """Rebuild one day's rollup rows from its orders; returns (product rows, category rows).
+
+    Cancelled orders are left out, so a day recounted after a cancellation
+    loses that order's units and revenue. The category is the product's
+    current one.
+    """
+    start, end = _day_bounds(day)
+    items = OrderItem.objects.filter(
+        order__created_at__gte=start, order__created_at__lt=end,
+    ).exclude(order__status='cancelled').order_by()
+    totals = dict(orders=Count('order_id', distinct=True), units=Sum('quantity'), revenue=Sum(_LINE_REVENUE))
+
+    products = [
+        DailyProductSales(date=day, product_id=row['product_id'], category_id=row['product__category_id'],
+                          orders=row['orders'], units=row['units'], revenue=row['revenue'])
+        for row in items.values('product_id', 'product__category_id').annotate(**totals)
+    ]
+    # an order with two products of a category is still one order there,
+    # so categories get their own distinct count instead of summing products
+    categories = [
+        DailyCategorySales(date=day, category_id=row['product__category_id'],
+                           orders=row['orders'], units=row['units'], revenue=row['revenue'])
+        for row in items.values('product__category_id').annotate(**totals)
+    ]
+    DailyProductSales.objects.filter(date=day).delete()
+    DailyCategorySales.objects.filter(date=day).delete()
+    DailyProductSales.objects.bulk_create(products)
+    DailyCategorySales.objects.bulk_create(categories)
+    return len(products), len(categories)
+
+
+def update_rollups(full=False, since_date=None, days_per_batch=DAYS_PER_BATCH, progress=None):
+    """Bring the daily rollups up to date; returns RollupStats.
+
+    Incremental runs find the days of orders whose updated_at moved past
+    the stored high-water mark (placed, cancelled, edited — status
+    changes bump updated_at) and recount those days whole from
+    Order/OrderItem; untouched days are never read. `full` recounts every
+    day with orders and `since_date` every day from that date on, which is
+    also how deleted orders (nothing left to bump) get dropped.
+    """
+    stats = RollupStats()
+    state, _ = RollupState.objects.get_or_create(name=STATE_NAME)
+    started = timezone.now()
+
+    if full or state.high_water_mark is None:
+        days = dirty_days(None)
+        # days that lost all their orders still have stale rows
+        days = sorted(set(days) | set(DailyProductSales.objects.values_list('date', flat=True).distinct()))
+    else:
+        since = state.high_water_mark - timedelta(seconds=SAFETY_LAG)
+        stats.changed_orders = Order.objects.filter(updated_at__gt=since).count()
+        days = dirty_days(since)
+    if since_date is not None:
+        span = (timezone.localdate(started) - since_date).days + 1
+        days = sorted(set(days) | {since_date + timedelta(days=n) for n in range(span)})
+
+    for i in range(0, len(days), days_per_batch):
+        with transaction.atomic():
+            for day in days[i:i + days_per_batch]:
+                products, categories = recount_day(day)
+                stats.days += 1
+                stats.product_rows += products
+                stats.category_rows += categories
+        if progress:
+            progress(stats)
+
+    # only moved once every dirty day is recounted, so a failed run is retried
+    state.high_water_mark = started
+    state.save(update_fields=['high_water_mark', 'updated_at'])
+    return stats
+
+
+def sales_report(days=30, top=10, today=None):
+    """Figures for the admin sales report, read from the rollup tables only."""
+    today = today or timezone.localdate()
+    first = today - timedelta(days=days - 1)
+    week = today - timedelta(days=6)
+    by_category = DailyCategorySales.objects.order_by()
+    by_product = DailyProductSales.objects.order_by()
+    return {
+        'first_day': first,
+        'last_day': today,
+        'daily': list(
+            by_category.filter(date__gte=first, date__lte=today)
+            .values('date').annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('-date')
+        ),
+        'top_products': list(
+            by_product.filter(date__gte=week, date__lte=today)
+            .values('product_id', 'product__name')
+            .annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('-revenue')[:top]
+        ),
+        'top_categories': list(
+            by_category.filter(date__gte=week, date__lte=today)
+            .values('category_id', 'category__name')
+            .annotate(units=Sum('units'), revenue=Sum('revenue')).order_by('-revenue')[:top]
+        ),
+        'state': RollupState.objects.filter(name=STATE_NAME).first(),
+    }
@@ -0,0 +1,251 @@
+# xypher_lux/search.py
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+RESULTS_PER_PAGE = getattr(settings, 'SEARCH_RESULTS_PER_PAGE', 24)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a raw query into lowercase word tokens (drops all operators)."""
+    return TOKEN_RE.findall(query.lower())[:10]
+
+
+@dataclass
+class SearchHits:
+    """Ranked product ids for one page plus the total hit count"""
+    ids: list = field(default_factory=list)
+    total: int = 0
+
+
+@dataclass
+class SearchPage:
+    """One page of hydrated search results"""
+    products: list
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def has_next(self):
+        return self.page * self.per_page < self.total
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+
+class BaseSearchBackend:
+    """Keeps a product index and answers ranked queries from it"""
+
+    def create_index(self):
+        """Create the index if it's missing; run by migrate and rebuild_search_index."""
+
+    def index_products(self, products):
+        """(Re)index products; inactive ones are removed from the index."""
+        products = list(products)
+        self.remove_products([p.id for p in products])
+        active = [p for p in products if p.is_active]
+        if active:
+            self.insert(active)
+
+    def insert(self, products):
+        raise NotImplementedError
+
+    def remove_products(self, ids):
+        raise NotImplementedError
+
+    def prune(self):
+        """Remove deleted and inactive products from the index; returns how many."""
+        raise NotImplementedError
+
+    def search(self, query, offset=0, limit=RESULTS_PER_PAGE):
+        raise NotImplementedError
+
+    @staticmethod
+    def document(product):
+        return product.name, product.description or '', product.category.name
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Unindexed icontains fallback for databases without full-text support"""
+
+    def insert(self, products):
+        pass
+
+    def remove_products(self, ids):
+        pass
+
+    def prune(self):
+        return 0
+
+    def search(self, query, offset=0, limit=RESULTS_PER_PAGE):
+        condition = Q()
+        for token in tokenize(query):
+            condition &= (
+                Q(name__icontains=token) |
+                Q(description__icontains=token) |
+                Q(category__name__icontains=token)
+            )
+        if not condition:
+            return SearchHits()
+        matches = Product.objects.filter(condition, is_active=True)
+        ids = list(matches.order_by('name', 'id').values_list('id', flat=True)[offset:offset + limit])
+        return SearchHits(ids=ids, total=matches.count())
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """SQLite FTS5 index ranked with bm25, keyed by product id"""
+    table = 'xypher_lux_product_fts'
+    # bm25 column weights: name, description, category
+    weights = (10.0, 1.0, 5.0)
+
+    def create_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "name, description, category, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+
+    def insert(self, products):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, name, description, category) VALUES (%s, %s, %s, %s)",
+                [(p.id, *self.document(p)) for p in products],
+            )
+
+    def remove_products(self, ids):
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", list(ids))
+
+    def prune(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid NOT IN "
+                f"(SELECT id FROM {Product._meta.db_table} WHERE is_active)"
+            )
+            return cursor.rowcount
+
+    def search(self, query, offset=0, limit=RESULTS_PER_PAGE):
+        tokens = tokenize(query)
+        if not tokens:
+            return SearchHits()
+        # every token must match, the last one as a prefix (search-as-you-type)
+        match = ' '.join(f'"{t}"' for t in tokens[:-1]) + f' "{tokens[-1]}"*'
+        rank = f"bm25({self.table}, {', '.join(str(w) for w in self.weights)})"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY {rank} LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"SELECT count(*) FROM {self.table} WHERE {self.table} MATCH %s", [match])
+            total = cursor.fetchone()[0]
+        return SearchHits(ids=ids, total=total)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """PostgreSQL tsvector index (GIN) ranked with ts_rank"""
+    table = 'xypher_lux_product_search'
+    config = getattr(settings, 'SEARCH_POSTGRES_CONFIG', 'english')
+
+    def create_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "product_id bigint PRIMARY KEY, document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_idx ON {self.table} USING GIN (document)"
+            )
+
+    def insert(self, products):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (product_id, document) VALUES (%s, "
+                "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'C') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                [
+                    (p.id, self.config, name, self.config, description, self.config, category)
+                    for p in products
+                    for name, description, category in [self.document(p)]
+                ],
+            )
+
+    def remove_products(self, ids):
+        if not ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE product_id = ANY(%s)", [list(ids)])
+
+    def prune(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE product_id NOT IN "
+                f"(SELECT id FROM {Product._meta.db_table} WHERE is_active)"
+            )
+            return cursor.rowcount
+
+    def search(self, query, offset=0, limit=RESULTS_PER_PAGE):
+        tokens = tokenize(query)
+        if not tokens:
+            return SearchHits()
+        tsquery = ' & '.join(tokens) + ':*'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id FROM {self.table}, to_tsquery(%s::regconfig, %s) query "
+                "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, product_id "
+                "LIMIT %s OFFSET %s",
+                [self.config, tsquery, limit, offset],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                f"SELECT count(*) FROM {self.table} WHERE document @@ to_tsquery(%s::regconfig, %s)",
+                [self.config, tsquery],
+            )
+            total = cursor.fetchone()[0]
+        return SearchHits(ids=ids, total=total)
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured backend, chosen by database vendor by default.
+
+    Set PRODUCT_SEARCH_BACKEND to a dotted class path to override it.
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+        backend_class = import_string(path) if path else BACKENDS.get(connection.vendor, DatabaseSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+def search_products(query, page=1, per_page=RESULTS_PER_PAGE):
+    """Run a ranked search and hydrate one page of products (plus variants)."""
+    page = max(page, 1)
+    hits = get_backend().search(query, offset=(page - 1) * per_page, limit=per_page)
+    found = Product.objects.filter(id__in=hits.ids, is_active=True).select_related('category').with_variants().in_bulk()
+    products = [found[pk] for pk in hits.ids if pk in found]
+    return SearchPage(products=products, total=hits.total, page=page, per_page=per_page)
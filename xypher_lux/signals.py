@@ -0,0 +1,154 @@
+# xypher_lux/signals.py
+from django.contrib.auth.signals import user_logged_in
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save
+from django.utils import timezone
+from django.dispatch import receiver
+
+from . import images, rails
+from .cart_store import merge_guest_cart
+from .category_tree import adjust_product_count, invalidate_tree, recount_categories
+from .fragment_cache import bump_catalog
+from .models import Category, Notification, Product, ProductVariant
+from .notifications import add_unread, refresh_unread
+from .recommendations import invalidate_pool
+from .search import get_backend
+
+
+@receiver(post_init, sender=Product)
+def remember_catalog_state(sender, instance, **kwargs):
+    # keep the loaded values so saves can tell what actually changed;
+    # read __dict__ so deferred fields (.only()) don't trigger a query
+    instance._loaded_is_active = instance.__dict__.get('is_active')
+    instance._loaded_category_id = instance.__dict__.get('category_id')
+    image = instance.__dict__.get('image')
+    instance._loaded_image_name = getattr(image, 'name', image)
+    instance._loaded_rail_values = {name: instance.__dict__.get(name) for name in rails.RAIL_FIELDS}
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    # values that weren't loaded are assumed unchanged
+    loaded_is_active = instance._loaded_is_active
+    was_active = not created and (instance.is_active if loaded_is_active is None else loaded_is_active)
+    old_category_id = instance._loaded_category_id or instance.category_id
+    moved = was_active and old_category_id != instance.category_id
+
+    if moved or was_active != instance.is_active:
+        invalidate_pool(instance.category_id)
+        if was_active:
+            invalidate_pool(old_category_id)
+            adjust_product_count(old_category_id, -1)
+        if instance.is_active:
+            adjust_product_count(instance.category_id, 1)
+    # cached fragments show prices, stock and names, so any save counts
+    bump_catalog(instance.category_id, old_category_id)
+    if created or any(
+        loaded is not None and loaded != getattr(instance, name)
+        for name, loaded in instance._loaded_rail_values.items()
+    ):
+        rails.bump_rails(instance.category_id, old_category_id)
+
+    loaded_image = instance._loaded_image_name
+    image_name = instance.image.name or ''
+    if (created or loaded_image is not None) and (loaded_image or '') != image_name:
+        image_replaced(instance, image_name)
+    remember_catalog_state(sender, instance)
+
+
+def image_replaced(instance, image_name):
+    # the old derivatives show the old picture; fall back to the original
+    # until the new ones are built
+    if instance.image_derivatives:
+        instance.image_derivatives = {}
+        Product.objects.filter(pk=instance.pk).update(image_derivatives={})
+    if image_name and images.BUILD_ON_SAVE:
+        pk = instance.pk
+        transaction.on_commit(lambda: images.schedule_derivatives(pk, image_name))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    invalidate_pool(instance.category_id)
+    bump_catalog(instance.category_id)
+    rails.bump_rails(instance.category_id)
+    if instance.is_active if instance._loaded_is_active is None else instance._loaded_is_active:
+        adjust_product_count(instance.category_id, -1)
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    # made once with the tables, so searches never check for it; the
+    # backends query the default connection
+    if sender.label == 'xypher_lux' and using == DEFAULT_DB_ALIAS:
+        get_backend().create_index()
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_backend().index_products([instance]))
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_search_index(sender, instance, **kwargs):
+    product_id = instance.id
+    transaction.on_commit(lambda: get_backend().remove_products([product_id]))
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    # product documents include the category name
+    if not created:
+        products = instance.products.select_related('category')
+        transaction.on_commit(lambda: get_backend().index_products(products))
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, **kwargs):
+    invalidate_tree()
+    bump_catalog(instance.id)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # the subtree's products went with it, so ancestors need a recount
+    transaction.on_commit(recount_categories)
+    bump_catalog(instance.id)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+def sync_product_stock(sender, instance, **kwargs):
+    # Product.stock stays the total of its variants for listings and badges
+    total = ProductVariant.objects.filter(product_id=instance.product_id).aggregate(total=Sum('stock'))['total']
+    updated = Product.objects.filter(pk=instance.product_id).update(
+        stock=total or 0, updated_at=timezone.now()
+    )
+    if updated:
+        category_id = Product.objects.filter(pk=instance.product_id).values_list('category_id', flat=True).first()
+        bump_catalog(category_id)
+
+
+# bulk_create() bypasses these; order_status.transition_orders updates the
+# counters itself
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            add_unread({instance.user_id: 1})
+    else:
+        refresh_unread(instance.user_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        refresh_unread(instance.user_id)
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    # request is None for logins outside a request (e.g. Client.force_login)
+    if request is not None:
+        merge_guest_cart(request, user)
@@ -0,0 +1,57 @@
+from django import template
+
+from xypher_lux.fragment_cache import CATALOG_SCOPE, category_scope, get_or_render
+
+register = template.Library()
+
+
+class CatalogCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, name, category, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.category = category
+        self.vary_on = vary_on
+
+    def render(self, context):
+        if self.category is None:
+            scopes = [CATALOG_SCOPE]
+        else:
+            scopes = [category_scope(self.category.resolve(context))]
+        return get_or_render(
+            self.name,
+            scopes,
+            lambda: self.nodelist.render(context),
+            vary_on=[var.resolve(context) for var in self.vary_on],
+            timeout=int(self.timeout.resolve(context)),
+        )
+
+
+@register.tag('catalog_cache')
+def do_catalog_cache(parser, token):
+    """
+    Cache a fragment until the catalog data behind it changes.
+
+        {% catalog_cache 900 "detail_similar" category=product.category_id product.id %}
+            ...
+        {% endcatalog_cache %}
+
+    Without ``category=`` the fragment is flushed by any product or category
+    change; with it, only by changes to products in that category.
+    Remaining arguments are vary-on values, as with ``{% cache %}``.
+    """
+    nodelist = parser.parse(('endcatalog_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes at least two arguments.")
+
+    name = bits[2].strip('"\'')
+    category = None
+    vary_on = []
+    for bit in bits[3:]:
+        if bit.startswith('category='):
+            category = parser.compile_filter(bit[len('category='):])
+        else:
+            vary_on.append(parser.compile_filter(bit))
+    return CatalogCacheNode(nodelist, parser.compile_filter(bits[1]), name, category, vary_on)
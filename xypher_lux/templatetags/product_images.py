@@ -0,0 +1,44 @@
+from django import template
+from django.utils.html import format_html
+
+from xypher_lux.images import srcset
+
+register = template.Library()
+
+# what the catalog grids and rails render at; override per call with sizes=
+DEFAULT_SIZES = '(max-width: 600px) 50vw, (max-width: 1024px) 33vw, 300px'
+
+
+@register.simple_tag
+def product_image(product, sizes=DEFAULT_SIZES, loading='lazy', css_class='', id=''):
+    """Responsive <picture> for a product image.
+
+    Offers the WebP derivatives, falls back to the JPEG ones, and to the
+    original upload when derivatives haven't been built yet:
+
+        {% product_image product sizes="(max-width: 600px) 100vw, 50vw" loading="eager" %}
+    """
+    if not product.image:
+        return ''
+    attrs = format_html(
+        'alt="{}" loading="{}" decoding="async"{}{}',
+        product.name,
+        loading,
+        format_html(' class="{}"', css_class) if css_class else '',
+        format_html(' id="{}"', id) if id else '',
+    )
+    manifest = product.image_derivatives
+    if not manifest.get('jpeg'):
+        return format_html('<img src="{}" {}>', product.image.url, attrs)
+
+    jpeg = manifest['jpeg']
+    fallback = jpeg[max(jpeg, key=int)]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" {}>'
+        '</picture>',
+        srcset(manifest, 'webp'), sizes,
+        product.image.storage.url(fallback), srcset(manifest, 'jpeg'), sizes,
+        manifest['width'], manifest['height'], attrs,
+    )
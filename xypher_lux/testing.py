@@ -0,0 +1,47 @@
+# xypher_lux/testing.py
+from django.urls import URLPattern, get_resolver, resolve, reverse
+
+from .middleware import collect_metrics
+
+
+def budgeted_url_names(urlconf='xypher_lux.urls', namespace='xypher_lux'):
+    """Names of every route in `urlconf` whose view declares a @query_budget."""
+    names = []
+    for pattern in get_resolver(urlconf).url_patterns:
+        if isinstance(pattern, URLPattern) and pattern.name:
+            if getattr(pattern.callback, 'query_budget', None) is not None:
+                names.append(f'{namespace}:{pattern.name}')
+    return names
+
+
+def assert_query_budget(client, url_name, args=None, kwargs=None, method='get', data=None):
+    """Request a named URL and fail if its view runs more queries than declared.
+
+    Queries on every database alias count, including those an async view
+    runs in worker threads. Returns the response so callers can make
+    further assertions on it.
+    """
+    url = reverse(url_name, args=args, kwargs=kwargs)
+    view = resolve(url).func
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        raise AssertionError(f"{url_name} does not declare a @query_budget")
+
+    with collect_metrics() as metrics:
+        response = getattr(client, method)(url, data or {})
+
+    if metrics.query_count > budget:
+        statements = '\n'.join(
+            f"{i}. {sql}" for i, (_, sql) in enumerate(metrics.queries, start=1)
+        )
+        raise AssertionError(
+            f"{url_name} ran {metrics.query_count} queries, budget is {budget}:\n{statements}"
+        )
+    return response
+
+
+class QueryBudgetMixin:
+    """TestCase mixin exposing assert_query_budget as a method"""
+
+    def assertQueryBudget(self, url_name, *args, **kwargs):
+        return assert_query_budget(self.client, url_name, *args, **kwargs)
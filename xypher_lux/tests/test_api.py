@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from xypher_lux.models import Category, Product
+
+
+class ApiETagTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Jackets', slug='jackets')
+        self.parka, self.mac = (
+            Product.objects.create(category=self.category, name=name, slug=name.lower(), price=Decimal('90.00'))
+            for name in ('Parka', 'Mac')
+        )
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_list_etag_is_the_same_on_every_process(self):
+        url = reverse('xypher_lux:api_product_list')
+        etag = self.etag(url)
+        # another process: its own, empty locmem caches
+        for alias in caches:
+            caches[alias].clear()
+        self.assertEqual(self.etag(url), etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_list_etag_follows_deletions_and_renames(self):
+        url = reverse('xypher_lux:api_product_list')
+        before = self.etag(url)
+        self.mac.delete()
+        after_delete = self.etag(url)
+        self.assertNotEqual(after_delete, before)
+        self.category.slug = 'coats'
+        self.category.save()
+        self.assertNotEqual(self.etag(url), after_delete)
+
+    def test_product_etag_follows_category_renames(self):
+        url = reverse('xypher_lux:api_product_detail', kwargs={'id': self.parka.id})
+        before = self.etag(url)
+        self.category.slug = 'coats'
+        self.category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=before)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['category'], 'coats')
+
+    def test_tree_etag_follows_renames(self):
+        url = reverse('xypher_lux:api_category_tree')
+        before = self.etag(url)
+        self.assertEqual(self.etag(url), before)
+        self.category.name = 'Coats'
+        self.category.save()
+        self.assertNotEqual(self.etag(url), before)
@@ -0,0 +1,23 @@
+import random
+from decimal import Decimal
+
+from django.test import TestCase
+
+from xypher_lux.benchmark import Fixtures
+from xypher_lux.models import Category, Product, ProductVariant
+
+
+class FixturesTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        for n in range(40):
+            product = Product.objects.create(
+                category=category, name=f'Jacket {n}', slug=f'jacket-{n}', price=Decimal('50.00'),
+            )
+            ProductVariant.objects.create(product=product, size='M', stock=150)
+
+    def test_seed_repeats_the_sample(self):
+        first, again, other = (Fixtures(random.Random(seed), sample_size=10) for seed in (1, 1, 2))
+        self.assertEqual(len(first.products), 10)
+        self.assertEqual((first.products, first.variants), (again.products, again.variants))
+        self.assertNotEqual(first.products, other.products)
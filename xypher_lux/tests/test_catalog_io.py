@@ -0,0 +1,69 @@
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from xypher_lux.catalog_io import CatalogImporter, RowError
+from xypher_lux.models import Category, Product, ProductVariant
+
+
+def rows(*dicts):
+    return enumerate(dicts, start=2)
+
+
+class CatalogImporterStockTests(TestCase):
+    # reindex=False: the SQLite search backend creates its FTS table on
+    # first use, which doesn't survive the test transaction's rollback
+    def setUp(self):
+        self.category = Category.objects.create(name='Jackets', slug='jackets')
+        self.plain = Product.objects.create(
+            category=self.category, name='Scarf', slug='scarf', price=Decimal('10.00'), stock=4,
+        )
+        self.sized = Product.objects.create(
+            category=self.category, name='Parka', slug='parka', price=Decimal('90.00'),
+        )
+        ProductVariant.objects.create(product=self.sized, size='M', stock=3)
+        ProductVariant.objects.create(product=self.sized, size='L', stock=5)
+
+    def test_stock_of_product_with_variants_is_refused(self):
+        stats = CatalogImporter(reindex=False).run(rows({'slug': 'parka', 'stock': '7'}, {'slug': 'scarf', 'stock': '7'}))
+        self.assertEqual(stats.updated, 1)
+        self.assertEqual([e.line for e in stats.errors], [2])
+        self.sized.refresh_from_db()
+        self.plain.refresh_from_db()
+        self.assertEqual(self.sized.stock, 8)  # still the variants' total
+        self.assertEqual(self.plain.stock, 7)
+
+    def test_strict_raises(self):
+        with self.assertRaises(RowError):
+            CatalogImporter(strict=True, reindex=False).run(rows({'slug': 'parka', 'stock': '7'}))
+
+    def test_columns_without_stock_still_update_products_with_variants(self):
+        CatalogImporter(reindex=False).run(rows({'slug': 'parka', 'price': '80.00'}))
+        self.sized.refresh_from_db()
+        self.assertEqual((self.sized.price, self.sized.stock), (Decimal('80.00'), 8))
+
+
+class ImportCatalogCommandTests(TestCase):
+    def write_csv(self, text):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_failed_strict_run_still_syncs_committed_chunks(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        path = self.write_csv(
+            'slug,name,category,price\n'
+            'a,A,jackets,1.00\n'
+            'b,B,jackets,2.00\n'
+            'c,C,nowhere,3.00\n'
+        )
+        with self.assertRaises(CommandError):
+            call_command('import_catalog', path, '--strict', '--batch-size', '1', '--no-reindex', stdout=open(os.devnull, 'w'))
+        category.refresh_from_db()
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(category.product_count, 2)
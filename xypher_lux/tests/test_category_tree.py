@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from xypher_lux.category_tree import recount_categories
+from xypher_lux.models import Category, Product
+
+
+class ProductCountTests(TestCase):
+    def setUp(self):
+        self.parent = Category.objects.create(name='Men', slug='men')
+        self.child = Category.objects.create(name='Jackets', slug='jackets', parent=self.parent)
+        self.product = Product.objects.create(
+            category=self.child, name='Parka', slug='parka', price=Decimal('90.00'), stock=3,
+        )
+
+    def counts(self, category):
+        category.refresh_from_db()
+        return category.product_count, category.subtree_product_count
+
+    def test_signals_keep_counts(self):
+        self.assertEqual(self.counts(self.child), (1, 1))
+        self.assertEqual(self.counts(self.parent), (0, 1))
+        self.product.delete()
+        self.assertEqual(self.counts(self.child), (0, 0))
+        self.assertEqual(self.counts(self.parent), (0, 0))
+
+    def test_delete_from_category_whose_count_drifted_to_zero(self):
+        # a bulk path that skipped the signals left the counts behind
+        Category.objects.update(product_count=0, subtree_product_count=0)
+        self.product.delete()
+        self.assertEqual(self.counts(self.child), (0, 0))
+        self.assertEqual(self.counts(self.parent), (0, 0))
+
+    def test_recount_repairs_drift(self):
+        Category.objects.update(product_count=0, subtree_product_count=0)
+        recount_categories()
+        self.assertEqual(self.counts(self.child), (1, 1))
+        self.assertEqual(self.counts(self.parent), (0, 1))
+
+
+class SubtreeProductsTests(TestCase):
+    def test_one_query_over_the_whole_subtree(self):
+        men = Category.objects.create(name='Men', slug='men')
+        jackets = Category.objects.create(name='Jackets', slug='jackets', parent=men)
+        rain = Category.objects.create(name='Rain', slug='rain', parent=jackets)
+        women = Category.objects.create(name='Women', slug='women')
+        for slug, category in (('tee', men), ('parka', jackets), ('mac', rain), ('dress', women)):
+            Product.objects.create(category=category, name=slug, slug=slug, price=Decimal('10.00'), stock=1)
+
+        with self.assertNumQueries(1):
+            slugs = sorted(men.subtree_products().values_list('slug', flat=True))
+        self.assertEqual(slugs, ['mac', 'parka', 'tee'])
+        self.assertEqual(
+            sorted(jackets.subtree_products().values_list('slug', flat=True)), ['mac', 'parka'],
+        )
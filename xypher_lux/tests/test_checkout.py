@@ -0,0 +1,102 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from xypher_lux import reservations
+from xypher_lux.cart_store import get_or_create_cart
+from xypher_lux.checkout import InsufficientStock, place_order
+from xypher_lux.models import CartItem, Category, Order, Product, ProductVariant, StockReservation
+from xypher_lux.reservations import cart_holder
+
+
+class CheckoutHoldTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.product = Product.objects.create(
+            category=category, name='Parka', slug='parka', price=Decimal('90.00'), stock=1,
+        )
+        self.buyer, self.holder = (
+            get_or_create_cart(User.objects.create_user(name, password='x')) for name in ('buyer', 'holder')
+        )
+        for cart in (self.buyer, self.holder):
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+
+    def test_units_held_by_another_cart_are_refused(self):
+        # the buyer never held (or its hold lapsed); the other cart holds the last unit
+        reservations.hold(cart_holder(self.holder), self.product, None, 1)
+        with self.assertRaises(InsufficientStock) as raised:
+            place_order(self.buyer, Order(shipping_address='1 Main Street'))
+        self.assertEqual(raised.exception.shortages, {'Parka': 0})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        self.assertFalse(Order.objects.exists())
+
+        place_order(self.holder, Order(shipping_address='2 Main Street'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_lapsed_holds_of_others_dont_block(self):
+        reservations.hold(cart_holder(self.holder), self.product, None, 1)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        place_order(self.buyer, Order(shipping_address='1 Main Street'))
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Two buyers check out the last unit at the same moment"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.product = Product.objects.create(
+            category=category, name='Parka', slug='parka', price=Decimal('90.00'), stock=1,
+        )
+        self.carts = [
+            get_or_create_cart(User.objects.create_user(f'buyer{n}', password='x')) for n in range(2)
+        ]
+
+    def race(self, variant=None):
+        for cart in self.carts:
+            CartItem.objects.create(
+                cart=cart, product=self.product, variant=variant, size=variant.size if variant else '', quantity=1,
+            )
+        barrier = threading.Barrier(len(self.carts))
+        outcomes = []
+
+        def buyer(cart):
+            try:
+                barrier.wait()
+                place_order(cart, Order(shipping_address='1 Main Street'))
+                outcomes.append('ordered')
+            except InsufficientStock:
+                outcomes.append('short')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer, args=(cart,)) for cart in self.carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(outcomes)
+
+    def test_last_unit_sells_once(self):
+        self.assertEqual(self.race(), ['ordered', 'short'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(Order.objects.count(), 1)
+        # the losing order rolled back whole, its cart line included
+        self.assertEqual(CartItem.objects.count(), 1)
+
+    def test_last_unit_of_a_variant_sells_once(self):
+        variant = ProductVariant.objects.create(product=self.product, size='M', stock=1)
+        self.assertEqual(self.race(variant), ['ordered', 'short'])
+        variant.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual((variant.stock, self.product.stock), (0, 0))
+        self.assertEqual(Order.objects.count(), 1)
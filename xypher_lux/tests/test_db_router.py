@@ -0,0 +1,92 @@
+from copy import copy
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from xypher_lux import db_router
+from xypher_lux.models import Category, Product
+
+REPLICA = 'replica'
+HAS_REPLICA = REPLICA in settings.DATABASES
+
+
+@skipUnless(HAS_REPLICA, "needs a second database alias 'replica', as in ecommerce.test_settings")
+@override_settings(
+    DATABASE_ROUTERS=['xypher_lux.db_router.PrimaryReplicaRouter'],
+    MIDDLEWARE=['xypher_lux.db_router.DatabaseRoutingMiddleware', *settings.MIDDLEWARE],
+)
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """Two real databases stand in for a primary and a lagging replica.
+
+    The replica gets a copy of the catalog with a stale product name, so
+    which name a page shows tells which database served the read. The
+    tests can't run inside a transaction: the router keeps reads on the
+    primary there.
+    """
+    databases = {'default', REPLICA} if HAS_REPLICA else {'default'}
+
+    def setUp(self):
+        patcher = mock.patch.object(db_router, 'REPLICAS', [REPLICA])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+        self.category = Category.objects.create(name='Shoes', slug='shoes')
+        self.product = Product.objects.create(
+            category=self.category, name='Boot v2', slug='boot', price=Decimal('50.00'), stock=5,
+        )
+        stale = copy(self.product)
+        stale.name = 'Boot v1'
+        # bulk_create skips signals, which would write to the primary again
+        Category.objects.using(REPLICA).bulk_create([self.category])
+        Product.objects.using(REPLICA).bulk_create([stale])
+        self.url = self.product.get_absolute_url()
+
+    def test_catalog_view_reads_from_replica(self):
+        with CaptureQueriesContext(connections['default']) as primary:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Boot v1')
+        self.assertNotContains(response, 'Boot v2')
+        self.assertEqual(len(primary), 0, [q['sql'] for q in primary])
+
+    def test_write_pins_client_to_primary(self):
+        User.objects.create_user('ann', 'ann@example.com', 'secret-pw-1')
+        response = self.client.post('/login/', {'username': 'ann', 'password': 'secret-pw-1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(db_router.STICKY_COOKIE, response.cookies)
+
+        self.assertContains(self.client.get(self.url), 'Boot v2')
+
+    def test_pin_expires(self):
+        self.client.cookies[db_router.STICKY_COOKIE] = '1'  # long past
+        self.assertContains(self.client.get(self.url), 'Boot v1')
+
+    def test_reads_without_writes_do_not_pin(self):
+        response = self.client.get(self.url)
+        self.assertNotIn(db_router.STICKY_COOKIE, response.cookies)
+
+    def test_writes_go_to_primary(self):
+        with db_router.read_from_replica():
+            Product.objects.filter(pk=self.product.pk).update(name='Boot v3')
+        self.assertEqual(Product.objects.using('default').get().name, 'Boot v3')
+        self.assertEqual(Product.objects.using(REPLICA).get().name, 'Boot v1')
+
+    def test_request_reads_primary_after_its_own_write(self):
+        with db_router.read_from_replica():
+            self.assertEqual(Product.objects.get().name, 'Boot v1')
+            Product.objects.filter(pk=self.product.pk).update(name='Boot v3')
+            self.assertEqual(Product.objects.get().name, 'Boot v3')
+
+    def test_transaction_reads_primary(self):
+        with transaction.atomic(), db_router.read_from_replica():
+            self.assertEqual(Product.objects.get().name, 'Boot v2')
+
+    def test_no_replicas_configured(self):
+        with mock.patch.object(db_router, 'REPLICAS', []):
+            self.assertContains(self.client.get(self.url), 'Boot v2')
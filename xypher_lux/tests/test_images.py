@@ -0,0 +1,96 @@
+import io
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase
+from PIL import Image
+
+from xypher_lux.fragment_cache import CATALOG_SCOPE, category_scope, get_versions
+from xypher_lux.images import build_derivatives, update_product_derivatives
+from xypher_lux.models import Category, Product
+
+
+def store_image(size, mode='RGB', name='products/test/shirt.png'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'red').save(buffer, 'PNG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class BuildDerivativesTests(TestCase):
+    def test_widths_formats_and_reruns(self):
+        name = store_image((1000, 500))
+        manifest = build_derivatives(name)
+        self.assertEqual((manifest['width'], manifest['height']), (1000, 500))
+        # no upscaling past the original, which gets a full-size copy of its own
+        for fmt, extension in (('webp', '.webp'), ('jpeg', '.jpg')):
+            self.assertEqual(list(manifest[fmt]), ['320', '640', '960', '1000'])
+            for width, derivative in manifest[fmt].items():
+                self.assertTrue(derivative.endswith(f".{manifest['hash']}.{width}w{extension}"))
+                with default_storage.open(derivative) as f, Image.open(f) as image:
+                    self.assertEqual(image.width, int(width))
+        # existing files are reused, not written again under new names
+        self.assertEqual(build_derivatives(name), manifest)
+
+    def test_transparent_images_get_jpegs(self):
+        manifest = build_derivatives(store_image((400, 400), mode='RGBA', name='products/test/logo.png'))
+        self.assertEqual(list(manifest['jpeg']), ['320', '400'])
+
+
+class UpdateProductDerivativesTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Shirts', slug='shirts')
+        self.name = store_image((700, 700))
+        self.product = Product.objects.create(
+            category=self.category, name='Shirt', slug='shirt', price=Decimal('20.00'), image=self.name,
+        )
+
+    def versions(self):
+        return get_versions([CATALOG_SCOPE, category_scope(self.category.id)])
+
+    def test_manifest_saved_and_fragments_flushed(self):
+        before = self.versions()
+        update_product_derivatives(self.product.id, self.name)
+        self.product.refresh_from_db()
+        self.assertEqual(list(self.product.image_derivatives['webp']), ['320', '640', '700'])
+        self.assertTrue(all(a != b for a, b in zip(before, self.versions())))
+
+    def test_replaced_image_is_left_alone(self):
+        older = store_image((500, 500), name='products/test/older.png')
+        before = self.versions()
+        # a build for the upload that this product's image has since replaced
+        update_product_derivatives(self.product.id, older)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_derivatives, {})
+        self.assertEqual(self.versions(), before)
+
+
+class ProductImageTagTests(TestCase):
+    template = Template('{% load product_images %}{% product_image product loading="eager" %}')
+
+    def setUp(self):
+        category = Category.objects.create(name='Shirts', slug='shirts')
+        self.product = Product.objects.create(
+            category=category, name='Shirt <b>', slug='shirt', price=Decimal('20.00'), image=store_image((700, 350)),
+        )
+
+    def render(self):
+        return self.template.render(Context({'product': self.product}))
+
+    def test_original_until_derivatives_exist(self):
+        html = self.render()
+        self.assertTrue(html.startswith(f'<img src="{self.product.image.url}"'))
+        self.assertIn('alt="Shirt &lt;b&gt;" loading="eager"', html)
+
+    def test_picture_from_the_manifest(self):
+        self.product.image_derivatives = manifest = build_derivatives(self.product.image.name)
+        html = self.render()
+        webp = ', '.join(f"{default_storage.url(manifest['webp'][w])} {w}w" for w in ('320', '640', '700'))
+        self.assertIn(f'<source type="image/webp" srcset="{webp}"', html)
+        self.assertIn(f'<img src="{default_storage.url(manifest["jpeg"]["700"])}"', html)
+        self.assertIn('width="700" height="350"', html)
+
+    def test_nothing_without_an_image(self):
+        self.product.image = ''
+        self.assertEqual(self.render(), '')
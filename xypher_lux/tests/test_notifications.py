@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from xypher_lux.models import Notification, UserProfile
+
+
+class MarkNotificationsReadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reader', password='x')
+        self.profile = UserProfile.objects.create(user=self.user, first_name='R', last_name='R', email='r@example.com')
+        self.notifications = [
+            Notification.objects.create(user=self.user, title=f'Update {n}', message='...') for n in range(3)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse('xypher_lux:mark_notifications_read')
+
+    def unread(self):
+        self.profile.refresh_from_db()
+        return self.profile.unread_notifications
+
+    def test_marks_the_posted_ids(self):
+        self.assertEqual(self.unread(), 3)
+        response = self.client.post(self.url, {'id': [self.notifications[0].id]})
+        self.assertEqual(response.json()['unread'], 2)
+        self.assertEqual(self.unread(), 2)
+        self.assertTrue(Notification.objects.get(id=self.notifications[0].id).is_read)
+
+    def test_marks_all(self):
+        self.client.post(self.url)
+        self.assertEqual(self.unread(), 0)
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+    def test_get_is_refused(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from xypher_lux.models import Notification, Order, UserProfile
+from xypher_lux.order_status import transition_orders
+
+
+class TransitionOrdersTests(TestCase):
+    def setUp(self):
+        self.ann, self.bob = (User.objects.create_user(name, password='x') for name in ('ann', 'bob'))
+        for user in (self.ann, self.bob):
+            UserProfile.objects.create(
+                user=user, first_name=user.username, last_name='X', email=f'{user.username}@example.com',
+            )
+        # interleaved, so each user's orders land in more than one chunk
+        self.orders = [
+            Order.objects.create(user=user, order_number=f'N{n}')
+            for n, user in enumerate([self.ann, self.bob, self.ann, self.bob, self.ann])
+        ]
+        Order.objects.filter(pk=self.orders[-1].pk).update(status='shipped')
+        Notification.objects.create(user=self.ann, title='Welcome', message='...')
+
+    def unread(self):
+        return dict(UserProfile.objects.values_list('user__username', 'unread_notifications'))
+
+    def test_chunked_transition(self):
+        self.assertEqual(transition_orders(Order.objects.all(), 'shipped', chunk_size=2), 4)
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {'shipped'})
+        shipped = Notification.objects.filter(type='shipped')
+        # one per order that changed; the one already shipped gets none
+        self.assertEqual(sorted(shipped.values_list('order_id', flat=True)), [o.id for o in self.orders[:4]])
+        self.assertEqual(shipped.get(order=self.orders[0]).message, 'Your order N0 is on its way.')
+        self.assertEqual(self.unread(), {'ann': 3, 'bob': 2})
+
+    def test_rerun_changes_nothing(self):
+        transition_orders(Order.objects.all(), 'shipped', chunk_size=2)
+        self.assertEqual(transition_orders(Order.objects.all(), 'shipped', chunk_size=2), 0)
+        self.assertEqual(Notification.objects.filter(type='shipped').count(), 4)
+        self.assertEqual(self.unread(), {'ann': 3, 'bob': 2})
+
+    def test_statuses_without_a_notice_change_silently(self):
+        self.assertEqual(transition_orders(Order.objects.filter(user=self.bob), 'pending'), 0)
+        self.assertEqual(transition_orders(Order.objects.all(), 'pending', chunk_size=2), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(self.unread(), {'ann': 1, 'bob': 0})
+
+    def test_unknown_status_is_refused(self):
+        with self.assertRaises(ValueError):
+            transition_orders(Order.objects.all(), 'lost')
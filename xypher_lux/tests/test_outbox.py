@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase
+from django.utils import timezone
+
+from xypher_lux.models import OutgoingEmail
+from xypher_lux.outbox import RETRY_DELAY, OutboxSender, claim_batch, queue_email
+
+
+class RefusingBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('relay down')
+
+
+def make_due():
+    OutgoingEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.email = queue_email('Reset', 'Your code is 12345.', ['sam@example.com'])
+
+    def test_claimed_rows_are_skipped_until_the_claim_lapses(self):
+        self.assertEqual([e.id for e in claim_batch()], [self.email.id])
+        self.assertEqual(claim_batch(), [])
+        make_due()
+        self.assertEqual(len(claim_batch()), 1)
+
+    def test_sent_rows_are_not_claimed_again(self):
+        with OutboxSender(get_connection('django.core.mail.backends.locmem.EmailBackend')) as sender:
+            self.assertEqual(sender.send_batch().sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), ('sent', 1))
+        make_due()
+        self.assertEqual(claim_batch(), [])
+
+    def test_failed_send_backs_off_then_gives_up(self):
+        sender = OutboxSender(RefusingBackend(), max_attempts=3)
+        for attempt, delay in ((1, RETRY_DELAY), (2, RETRY_DELAY * 2)):
+            before = timezone.now()
+            self.assertEqual(sender.send_batch().retried, 1)
+            self.email.refresh_from_db()
+            self.assertEqual((self.email.status, self.email.attempts), ('pending', attempt))
+            self.assertIn('relay down', self.email.last_error)
+            wait = (self.email.next_attempt_at - before).total_seconds()
+            self.assertTrue(delay <= wait < delay + 5, wait)
+            # not due until the backoff has passed
+            self.assertEqual(claim_batch(), [])
+            make_due()
+
+        with self.assertLogs('xypher_lux.outbox', 'ERROR'):
+            self.assertEqual(sender.send_batch().failed, 1)
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), ('failed', 3))
+        make_due()
+        self.assertEqual(claim_batch(), [])
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import TestCase
+from django.utils import timezone
+
+from xypher_lux.models import Category, OutgoingEmail, Product
+from xypher_lux.pagination import KEYSET_AFTER_PAGE, EstimatedCountPaginator
+
+PER_PAGE = 3
+PAGES = KEYSET_AFTER_PAGE + 4
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Walk past KEYSET_AFTER_PAGE page by page, as the changelist's "next"
+    links do, and compare every page to plain OFFSET pagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # few distinct values, so most pages split runs of ties
+        categories = [Category.objects.create(name=f'Cat {i}', slug=f'cat-{i}') for i in range(3)]
+        Product.objects.bulk_create([
+            Product(category=categories[i % 3], name=f'Jacket {i % 4}', slug=f'jacket-{i}',
+                    price=Decimal(10 + i % 5), stock=i)
+            for i in range(PER_PAGE * PAGES)
+        ])
+        now = timezone.now()
+        OutgoingEmail.objects.bulk_create([
+            OutgoingEmail(subject='s', body='b', from_email='f@example.com', to='t@example.com',
+                          sent_at=None if i % 3 else now - timedelta(minutes=i % 4))
+            for i in range(PER_PAGE * PAGES)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def assertPagesMatchOffset(self, queryset):
+        offset = Paginator(queryset, PER_PAGE)
+        paginator = EstimatedCountPaginator(queryset, PER_PAGE)
+        seen = []
+        for number in range(1, PAGES + 1):
+            page = [obj.pk for obj in EstimatedCountPaginator(queryset, PER_PAGE).page(number)]
+            self.assertEqual(page, [obj.pk for obj in offset.page(number)], f'{queryset.query.order_by} page {number}')
+            seen += page
+        self.assertEqual(sorted(seen), sorted(queryset.values_list('pk', flat=True)))
+        return paginator
+
+    def test_keyset_orderings(self):
+        for ordering in [('name', '-pk'), ('-price', 'name', 'pk'), ('-stock', '-id'), ('-pk',)]:
+            with self.subTest(ordering=ordering):
+                paginator = self.assertPagesMatchOffset(Product.objects.order_by(*ordering))
+                self.assertIsNotNone(paginator._keyset)
+
+    def test_nullable_ordering_falls_back_to_offset(self):
+        for ordering in [('sent_at', '-pk'), ('-sent_at', '-pk')]:
+            with self.subTest(ordering=ordering):
+                paginator = self.assertPagesMatchOffset(OutgoingEmail.objects.order_by(*ordering))
+                self.assertIsNone(paginator._keyset)
+
+    def test_relation_ordering_falls_back_to_offset(self):
+        for ordering in [('category', '-pk'), ('-category', 'name', '-pk'), ('category__name', 'pk')]:
+            with self.subTest(ordering=ordering):
+                paginator = self.assertPagesMatchOffset(Product.objects.order_by(*ordering))
+                self.assertIsNone(paginator._keyset)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TransactionTestCase
+
+from xypher_lux.cart_store import get_or_create_cart
+from xypher_lux.models import CartItem, Category, Product, ProductVariant, UserProfile
+from xypher_lux.testing import assert_query_budget, budgeted_url_names
+
+
+class QueryBudgetTests(TransactionTestCase):
+    """Every view with a @query_budget keeps it, signed in or not, cold or warm.
+
+    A TransactionTestCase: outside a transaction, replica_reads views
+    really read from the replica, as they do in production.
+    """
+
+    def setUp(self):
+        men = Category.objects.create(name='Men', slug='men')
+        shirts = Category.objects.create(name='Shirts', slug='shirts', parent=men)
+        Category.objects.create(name='Women', slug='women')
+        self.products = [
+            Product.objects.create(
+                category=shirts, name=f'Shirt {n}', slug=f'shirt-{n}', price=Decimal(20 + n),
+                stock=10, is_featured=n % 2 == 0,
+            )
+            for n in range(6)
+        ]
+        self.sized = self.products[0]
+        ProductVariant.objects.create(product=self.sized, size='M', stock=4)
+        ProductVariant.objects.create(product=self.sized, size='L', stock=4)
+        self.user = User.objects.create_user('shopper', password='secret')
+        UserProfile.objects.create(user=self.user, first_name='Sam', last_name='Shopper', email='sam@example.com')
+
+    def requests(self, signed_in):
+        """(url name, kwargs, method, data) for each budgeted route"""
+        product = self.products[1]
+        item_id = 1  # the guest line add_to_cart makes
+        if signed_in:
+            item_id = CartItem.objects.create(
+                cart=get_or_create_cart(self.user), product=product, quantity=1,
+            ).id
+        return {
+            'xypher_lux:product_list': ({}, 'get', None),
+            'xypher_lux:product_list_by_category': ({'category_slug': 'shirts'}, 'get', None),
+            'xypher_lux:dashboard': ({}, 'get', None),
+            'xypher_lux:profile': ({}, 'get', None),
+            'xypher_lux:search': ({}, 'get', {'q': 'shirt'}),
+            'xypher_lux:mens_collection': ({}, 'get', None),
+            'xypher_lux:women_collection': ({}, 'get', None),
+            'xypher_lux:catalog_page': ({}, 'get', {'listing': 'men'}),
+            'xypher_lux:api_product_list': ({}, 'get', None),
+            'xypher_lux:api_product_detail': ({'id': self.sized.id}, 'get', None),
+            'xypher_lux:api_category_tree': ({}, 'get', None),
+            'xypher_lux:product_detail': ({'id': self.sized.id, 'slug': self.sized.slug}, 'get', None),
+            'xypher_lux:cart_view': ({}, 'get', None),
+            'xypher_lux:add_to_cart': ({}, 'post', {'product_id': self.sized.id, 'size': 'M'}),
+            'xypher_lux:update_cart_item': ({'item_id': item_id}, 'post', {'quantity': 2}),
+            'xypher_lux:remove_from_cart': ({'item_id': item_id}, 'post', None),
+        }
+
+    def check_budgets(self, signed_in):
+        if signed_in:
+            self.client.force_login(self.user)
+        self.assertEqual(set(self.requests(False)), set(budgeted_url_names()), 'a budgeted route is missing here')
+        for cache in ('cold', 'warm'):
+            requests = self.requests(signed_in)
+            for url_name in budgeted_url_names():
+                kwargs, method, data = requests[url_name]
+                if cache == 'cold':
+                    for alias in caches:
+                        caches[alias].clear()
+                with self.subTest(url_name, signed_in=signed_in, cache=cache):
+                    response = assert_query_budget(self.client, url_name, kwargs=kwargs, method=method, data=data)
+                    self.assertLess(response.status_code, 500)
+
+    def test_anonymous(self):
+        self.check_budgets(signed_in=False)
+
+    def test_signed_in(self):
+        self.check_budgets(signed_in=True)
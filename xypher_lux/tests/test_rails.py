@@ -0,0 +1,97 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from xypher_lux import rails
+from xypher_lux.fragment_cache import CACHE_ALIAS
+from xypher_lux.models import Category, Product, ProductVariant
+
+
+class RailVersionTests(TestCase):
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.products = [
+            Product.objects.create(
+                category=category, name=f'Jacket {n}', slug=f'jacket-{n}', price=Decimal(50 + n),
+                stock=5, is_featured=True,
+            )
+            for n in range(3)
+        ]
+        self.product = self.products[0]
+
+    def warm(self):
+        return rails.rail_ids(rails.similar_rail(self.product), rails.featured_rail())
+
+    def assertRailsCached(self):
+        with self.assertNumQueries(0):
+            self.warm()
+
+    def assertRailsRebuilt(self):
+        with self.assertNumQueries(3):  # similar above/below + featured
+            self.warm()
+
+    def test_stock_changes_keep_the_rails(self):
+        self.warm()
+        self.product.stock = 0
+        self.product.save()
+        ProductVariant.objects.create(product=self.products[1], size='M', stock=2)
+        self.assertRailsCached()
+
+    def test_price_change_rebuilds_the_rails(self):
+        self.warm()
+        self.product.price = Decimal('10.00')
+        self.product.save()
+        self.assertRailsRebuilt()
+
+    def test_unfeaturing_rebuilds_the_rails(self):
+        self.warm()
+        self.products[2].is_featured = False
+        self.products[2].save()
+        self.assertRailsRebuilt()
+        self.assertNotIn(self.products[2].id, self.warm()[1])
+
+
+class CachedRailFragmentTests(TestCase):
+    """Rails are read only when a fragment showing them has to be rendered"""
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.products = [
+            Product.objects.create(
+                category=category, name=f'Jacket {n}', slug=f'jacket-{n}', price=Decimal(50 + n),
+                stock=5, is_featured=True,
+            )
+            for n in range(3)
+        ]
+
+    def calls_per_request(self, url, read):
+        with mock.patch.object(rails, read, wraps=getattr(rails, read)) as spy:
+            calls = []
+            for _ in range(2):
+                self.assertEqual(self.client.get(url).status_code, 200)
+                calls.append(spy.call_count - sum(calls))
+        return calls
+
+    def test_detail_page_reads_rails_on_a_miss_only(self):
+        product = self.products[0]
+        self.assertEqual(self.calls_per_request(product.get_absolute_url(), 'detail_rails'), [1, 0])
+
+    def test_list_page_reads_featured_on_a_miss_only(self):
+        url = reverse('xypher_lux:product_list')
+        self.assertEqual(self.calls_per_request(url, 'featured_products'), [1, 0])
+
+    def test_recommendations_are_drawn_per_request(self):
+        Product.objects.update(is_featured=False)
+        url = reverse('xypher_lux:product_list')
+        draws = [[self.products[1]], [self.products[2]]]
+        with mock.patch('xypher_lux.views.recommended_products', side_effect=draws):
+            first, second = (self.client.get(url).content.decode() for _ in draws)
+        self.assertIn('Jacket 1', first)
+        self.assertNotIn('Jacket 2', first)
+        self.assertIn('Jacket 2', second)
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import resolve, reverse
+
+from xypher_lux import ratelimit
+from xypher_lux.models import PasswordResetCode
+from xypher_lux.ratelimit import RateLimitMiddleware, rate_limit
+
+
+@rate_limit('3/m', key='ip')
+@rate_limit('2/m', key='post:username')
+def login(request):
+    return HttpResponse('ok')
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        caches[ratelimit.CACHE_ALIAS].clear()
+        self.factory = RequestFactory()
+
+    def post(self, view, username, ip='10.0.0.1'):
+        return view(self.factory.post('/', {'username': username}, REMOTE_ADDR=ip))
+
+    def test_429_with_retry_after_past_the_rate(self):
+        view = rate_limit('2/m')(lambda request: HttpResponse('ok'))
+        self.assertEqual([self.post(view, 'a').status_code for _ in range(2)], [200, 200])
+        response = self.post(view, 'a')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 61)
+        # other addresses have their own count
+        self.assertEqual(self.post(view, 'a', ip='10.0.0.2').status_code, 200)
+
+    def test_stacked_limits_count_each_key(self):
+        self.assertEqual(len(login.rate_limits), 2)
+        self.assertEqual([self.post(login, 'alice').status_code for _ in range(2)], [200, 200])
+        # the account is locked out from any address...
+        self.assertEqual(self.post(login, 'Alice', ip='10.0.0.9').status_code, 429)
+        # ...while the first address still has room for another account
+        self.assertEqual(self.post(login, 'bob').status_code, 200)
+        self.assertEqual(self.post(login, 'carol').status_code, 429)
+
+    def test_middleware_applies_settings_limits(self):
+        view_name = 'xypher_lux:search'
+        with mock.patch.object(ratelimit, 'VIEW_LIMITS', {view_name: [('ip', '1/m', ['GET'])]}):
+            middleware = RateLimitMiddleware(lambda request: HttpResponse('ok'))
+
+        def get():
+            request = self.factory.get(reverse(view_name), REMOTE_ADDR='10.0.0.1')
+            request.resolver_match = match = resolve(request.path)
+            return middleware.process_view(request, match.func, match.args, match.kwargs)
+
+        self.assertIsNone(get())
+        self.assertEqual(get().status_code, 429)
+
+
+class VerifyCodeLimitTests(TestCase):
+    def setUp(self):
+        caches[ratelimit.CACHE_ALIAS].clear()
+        User.objects.create_user('sam', email='sam@example.com', password='x')
+        self.client.post(reverse('xypher_lux:forgot_password'), {'email': 'sam@example.com'})
+        self.code = PasswordResetCode.objects.get().code
+
+    def verify(self, code, ip):
+        return self.client.post(reverse('xypher_lux:verify_code'), {'code': code}, REMOTE_ADDR=ip)
+
+    def test_guesses_are_limited_per_email_across_addresses(self):
+        wrong = '00000' if self.code != '00000' else '11111'
+        for n in range(5):
+            self.assertEqual(self.verify(wrong, ip=f'10.0.0.{n}').status_code, 400)
+        self.assertEqual(self.verify(self.code, ip='10.0.1.1').status_code, 429)
+
+    def test_code_for_the_remembered_email_verifies(self):
+        response = self.verify(self.code, ip='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session['reset_user_id'], User.objects.get().id)
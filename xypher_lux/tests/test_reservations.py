@@ -0,0 +1,131 @@
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from xypher_lux import reservations
+from xypher_lux.cart_store import GUEST_CART_COOKIE, GuestCartStore, get_or_create_cart, merge_guest_cart
+from xypher_lux.models import CartItem, Category, Product, StockReservation
+from xypher_lux.reservations import StockUnavailable, cart_holder, guest_holder
+
+
+def make_product(stock):
+    category = Category.objects.create(name='Jackets', slug='jackets')
+    return Product.objects.create(
+        category=category, name='Parka', slug='parka', price=Decimal('90.00'), stock=stock,
+    )
+
+
+class HoldTests(TestCase):
+    def setUp(self):
+        self.product = make_product(stock=3)
+
+    def test_holds_of_others_count_against_stock(self):
+        reservations.hold('cart:1', self.product, None, 2)
+        with self.assertRaises(StockUnavailable) as raised:
+            reservations.hold('cart:2', self.product, None, 2)
+        self.assertEqual(raised.exception.available, 1)
+        self.assertFalse(StockReservation.objects.filter(holder='cart:2').exists())
+        reservations.hold('cart:2', self.product, None, 1)
+
+    def test_rehold_replaces_the_line(self):
+        reservations.hold('cart:1', self.product, None, 2)
+        reservations.hold('cart:1', self.product, None, 3)
+        self.assertEqual(StockReservation.objects.get(holder='cart:1').quantity, 3)
+
+    def test_failed_rehold_keeps_the_previous_hold(self):
+        reservations.hold('cart:1', self.product, None, 1)
+        reservations.hold('cart:2', self.product, None, 2)
+        with self.assertRaises(StockUnavailable):
+            reservations.hold('cart:1', self.product, None, 2)
+        self.assertEqual(StockReservation.objects.get(holder='cart:1').quantity, 1)
+
+    def test_expired_holds_count_for_nothing(self):
+        reservations.hold('cart:1', self.product, None, 3)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        reservations.hold('cart:2', self.product, None, 3)
+        self.assertEqual(reservations.sweep_expired(), 1)
+        self.assertEqual(list(StockReservation.objects.values_list('holder', flat=True)), ['cart:2'])
+
+
+class MergeGuestCartTests(TestCase):
+    def setUp(self):
+        self.product = make_product(stock=3)
+        self.user = User.objects.create_user('buyer', password='x')
+
+    def guest_request(self, quantity):
+        store = GuestCartStore(RequestFactory().get('/'))
+        store.add(self.product, None, quantity)
+        response = HttpResponse()
+        store.persist(response)
+        request = RequestFactory().get('/')
+        request.COOKIES[GUEST_CART_COOKIE] = response.cookies[GUEST_CART_COOKIE].value
+        return request, store.token
+
+    def test_merge_is_capped_by_holds_of_others(self):
+        reservations.hold('cart:other', self.product, None, 1)
+        request, token = self.guest_request(2)
+        # already in the user's cart, its hold long gone
+        CartItem.objects.create(cart=get_or_create_cart(self.user), product=self.product, quantity=1)
+
+        self.assertEqual(merge_guest_cart(request, self.user), 1)
+        self.assertEqual(self.user.cart.items.get().quantity, 2)
+        # the guest's hold moved over to the user's cart
+        self.assertFalse(StockReservation.objects.filter(holder=guest_holder(token)).exists())
+        self.assertEqual(StockReservation.objects.get(holder=cart_holder(self.user.cart)).quantity, 2)
+
+    def test_merge_never_holds_more_than_is_unreserved(self):
+        request, _ = self.guest_request(2)
+        # the guest's hold has lapsed and someone else took two of the three
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        reservations.hold('cart:other', self.product, None, 2)
+
+        merge_guest_cart(request, self.user)
+        self.assertEqual(self.user.cart.items.get().quantity, 1)
+        live = StockReservation.objects.filter(expires_at__gt=timezone.now())
+        self.assertEqual(sum(live.values_list('quantity', flat=True)), 3)
+
+
+class ConcurrentHoldTests(TransactionTestCase):
+    def race(self, atomic):
+        product = make_product(stock=1)
+        barrier = threading.Barrier(2)
+        outcomes = []
+
+        def buyer(holder):
+            try:
+                barrier.wait()
+                if atomic:
+                    with transaction.atomic():
+                        reservations.hold(holder, product, None, 1)
+                else:
+                    reservations.hold(holder, product, None, 1)
+                outcomes.append(True)
+            except StockUnavailable:
+                outcomes.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer, args=(f'cart:{n}',)) for n in (1, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(StockReservation.objects.count(), outcomes.count(True))
+        return product, sorted(outcomes)
+
+    def test_last_unit_is_held_at_most_once(self):
+        product, outcomes = self.race(atomic=False)
+        # unlocked holds that land together both see each other and may
+        # both back out; either way the unit is never held twice, nor lost
+        self.assertIn(outcomes, ([False, True], [False, False]))
+        if outcomes == [False, False]:
+            reservations.hold('cart:3', product, None, 1)
+
+    def test_last_unit_is_held_once_inside_transactions(self):
+        self.assertEqual(self.race(atomic=True)[1], [False, True])
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from xypher_lux.models import Category, DailyCategorySales, DailyProductSales, Order, OrderItem, Product
+from xypher_lux.sales_rollups import update_rollups
+
+
+class UpdateRollupsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.parka = Product.objects.create(category=category, name='Parka', slug='parka', price=Decimal('90.00'))
+        user = User.objects.create_user('buyer', password='x')
+        self.orders = [Order.objects.create(user=user, order_number=f'N{n}') for n in range(2)]
+        for order in self.orders:
+            OrderItem.objects.create(
+                order=order, product=self.parka, product_name='Parka', quantity=2, price=Decimal('90.00'),
+            )
+        # placed two days ago and untouched since, well before any run's safety lag
+        placed = timezone.now() - timedelta(days=2)
+        Order.objects.update(created_at=placed, updated_at=placed)
+        self.day = timezone.localdate(placed)
+        update_rollups()
+
+    def units(self):
+        return (
+            list(DailyProductSales.objects.filter(date=self.day).values_list('orders', 'units', 'revenue')),
+            list(DailyCategorySales.objects.filter(date=self.day).values_list('orders', 'units', 'revenue')),
+        )
+
+    def test_full_first_run(self):
+        self.assertEqual(self.units(), ([(2, 4, Decimal('360.00'))], [(2, 4, Decimal('360.00'))]))
+
+    def test_rerun_without_changes_recounts_nothing(self):
+        stats = update_rollups()
+        self.assertEqual((stats.changed_orders, stats.days), (0, 0))
+        self.assertEqual(self.units()[0], [(2, 4, Decimal('360.00'))])
+
+    def test_cancellation_drops_its_units(self):
+        cancelled = Order.objects.get(pk=self.orders[0].pk)
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        stats = update_rollups()
+        self.assertEqual((stats.changed_orders, stats.days), (1, 1))
+        self.assertEqual(self.units(), ([(1, 2, Decimal('180.00'))], [(1, 2, Decimal('180.00'))]))
+
+    def test_since_drops_deleted_orders(self):
+        Order.objects.all().delete()
+        # a deleted order bumps nothing, so an incremental run misses it
+        self.assertEqual(update_rollups().days, 0)
+        self.assertEqual(len(self.units()[0]), 1)
+
+        out = StringIO()
+        call_command('update_sales_rollups', since=self.day.isoformat(), stdout=out)
+        self.assertIn('Recounted 3 day(s)', out.getvalue())
+        self.assertEqual(self.units(), ([], []))
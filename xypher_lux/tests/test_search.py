@@ -0,0 +1,39 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from xypher_lux.models import Category, Product
+from xypher_lux.search import get_backend, search_products
+
+
+class SearchIndexTests(TestCase):
+    """migrate created the index, so these run inside test transactions"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.parkas = [
+            Product.objects.create(
+                category=category, name=f'Parka {n}', slug=f'parka-{n}', price=Decimal('90.00'), stock=1,
+            )
+            for n in range(3)
+        ]
+        get_backend().index_products(self.parkas)
+
+    def found(self):
+        return [p.id for p in search_products('parka').products]
+
+    def test_search_runs_no_ddl(self):
+        with self.assertNumQueries(4):  # ranked ids, hit count, products, variants
+            self.assertEqual(len(self.found()), 3)
+
+    def test_rebuild_prunes_rows_the_signals_missed(self):
+        stale, gone, kept = self.parkas
+        Product.objects.filter(pk=stale.pk).update(is_active=False)
+        # deleted behind the ORM's back: no post_delete, the index row stays
+        Product.objects.filter(pk=gone.pk)._raw_delete(Product.objects.db)
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 1 products and pruned 2', out.getvalue())
+        self.assertEqual(get_backend().search('parka').ids, [kept.id])
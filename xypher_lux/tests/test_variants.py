@@ -0,0 +1,92 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase
+
+from xypher_lux import rails
+from xypher_lux.models import Category, Product, ProductVariant
+
+
+class BackfillProductVariantsTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Jackets', slug='jackets')
+
+    def test_duplicate_options_keep_all_stock(self):
+        product = Product.objects.create(
+            category=self.category, name='Parka', slug='parka', price=Decimal('90.00'), stock=9,
+            available_sizes='M, L, M', available_colors='Black,black , Black',
+        )
+        out = StringIO()
+        call_command('backfill_product_variants', stdout=out)
+
+        variants = {(v.size, v.color): v.stock for v in product.variants.all()}
+        self.assertEqual(set(variants), {('M', 'Black'), ('M', 'black'), ('L', 'Black'), ('L', 'black')})
+        self.assertEqual(sum(variants.values()), 9)
+        self.assertIn('Created 4 variants', out.getvalue())
+
+    def test_rerun_creates_nothing(self):
+        Product.objects.create(
+            category=self.category, name='Parka', slug='parka', price=Decimal('90.00'), stock=4,
+            available_sizes='M,L',
+        )
+        call_command('backfill_product_variants', stdout=StringIO())
+        out = StringIO()
+        call_command('backfill_product_variants', stdout=out)
+        self.assertIn('Created 0 variants', out.getvalue())
+        self.assertEqual(ProductVariant.objects.count(), 2)
+
+
+class ProductAdminStockTests(TestCase):
+    def test_stock_is_read_only_for_products_with_variants(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        plain = Product.objects.create(category=category, name='Scarf', slug='scarf', price=Decimal('10.00'))
+        sized = Product.objects.create(category=category, name='Parka', slug='parka', price=Decimal('90.00'))
+        ProductVariant.objects.create(product=sized, size='M', stock=3)
+
+        model_admin = site._registry[Product]
+        request = RequestFactory().get('/')
+        self.assertNotIn('stock', model_admin.list_editable)
+        self.assertNotIn('stock', model_admin.get_readonly_fields(request, plain))
+        self.assertIn('stock', model_admin.get_readonly_fields(request, sized))
+
+
+class VariantFilterTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.parka = Product.objects.create(category=category, name='Parka', slug='parka', price=Decimal('90.00'))
+        self.mac = Product.objects.create(category=category, name='Mac', slug='mac', price=Decimal('70.00'))
+        for size, color in (('M', 'Black'), ('M', 'Navy'), ('L', 'Black')):
+            ProductVariant.objects.create(product=self.parka, size=size, color=color, stock=1)
+        ProductVariant.objects.create(product=self.mac, size='S', color='Navy', stock=1)
+
+    def test_each_product_listed_once(self):
+        self.assertEqual(list(Product.objects.in_size('M')), [self.parka])
+        self.assertEqual(list(Product.objects.in_color('Navy')), [self.mac, self.parka])
+        self.assertEqual(list(Product.objects.in_size('M').in_color('Navy')), [self.parka])
+        self.assertFalse(Product.objects.in_size('XL').exists())
+
+
+class QuickAddTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Jackets', slug='jackets')
+        self.plain = Product.objects.create(
+            category=category, name='Scarf', slug='scarf', price=Decimal('10.00'), stock=2,
+        )
+        self.sized = Product.objects.create(category=category, name='Parka', slug='parka', price=Decimal('90.00'))
+        ProductVariant.objects.create(product=self.sized, size='M', stock=3)
+
+    def test_flag_needs_no_query_per_product(self):
+        with self.assertNumQueries(1):
+            products, = rails.hydrate([self.plain.id, self.sized.id])
+            self.assertEqual([p.has_variants for p in products], [False, True])
+
+    def test_products_with_variants_link_to_their_page(self):
+        html = render_to_string('xypher_lux/partials/product_cards.html', {
+            'products': Product.objects.with_variants().order_by('id'),
+        })
+        self.assertIn(f'addToCart({self.plain.id})', html)
+        self.assertNotIn(f'addToCart({self.sized.id})', html)
+        self.assertIn(f'class="add-to-cart-btn" href="{self.sized.get_absolute_url()}"', html)
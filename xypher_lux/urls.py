@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, api
 from django.conf.urls.static import static
 from django.conf import settings 
 
@@ -19,11 +19,19 @@ urlpatterns = [
     path('profile?update/', views.update_profile_view, name='update_profile'),
     path('profile?password_change/', views.update_password_view, name='update_password'),
     path('profile?delete_account/', views.delete_account_view, name='delete_account'),
+    path('notifications/read/', views.mark_notifications_read_view, name='mark_notifications_read'),
     path('search/', views.search_view, name='search'),
     path("mens/", views.mens_collection_view, name="mens_collection"),
     path("women/", views.women_collection_view, name="women_collection"),
+    path('catalog/page/', views.catalog_page_view, name='catalog_page'),
+    path('catalog/cache-stats/', views.catalog_cache_stats_view, name='catalog_cache_stats'),
+    path('ratelimit/stats/', views.ratelimit_stats_view, name='ratelimit_stats'),
+
+    # Read-only catalog API
+    path('api/products/', api.product_list_api, name='api_product_list'),
+    path('api/products/<int:id>/', api.product_detail_api, name='api_product_detail'),
+    path('api/categories/', api.category_tree_api, name='api_category_tree'),
     path('<int:id>/<slug:slug>/', views.product_detail_view, name='product_detail'),
-    path('<slug:category_slug>/', views.product_list, name='product_list_by_category'),
     
 
     # individual category views
@@ -43,5 +51,8 @@ urlpatterns = [
     # Order History URLs
     path('orders/', views.order_history_view, name='order_history'),
     path('orders/<int:order_id>/', views.order_detail_view, name='order_detail'),
+
+    # category catch-all last, so it doesn't shadow cart/, checkout/ or orders/
+    path('<slug:category_slug>/', views.product_list, name='product_list_by_category'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
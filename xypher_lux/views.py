@@ -1,16 +1,35 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404, aget_object_or_404
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from .forms import UserRegistrationForm, SetPasswordForm, AddToCartForm, UpdateCartItemForm, CheckoutForm
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from .models import Category, Product, UserProfile, PasswordResetCode, Cart, CartItem, Product, Order, OrderItem,  Notification, WishlistItem, ShippingAddress
+from .recommendations import recommended_products
+from . import rails
+from .search import search_products
+from .pagination import KeysetPaginator, InvalidCursor, acached_count
+from .checkout import place_order, EmptyCart, InsufficientStock
+from .category_tree import category_tree, categories_named
+from .fragment_cache import CATALOG_SCOPE, get_or_render
+from .middleware import query_budget, timed_render, timing_templates
+from .notifications import mark_read
+from .outbox import queue_email
+from .cart_store import CartError, get_cart_store, get_or_create_cart
+from .concurrency import arender
+from .db_router import replica_reads
+from .ratelimit import rate_limit
+from . import fragment_cache, ratelimit
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 from django.conf import settings
 from django.db.models import Q
 from datetime import timedelta
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.urls import reverse
+from django.template.loader import render_to_string
+from urllib.parse import urlencode
 import random
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
@@ -21,6 +40,19 @@ import uuid
 import logging
 
 logger = logging.getLogger(__name__)
+
+PROFILE_ORDERS = getattr(settings, 'PROFILE_ORDERS', 10)  # latest orders shown on the profile page
+# throttles checked before any session, database or password hashing work
+LOGIN_IP_RATE = getattr(settings, 'LOGIN_IP_RATE', '20/m')
+LOGIN_ACCOUNT_RATE = getattr(settings, 'LOGIN_ACCOUNT_RATE', '5/5m')
+PASSWORD_RESET_IP_RATE = getattr(settings, 'PASSWORD_RESET_IP_RATE', '10/h')
+PASSWORD_RESET_ACCOUNT_RATE = getattr(settings, 'PASSWORD_RESET_ACCOUNT_RATE', '3/h')
+# reset codes are five digits: keep guessing them impractical, from one
+# address or spread over many
+VERIFY_CODE_IP_RATE = getattr(settings, 'VERIFY_CODE_IP_RATE', '10/10m')
+VERIFY_CODE_ACCOUNT_RATE = getattr(settings, 'VERIFY_CODE_ACCOUNT_RATE', '5/10m')
+CART_SESSION_RATE = getattr(settings, 'CART_SESSION_RATE', '60/m')
+CART_IP_RATE = getattr(settings, 'CART_IP_RATE', '300/m')
 # Create your views here.
 
 @require_http_methods(["POST", "GET"])
@@ -71,8 +103,10 @@ def signup_view(request):
                 'errors': errors
             }, status=400)
     
-    return render(request, 'xypher_lux/product/list.html')
+    return timed_render(request, 'xypher_lux/product/list.html')
 
+@rate_limit(LOGIN_IP_RATE, key='ip')
+@rate_limit(LOGIN_ACCOUNT_RATE, key='post:username')
 def login_view(request):
     # If user is already authenticated, redirect to home
     if request.user.is_authenticated:
@@ -100,6 +134,8 @@ def login_view(request):
             # GET request — render the login page
     return redirect('xypher_lux:product_list')  # ✅ double-check this template path
 
+@rate_limit(PASSWORD_RESET_IP_RATE, key='ip')
+@rate_limit(PASSWORD_RESET_ACCOUNT_RATE, key='post:email')
 def forgot_password_view(request):
     if request.method == "POST":
         email = request.POST.get("email")
@@ -115,13 +151,15 @@ def forgot_password_view(request):
 
             code = str(random.randint(10000, 99999))
             PasswordResetCode.objects.create(user=user, code=code)
+            # the verify form only posts the code
+            request.session["reset_email"] = email
 
-            send_mail(
+            # delivered by the send_outbox worker, so a slow mail relay
+            # can't hold up the request
+            queue_email(
                 "Password Reset Code",
                 f"Your password reset code is {code}.\nPlease do not share it with anyone.",
-                settings.DEFAULT_FROM_EMAIL,
                 [email],
-                fail_silently=False,
             )
             
             # Success: Return JSON success response
@@ -132,13 +170,24 @@ def forgot_password_view(request):
             return JsonResponse({'message': "Email address does not exist."}, status=400)
 
     # For GET requests, render the page
-    return render(request, "xypher_lux/product/list.html")
+    return timed_render(request, "xypher_lux/product/list.html")
+
+def _reset_email(request):
+    """The address a reset code was sent to: posted, or remembered by forgot_password_view.
+
+    Also the rate limit key of verify_code_view, where it loads the session.
+    """
+    email = request.POST.get("email") or request.session.get("reset_email", "")
+    return email.strip().lower() or None
 
+
+@rate_limit(VERIFY_CODE_IP_RATE, key='ip')
+@rate_limit(VERIFY_CODE_ACCOUNT_RATE, key=_reset_email)
 def verify_code_view(request):
     if request.method == "POST":
         code = request.POST.get("code")
         try:
-            password_reset_code = PasswordResetCode.objects.get(user=user, code=code)
+            password_reset_code = PasswordResetCode.objects.get(user__email__iexact=_reset_email(request), code=code)
             
             if (timezone.now() - password_reset_code.created_at) > timedelta(minutes=10):
                 password_reset_code.delete()
@@ -156,7 +205,7 @@ def verify_code_view(request):
             return JsonResponse({'message': "Invalid code, please try again."}, status=400)
 
     # For GET requests, render the page
-    return render(request, "xypher_lux/product/list.html")
+    return timed_render(request, "xypher_lux/product/list.html")
 
 def set_new_password_view(request):
     user_id = request.session.get("reset_user_id")
@@ -185,41 +234,33 @@ def set_new_password_view(request):
             return JsonResponse({'message': 'Please correct the errors.', 'errors': errors}, status=400)
     
     # For GET requests, render the page
-    return render(request, 'xypher_lux/product/list.html')
+    return timed_render(request, 'xypher_lux/product/list.html')
 
+@query_budget(15)
 @login_required(login_url="xypher_lux:login")
 def dashboard_view(request, category_slug=None):
     user = request.user
 
     category = None
-    categories = Category.objects.all()
+    categories = category_tree()
     products = Product.objects.filter(is_active=True)
     cart = Cart.objects.filter(user=user, is_active=True).first()
     
-    featured_products = Product.objects.filter(
-        is_featured=True,
-        is_active=True
-    )[:4]
+    featured_products = rails.featured_products(k=4)
 
     if category_slug:
         category = get_object_or_404(Category, slug=category_slug)
         products = products.filter(category=category)
 
-    all_products = list(
-        Product.objects.filter(
-            is_active=True
-        ).values_list('id', flat=True)
-    )
-    random_ids = random.sample(all_products, min(4, len(all_products)))
-    recommended_products = Product.objects.filter(id__in=random_ids)
+    recommended = recommended_products(k=4)
 
-    return render(request, "xypher_lux/dashboard.html", {
+    return timed_render(request, "xypher_lux/dashboard.html", {
         "user": user,
         "category": category,
         "categories": categories,
         "products": products,
         "featured_products": featured_products,
-        "recommended_products": recommended_products,
+        "recommended_products": recommended,
     })
 
 
@@ -228,21 +269,38 @@ def logout_view(request):
     messages.success(request, 'You have been successfully logged out.')
     return redirect('xypher_lux:product_list')
 
+@query_budget(8)
 @login_required(login_url="xypher_lux:login")
 def profile_view(request):
 
     user = request.user
     profile = user.userprofile # assumes a OneToOne User profile model
 
+    # one query for the latest orders with their summaries; one extra row
+    # tells whether to link to the full history
+    orders = list(Order.objects.filter(user=user).with_summary().order_by('-created_at')[:PROFILE_ORDERS + 1])
+
     context = {
         'profile': profile,
-        'orders': Order.objects.filter(user=user).order_by('created_at'),
+        'orders': orders[:PROFILE_ORDERS],
+        'has_more_orders': len(orders) > PROFILE_ORDERS,
         'notifications': Notification.objects.filter(user=user).order_by('-created_at')[:5],  # latest 5 notifications
-        'wishlist': WishlistItem.objects.filter(user=user).order_by('-added_at')[:10],  # latest 10 wishlist items
-        "unread_notifications_count": Notification.objects.filter(user=user, is_read=False).count(),
+        'wishlist': WishlistItem.objects.filter(user=user).select_related('product').order_by('-added_at')[:10],  # latest 10 wishlist items
+        "unread_notifications_count": profile.unread_notifications,
         "shipping_addresses": ShippingAddress.objects.filter(user=user).order_by('-created_at')[:5],  # latest 5 addresses
     }
-    return render(request, 'xypher_lux/profile.html', context)
+    return timed_render(request, 'xypher_lux/profile.html', context)
+
+@require_POST
+@login_required(login_url="xypher_lux:login")
+def mark_notifications_read_view(request):
+    """Mark the user's notifications read: the posted `id`s, or all of them"""
+    ids = request.POST.getlist('id') or None
+    updated = mark_read(request.user, ids)
+    return JsonResponse({
+        "message": f"{updated} notification{'s' if updated != 1 else ''} marked as read.",
+        "unread": UserProfile.objects.filter(user=request.user).values_list('unread_notifications', flat=True).first() or 0,
+    })
 
 @login_required(login_url="xypher_lux:login")
 def update_profile_view(request):
@@ -297,145 +355,200 @@ def delete_account_view(request):
     "redirect_url": reverse("xypher_lux:product_list")
     })
 
-def product_list(request, category_slug=None):
-    category = None
-    categories = Category.objects.all()
-    products = Product.objects.filter(is_active=True)
+# ordering of each paginated catalog grid; the last key must be unique
+CATALOG_LISTINGS = {
+    'all': ('name', 'id'),
+    'men': ('-created_at', '-id'),
+    'women': ('created_at', 'id'),
+}
 
-    featured_products = Product.objects.filter(
-        is_featured=True,
-        is_active=True
-    )[:4]
-    
+
+def _catalog_products(listing, category_slug=None):
+    products = Product.objects.filter(is_active=True).select_related('category').with_variants()
+    if listing != 'all':
+        products = products.filter(category__name__iexact=listing)
     if category_slug:
-        category = get_object_or_404(Category, slug=category_slug)
-        products = products.filter(category=category)
+        products = products.filter(category__slug=category_slug)
+    return products
 
-    # Randomly recommend products 
-    all_products = list(
-        Product.objects.filter(
-            is_active=True
-        ).values_list('id', flat=True)
-    )
-    random_ids = random.sample(all_products, min(4, len(all_products)))
-    recommended_products = Product.objects.filter(id__in=random_ids)
-    
-    return render(request, 'xypher_lux/product/list.html', {
+
+def _catalog_page(request, listing, category_slug=None, strict=False):
+    """Return (page, next_page_url, products) for a catalog grid"""
+    products = _catalog_products(listing, category_slug)
+    paginator = KeysetPaginator(products, CATALOG_LISTINGS[listing])
+
+    def cached_page(cursor):
+        return get_or_render(
+            'catalog_page', [CATALOG_SCOPE], lambda: paginator.page(cursor),
+            vary_on=(listing, category_slug, cursor),
+        )
+
+    try:
+        page = cached_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        if strict:
+            raise
+        # a stale or tampered cursor just restarts the listing
+        page = cached_page(None)
+
+    next_page_url = None
+    if page.has_next:
+        params = {'listing': listing, 'cursor': page.next_cursor}
+        if category_slug:
+            params['category'] = category_slug
+        next_page_url = f"{reverse('xypher_lux:catalog_page')}?{urlencode(params)}"
+    return page, next_page_url, products
+
+
+@query_budget(16)
+@replica_reads
+async def product_list(request, category_slug=None):
+    # list.html shows rails only, so no product page or total is read here
+    category = await aget_object_or_404(Category, slug=category_slug) if category_slug else None
+    categories = await sync_to_async(category_tree)()
+
+    return await arender(request, 'xypher_lux/product/list.html', {
         'category': category,
         'categories': categories,
-        'products': products,
-        "featured_products": featured_products,
-        "recommended_products": recommended_products,
+        # read while rendering, and only if the fragment showing them isn't cached
+        "featured_products": SimpleLazyObject(lambda: rails.featured_products(k=4)),
+        # Randomly recommend products, a fresh draw for every visitor
+        "recommended_products": SimpleLazyObject(lambda: list(recommended_products(k=4))),
     })
 
-def mens_collection_view(request):
-    mens_categories = Category.objects.filter(name__iexact="men")
-    products = Product.objects.filter(
-        category__in=mens_categories,
-        is_active=True
-    ).select_related('category').order_by('-created_at')
-
-    featured = Product.objects.filter(
-        category__in=mens_categories,
-        is_active=True,
-        is_featured=True
-    )[:4] # show maximum 4 featured products
-
+@query_budget(6)
+@replica_reads
+async def mens_collection_view(request):
     selected_category = request.GET.get('category')
-    if selected_category:
-        products = products.filter(category__slug=selected_category)
-
-    return render(request, 'xypher_lux/men.html', {
-        'products': products,
+    # the featured rail needs the categories, so the (cached) tree comes first
+    mens_categories = await sync_to_async(categories_named)("men")
+    # show maximum 4 featured products
+    featured = await sync_to_async(rails.featured_products)([c.id for c in mens_categories], k=4)
+    page, next_page_url, products = await sync_to_async(_catalog_page)(request, 'men', selected_category)
+    total = await acached_count(products)
+
+    return await arender(request, 'xypher_lux/men.html', {
+        'products': page.object_list,
+        'next_page_url': next_page_url,
         'mens_categories': mens_categories,
         'selected_category': selected_category,
-        'total': products.count(),
+        'total': total,
         'featured': featured,
     })
 
-def women_collection_view(request):
-    women_categories = Category.objects.filter(name__iexact="women")
-    products = Product.objects.filter(
-        category__in=women_categories,
-        is_active=True
-    ).select_related("category").order_by("created_at")
-
-    featured_products = Product.objects.filter(
-        is_featured=True,
-        is_active=True
-    )[:4]
-
+@query_budget(6)
+@replica_reads
+async def women_collection_view(request):
     selected_category = request.GET.get("category")
-    if selected_category:
-        products = products.filter(category__slug=selected_category)
+    women_categories = await sync_to_async(categories_named)("women")
+    page, next_page_url, products = await sync_to_async(_catalog_page)(request, "women", selected_category)
+    total = await acached_count(products)
 
-    return render(request, "xypher_lux/women.html", {
-        "products": products,
+    return await arender(request, "xypher_lux/women.html", {
+        "products": page.object_list,
+        "next_page_url": next_page_url,
         "women_categories": women_categories,
         "selected_category": selected_category,
-        "total": products.count(),
+        "total": total,
     })
-    
 
-def search_view(request):
-    query = request.GET.get('q', '')
-    products = Product.objects.none()
 
-    if query:
-        products = Product.objects.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(category__name__icontains=query),
-            is_active= True
-        ).select_related('category').distinct()
+@query_budget(2)
+@replica_reads
+@require_http_methods(["GET"])
+def catalog_page_view(request):
+    """Next page of a catalog grid as rendered cards (infinite scroll)"""
+    listing = request.GET.get('listing', 'all')
+    if listing not in CATALOG_LISTINGS:
+        return JsonResponse({'message': 'Unknown listing.'}, status=400)
 
-    return render(request, 'xypher_lux/search.html', {
-        'query': query,
-        'products': products,
-        'total': products.count(),
+    try:
+        page, next_page_url, _ = _catalog_page(request, listing, request.GET.get('category'), strict=True)
+    except InvalidCursor:
+        return JsonResponse({'message': 'Invalid page cursor.'}, status=400)
+
+    with timing_templates():
+        html = render_to_string('xypher_lux/partials/product_cards.html', {'products': page.object_list}, request=request)
+    return JsonResponse({
+        'html': html,
+        'has_next': page.has_next,
+        'next_url': next_page_url,
     })
+    
+
+@staff_member_required
+def catalog_cache_stats_view(request):
+    """Fragment cache hit/miss counters of the worker serving this request"""
+    return JsonResponse(fragment_cache.stats())
 
-def product_detail_view(request, id, slug):
-    product = get_object_or_404(Product, id=id, slug=slug, is_active=True)
 
-    # similar products - same category, exclude current
+@staff_member_required
+def ratelimit_stats_view(request):
+    """Rate limit allowed/blocked counters of the worker serving this request"""
+    return JsonResponse(ratelimit.stats())
 
-    similar_products = Product.objects.filter(
-        category = product.category,
-        is_active = True
-    ).exclude(id=product.id)[:6]
 
-    featured_products = Product.objects.filter(
-        is_featured=True,
-        is_active=True
-    ).exclude(id=product.id)[:4]
+@query_budget(7)
+@replica_reads
+async def search_view(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    results = await sync_to_async(search_products)(query, page=page) if query else None
+
+    return await arender(request, 'xypher_lux/search.html', {
+        'query': query,
+        'products': results.products if results else [],
+        'total': results.total if results else 0,
+        'results': results,
+    })
 
-    return render(request, "xypher_lux/detail.html", {
+# product + variants, session + user, and on a cold cache both rails
+# (two queries for the similar one) before their one hydration query
+@query_budget(8)
+@replica_reads
+async def product_detail_view(request, id, slug):
+    product = await aget_object_or_404(
+        Product.objects.select_related('category').with_variants(), id=id, slug=slug, is_active=True
+    )
+
+    # precomputed rails: one hydration query once their id lists are cached,
+    # none when both fragments showing them are
+    detail_rails = SimpleLazyObject(lambda: rails.detail_rails(product))
+
+    return await arender(request, "xypher_lux/detail.html", {
     "product" : product,
-    "similar_products": similar_products,
-    "featured_products": featured_products, 
+    "similar_products": SimpleLazyObject(lambda: detail_rails[0]),
+    "featured_products": SimpleLazyObject(lambda: detail_rails[1]),
     })
 
-@login_required
+
+@query_budget(5)
 def cart_view(request):
-    """Display the shopping cart"""
-    cart = get_or_create_cart(request.user)
-    cart_items = cart.items.select_related('product').all()
+    """Display the shopping cart (guest carts are read from the cache)"""
+    store = get_cart_store(request)
+    cart_items = store.items()
+    summary = store.summary
     
     context = {
-        'cart': cart,
+        'cart': store,
         'cart_items': cart_items,
-        'subtotal': cart.subtotal,
-        'shipping_cost': cart.shipping_cost,
-        'total': cart.total,
-        'total_items': cart.total_items,
+        'subtotal': summary.subtotal,
+        'shipping_cost': summary.shipping_cost,
+        'total': summary.total,
+        'total_items': summary.total_items,
     }
     
-    return render(request, 'xypher_lux/product/list.html', context)
+    return timed_render(request, 'xypher_lux/product/list.html', context)
 
 
-@login_required
+@query_budget(14)
 @require_POST
+@rate_limit(CART_IP_RATE, key='ip')
+@rate_limit(CART_SESSION_RATE, key='session')
 def add_to_cart_view(request):
     """Add item to cart via AJAX"""
     product_id = request.POST.get('product_id')
@@ -445,43 +558,31 @@ def add_to_cart_view(request):
     
     try:
         product = get_object_or_404(Product, id=product_id, is_active=True)
-        
-        # Check stock availability
-        if quantity > product.stock:
+
+        # Products sold in variants need a size/color that exists
+        variant = product.get_variant(size, color)
+        if variant is None and product.variants.exists():
             return JsonResponse({
                 'success': False,
-                'message': f'Only {product.stock} items available in stock'
+                'message': 'Please choose an available size and color'
             }, status=400)
-        
-        cart = get_or_create_cart(request.user)
-        pyth
-        # Check if item already exists in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            size=size,
-            color=color,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            # Update quantity if item already exists
-            new_quantity = cart_item.quantity + quantity
-            if new_quantity > product.stock:
-                return JsonResponse({
-                    'success': False,
-                    'message': f'Cannot add more. Only {product.stock} items available'
-                }, status=400)
-            cart_item.quantity = new_quantity
-            cart_item.save()
-        
-        return JsonResponse({
+
+        store = get_cart_store(request)
+        store.add(product, variant, quantity, size=size, color=color)
+
+        response = JsonResponse({
             'success': True,
             'message': f'{product.name} added to cart',
-            'cart_total_items': cart.total_items,
-            'cart_total': str(cart.total)
+            **store.summary.as_json()
         })
+        store.persist(response)
+        return response
         
+    except CartError as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=400)
     except Product.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -494,14 +595,13 @@ def add_to_cart_view(request):
         }, status=400)
 
 
-@login_required
+@query_budget(10)
 @require_POST
+@rate_limit(CART_IP_RATE, key='ip')
+@rate_limit(CART_SESSION_RATE, key='session')
 def update_cart_item_view(request, item_id):
     """Update cart item quantity"""
     try:
-        cart = get_or_create_cart(request.user)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
-        
         quantity = int(request.POST.get('quantity', 1))
         
         if quantity < 1:
@@ -509,23 +609,15 @@ def update_cart_item_view(request, item_id):
                 'success': False,
                 'message': 'Quantity must be at least 1'
             }, status=400)
-        
-        if quantity > cart_item.product.stock:
-            return JsonResponse({
-                'success': False,
-                'message': f'Only {cart_item.product.stock} items available'
-            }, status=400)
-        
-        cart_item.quantity = quantity
-        cart_item.save()
+
+        store = get_cart_store(request)
+        cart_item = store.update(item_id, quantity)
         
         return JsonResponse({
             'success': True,
             'message': 'Cart updated successfully',
             'item_total': str(cart_item.total_price),
-            'cart_subtotal': str(cart.subtotal),
-            'cart_total': str(cart.total),
-            'cart_total_items': cart.total_items
+            **store.summary.as_json()
         })
         
     except Exception as e:
@@ -535,23 +627,22 @@ def update_cart_item_view(request, item_id):
         }, status=400)
 
 
-@login_required
+@query_budget(8)
 @require_POST
+@rate_limit(CART_IP_RATE, key='ip')
+@rate_limit(CART_SESSION_RATE, key='session')
 def remove_from_cart_view(request, item_id):
     """Remove item from cart"""
     try:
-        cart = get_or_create_cart(request.user)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        store = get_cart_store(request)
+        cart_item = store.remove(item_id)
         
-        product_name = cart_item.product.name
-        cart_item.delete()
+        product_name = cart_item.product.name if cart_item else 'Item'
         
         return JsonResponse({
             'success': True,
             'message': f'{product_name} removed from cart',
-            'cart_subtotal': str(cart.subtotal),
-            'cart_total': str(cart.total),
-            'cart_total_items': cart.total_items
+            **store.summary.as_json()
         })
         
     except Exception as e:
@@ -561,14 +652,12 @@ def remove_from_cart_view(request, item_id):
         }, status=400)
 
 
-@login_required
 def clear_cart_view(request):
     """Clear all items from cart"""
-    cart = get_or_create_cart(request.user)
-    cart.items.all().delete()
+    get_cart_store(request).clear()
     
     messages.success(request, 'Cart cleared successfully')
-    return redirect('cart_view')
+    return redirect('xypher_lux:cart_view')
 
 
 @login_required
@@ -578,43 +667,24 @@ def checkout_view(request):
     
     if not cart.items.exists():
         messages.warning(request, 'Your cart is empty')
-        return redirect('cart_view')
+        return redirect('xypher_lux:cart_view')
     
     if request.method == 'POST':
         form = CheckoutForm(request.POST)
         if form.is_valid():
-            # Create order
-            order = form.save(commit=False)
-            order.user = request.user
-            order.order_number = f'ORD-{uuid.uuid4().hex[:8].upper()}'
-            order.subtotal = cart.subtotal
-            order.shipping_cost = cart.shipping_cost
-            order.total = cart.total
-            order.save()
-            
-            # Create order items from cart items
-            for cart_item in cart.items.all():
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    product_name=cart_item.product.name,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.price,
-                    size=cart_item.size,
-                    color=cart_item.color
-                )
-                
-                # Update product stock
-                cart_item.product.stock = F('stock') - cart_item.quantity
-                cart_item.product.save()
-            
-            # Clear cart
-            cart.items.all().delete()
-            cart.is_active = False
-            cart.save()
-            
+            try:
+                result = place_order(cart, form.save(commit=False))
+            except InsufficientStock as e:
+                messages.error(request, str(e))
+                return redirect('xypher_lux:cart_view')
+            except EmptyCart:
+                messages.warning(request, 'Your cart is empty')
+                return redirect('xypher_lux:cart_view')
+
+            order = result.order
+            logger.info("checkout order=%s timings_ms=%s", order.order_number, result.timings)
             messages.success(request, f'Order {order.order_number} placed successfully!')
-            return redirect('order_confirmation', order_id=order.id)
+            return redirect('xypher_lux:order_confirmation', order_id=order.id)
     else:
         form = CheckoutForm()
     
@@ -624,7 +694,7 @@ def checkout_view(request):
         'cart_items': cart.items.select_related('product').all(),
     }
     
-    return render(request, 'xypher_lux/product/list.html', context)
+    return timed_render(request, 'xypher_lux/product/list.html', context)
 
 
 @login_required
@@ -638,7 +708,7 @@ def order_confirmation_view(request, order_id):
         'order_items': order_items,
     }
     
-    return render(request, 'xypher_lux/product/list.html', context)
+    return timed_render(request, 'xypher_lux/product/list.html', context)
 
 
 @login_required
@@ -650,7 +720,7 @@ def order_history_view(request):
         'orders': orders,
     }
     
-    return render(request, 'xypher_lux/product/list.html', context)
+    return timed_render(request, 'xypher_lux/product/list.html', context)
 
 
 @login_required
@@ -664,4 +734,4 @@ def order_detail_view(request, order_id):
         'order_items': order_items,
     }
     
-    return render(request, 'xypher_lux/product/list.html', context)
\ No newline at end of file
+    return timed_render(request, 'xypher_lux/product/list.html', context)
\ No newline at end of file